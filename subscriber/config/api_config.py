@@ -27,7 +27,15 @@ RABBITMQ_CONFIG = {
     "vhost": os.getenv("RABBITMQ_VHOST", "/"),
     "queue": os.getenv("SCRAPING_QUEUE", "scraping_queue"),
     "exchange": os.getenv("SCRAPING_EXCHANGE", "scraping_exchange"),
-    "routing_key": os.getenv("SCRAPING_ROUTING_KEY", "scraping")
+    "routing_key": os.getenv("SCRAPING_ROUTING_KEY", "scraping"),
+    # Mensajes sin confirmar que el broker entrega por consumidor. Con 1 cada
+    # mensaje espera el round-trip del ack anterior; usar 1 solo si hay varios
+    # consumidores lentos y se quiere repartir la carga entre ellos
+    "prefetch_count": int(os.getenv("RABBITMQ_PREFETCH_COUNT", "50")),
+    # Mensajes confirmados con un único basic_ack(multiple=True); nunca más que el prefetch
+    "ack_batch_size": int(os.getenv("RABBITMQ_ACK_BATCH_SIZE", "16")),
+    # Segundos de espera antes de confirmar un lote incompleto
+    "ack_flush_interval": float(os.getenv("RABBITMQ_ACK_FLUSH_INTERVAL", "1.0"))
 }
 
 # Configuración del scraper
@@ -7,7 +7,7 @@ import uuid
 import threading
 import re
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any
 import sys
 from pathlib import Path
 
@@ -27,7 +27,7 @@ from config import (
     API_CONFIG, SCRAPER_CONFIG, 
     MONITORING_CONFIG, RABBITMQ_CONFIG
 )
-from manager import RabbitMQManager, cache_manager
+from manager import RabbitMQManager, MessageListener, cache_manager
 from scraper.services import ScraperService
 
 # Configurar logging
@@ -39,20 +39,33 @@ logger.add(
 )
 
 # Patrón de validación para categorías de Mercado Libre Uruguay
-# Formato: ML + una letra + 3 a 4 números consecutivos (ej: MLU107, MLA1234)
-CATEGORY_PATTERN = re.compile(r'^ML[A-Z]\d{3,4}$')
+# Formato: ML + una letra + 3 a 4 números consecutivos (ej: MLU107, MLA1234).
+# IGNORECASE evita crear una copia en mayúsculas de la categoría en cada validación.
+CATEGORY_PATTERN = re.compile(r'^ML[A-Z]\d{3,4}$', re.IGNORECASE)
 
 def validate_category(category: str) -> bool:
     """
     Valida que una categoría siga el patrón ML[A-Z][0-9]{3,4}
     
     Args:
-        category: Código de categoría a validar
+        category: Código de categoría a validar (sin distinguir mayúsculas)
         
     Returns:
         True si la categoría es válida, False en caso contrario
     """
-    return bool(CATEGORY_PATTERN.match(category.upper()))
+    return CATEGORY_PATTERN.match(category) is not None
+
+def generate_task_id() -> str:
+    """
+    Generar un ID único para una tarea de scraping.
+    
+    Returns:
+        UUID4 como string
+    """
+    return str(uuid.uuid4())
+
+# Fuente de IDs de tarea: se puede reemplazar (ej. IDs deterministas en tests)
+task_id_factory: Callable[[], str] = generate_task_id
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -201,7 +214,7 @@ async def create_scraping_task(
         url = f"{SCRAPER_CONFIG['base_url']}?category={request.category}&page={request.page}"
         
         # Crear tarea
-        task_id = str(uuid.uuid4())
+        task_id = task_id_factory()
         task = ScrapingTask(
             id=task_id,
             request=request,
@@ -406,7 +419,6 @@ def start_message_listener():
         logger.info("🎧 Iniciando listener de mensajes...")
         
         # Crear instancia del listener
-        from manager.listeners import MessageListener
         listener = MessageListener()
         
         listener_running = True
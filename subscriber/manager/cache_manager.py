@@ -2,22 +2,42 @@
 Módulo de cache en memoria para evitar tareas duplicadas de scraping.
 """
 
+import asyncio
+import sys
 import time
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from collections import deque
 from threading import Lock
 from loguru import logger
 
 from models.scraping_models import ScrapingResponse
 
+# Número de shards del cache (potencia de 2 para elegir el shard con una máscara).
+# Cada shard tiene su propio lock, así claves distintas no compiten por el mismo.
+# Los shards son copy-on-write: los lectores leen el dict publicado sin lock y los
+# escritores, bajo el lock del shard, construyen un dict nuevo y lo reasignan
+# (la reasignación de un elemento de lista es atómica bajo el GIL)
+_NUM_SHARDS = 32
 
-@dataclass
+# Máximo de categorías normalizadas memorizadas; las categorías son pocas, el tope
+# solo evita crecer sin límite si llegan valores arbitrarios
+_CATEGORY_CACHE_MAXSIZE = 1024
+
+# Clave interna del cache: (categoría en mayúsculas internada, página).
+# Su forma de texto, usada en logs y list_keys, es "CATEGORIA:page:N"
+CacheKey = Tuple[str, int]
+
+
+@dataclass(slots=True)
 class CacheEntry:
     """Entrada del cache con datos y timestamp."""
     data: ScrapingResponse
-    created_at: float
-    expires_at: float
+    created_at_ns: int  # time.monotonic_ns() al insertar
+    expires_at_ns: int  # time.monotonic_ns() a partir del cual la entrada expira
+    size: int = 0  # Tamaño estimado en bytes, calculado una vez al insertar
+    visited: bool = False  # Bit de SIEVE: se marca en cada HIT, sin lock
 
 
 class CacheManager:
@@ -25,23 +45,40 @@ class CacheManager:
     Administrador de cache en memoria para respuestas de scraping.
     
     Evita crear tareas duplicadas validando combinaciones de page+category
-    y guarda ScrapingResponse por máximo 1 hora.
+    y guarda ScrapingResponse por máximo 1 hora. El tamaño está acotado: al
+    llenarse un shard se desaloja una entrada con la política SIEVE.
     """
     
-    def __init__(self, ttl_hours: float = 1.0):
+    def __init__(self, ttl_hours: float = 1.0, max_entries: int = 10000):
         """
         Inicializar el cache manager.
         
         Args:
             ttl_hours: Tiempo de vida del cache en horas (default: 1 hora)
+            max_entries: Máximo aproximado de entradas; se reparte en partes
+                iguales entre los shards (default: 10000)
         """
-        self._cache: Dict[str, CacheEntry] = {}
-        self._lock = Lock()
+        # Lock striping: el dict se reparte en shards con locks de escritura independientes
+        self._shards: List[Dict[CacheKey, CacheEntry]] = [{} for _ in range(_NUM_SHARDS)]
+        self._locks: List[Lock] = [Lock() for _ in range(_NUM_SHARDS)]
+        # Bytes estimados y suma de expires_at_ns por shard, mantenidos bajo el lock
+        # de cada shard para que get_stats no tenga que recorrer las entradas
+        self._shard_bytes: List[int] = [0] * _NUM_SHARDS
+        self._shard_expiry_sums: List[int] = [0] * _NUM_SHARDS
+        # Cola (expires_at_ns, key) por shard en orden de alta. Con un TTL único el orden
+        # de alta es el de expiración, así que las vencidas están siempre al frente
+        self._expiry_queues: List[deque] = [deque() for _ in range(_NUM_SHARDS)]
+        # Capacidad por shard y "mano" de SIEVE (clave desde la que sigue la búsqueda)
+        self._shard_capacity = max(1, -(-max_entries // _NUM_SHARDS))
+        self._sieve_hands: List[Optional[CacheKey]] = [None] * _NUM_SHARDS
         self._ttl_seconds = ttl_hours * 3600  # Convertir horas a segundos
+        self._ttl_ns = int(self._ttl_seconds * 1_000_000_000)
+        # Categoría en mayúsculas e internada, por categoría tal como llega
+        self._category_cache: Dict[str, str] = {}
         
         logger.info(f"CacheManager inicializado con TTL de {ttl_hours} hora(s)")
     
-    def _generate_key(self, category: str, page: int) -> str:
+    def _generate_key(self, category: str, page: int) -> CacheKey:
         """
         Generar clave única para la combinación category+page.
         
@@ -50,9 +87,43 @@ class CacheManager:
             page: Número de página
             
         Returns:
-            Clave única para el cache
+            Tupla (categoría en mayúsculas, página) usada como clave del cache
+        """
+        normalized = self._category_cache.get(category)
+        if normalized is None:
+            if len(self._category_cache) >= _CATEGORY_CACHE_MAXSIZE:
+                self._category_cache.clear()
+            normalized = self._category_cache[category] = sys.intern(category.upper())
+        return (normalized, page)
+    
+    @staticmethod
+    def _format_key(key: CacheKey) -> str:
+        """
+        Obtener la forma de texto de una clave.
+        
+        Args:
+            key: Clave del cache
+            
+        Returns:
+            Clave con formato "CATEGORIA:page:N"
+        """
+        return f"{key[0]}:page:{key[1]}"
+    
+    def _shard_index(self, key: CacheKey) -> int:
+        """
+        Obtener el índice del shard que contiene una clave.
+        
+        Args:
+            key: Clave del cache
+            
+        Returns:
+            Índice del shard y de su lock
         """
-        return f"{category.upper()}:page:{page}"
+        return hash(key) & (_NUM_SHARDS - 1)
+    
+    def __len__(self) -> int:
+        """Cantidad de entradas almacenadas (incluye expiradas aún no limpiadas)."""
+        return sum(len(shard) for shard in self._shards)
     
     def _is_expired(self, entry: CacheEntry) -> bool:
         """
@@ -64,21 +135,83 @@ class CacheManager:
         Returns:
             True si la entrada ha expirado, False en caso contrario
         """
-        return time.time() > entry.expires_at
+        return time.monotonic_ns() > entry.expires_at_ns
     
-    def _cleanup_expired(self):
-        """Limpiar entradas expiradas del cache."""
-        current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._cache.items() 
-            if current_time > entry.expires_at
-        ]
+    def _discount(self, index: int, entry: CacheEntry):
+        """
+        Descontar de los acumulados del shard una entrada que sale. Se llama con su lock tomado.
+        
+        Args:
+            index: Índice del shard
+            entry: Entrada eliminada del shard
+        """
+        self._shard_bytes[index] -= entry.size
+        self._shard_expiry_sums[index] -= entry.expires_at_ns
+    
+    def _cleanup_expired(self, index: int) -> Dict[CacheKey, CacheEntry]:
+        """
+        Limpiar entradas expiradas de un shard. Se llama con su lock tomado.
         
+        Solo saca del frente de la cola las expiraciones vencidas, así que si no
+        hay ninguna el costo es mirar el primer elemento.
+        
+        Args:
+            index: Índice del shard a limpiar
+            
+        Returns:
+            Shard publicado tras la limpieza
+        """
+        queue = self._expiry_queues[index]
+        shard = self._shards[index]
+        now_ns = time.monotonic_ns()
+        
+        expired_keys = set()
+        while queue and queue[0][0] < now_ns:
+            expires_at_ns, key = queue.popleft()
+            entry = shard.get(key)
+            # Ignorar claves invalidadas o reescritas después de encolarse
+            if entry is not None and entry.expires_at_ns == expires_at_ns:
+                expired_keys.add(key)
+        
+        if not expired_keys:
+            return shard
+        
+        alive = dict(shard)
         for key in expired_keys:
-            del self._cache[key]
+            self._discount(index, alive.pop(key))
+        self._shards[index] = alive
+        logger.debug(f"Cache cleanup: eliminadas {len(expired_keys)} entradas expiradas")
+        return alive
+    
+    def _evict(self, index: int, shard: Dict[CacheKey, CacheEntry]):
+        """
+        Desalojar una entrada del shard con la política SIEVE. Se llama con su lock tomado.
+        
+        La mano recorre las claves de la más antigua a la más nueva: limpia el bit
+        visited de las entradas leídas desde la última pasada y desaloja la primera
+        que no fue leída. A diferencia de LRU, un HIT no reordena nada, por eso get
+        puede seguir sin lock.
         
-        if expired_keys:
-            logger.debug(f"Cache cleanup: eliminadas {len(expired_keys)} entradas expiradas")
+        Args:
+            index: Índice del shard
+            shard: Copia del shard (aún no publicada) de la que se desaloja
+        """
+        keys = list(shard)
+        hand = self._sieve_hands[index]
+        position = keys.index(hand) if hand in shard else 0
+        
+        # En dos vueltas siempre aparece una entrada con visited en False
+        for _ in range(2 * len(keys)):
+            entry = shard[keys[position]]
+            if not entry.visited:
+                break
+            entry.visited = False
+            position = (position + 1) % len(keys)
+        
+        victim = keys[position]
+        self._discount(index, shard.pop(victim))
+        self._sieve_hands[index] = keys[(position + 1) % len(keys)] if len(keys) > 1 else None
+        logger.debug("Cache EVICT para {}:page:{}", *victim)
     
     def get(self, category: str, page: int) -> Optional[ScrapingResponse]:
         """
@@ -92,49 +225,153 @@ class CacheManager:
             ScrapingResponse si existe en cache, None en caso contrario
         """
         key = self._generate_key(category, page)
+        index = self._shard_index(key)
         
-        with self._lock:
-            # Limpiar entradas expiradas
-            self._cleanup_expired()
-            
-            # Buscar en cache
-            if key in self._cache:
-                entry = self._cache[key]
-                if not self._is_expired(entry):
-                    logger.info(f"Cache HIT para {key}")
-                    return entry.data
-                else:
-                    # Eliminar entrada expirada
-                    del self._cache[key]
-                    logger.debug(f"Entrada expirada eliminada: {key}")
-            
-            logger.debug(f"Cache MISS para {key}")
-            return None
+        # Lectura sin lock del dict publicado. Una entrada expirada se trata como
+        # MISS pero no se elimina aquí: la limpieza ocurre en set/get_stats/list_keys
+        # Una sola búsqueda en el dict y la comparación de expiración en línea
+        entry = self._shards[index].get(key)
+        if entry is not None and entry.expires_at_ns >= time.monotonic_ns():
+            entry.visited = True
+            logger.info("Cache HIT para {}:page:{}", *key)
+            return entry.data
+        
+        logger.debug("Cache MISS para {}:page:{}", *key)
+        return None
     
     def set(self, category: str, page: int, response: ScrapingResponse):
         """
         Guardar respuesta en el cache.
         
+        Se guarda la instancia recibida tal cual, sin copiarla ni revalidarla:
+        ScrapingResponse es inmutable, así que compartirla es seguro.
+        
         Args:
             category: Código de categoría
             page: Número de página
             response: Respuesta de scraping a cachear
         """
         key = self._generate_key(category, page)
-        current_time = time.time()
-        expires_at = current_time + self._ttl_seconds
+        index = self._shard_index(key)
+        entry = self._new_entry(response)
+        
+        # acquire/release explícitos: set es el único camino caliente que toma lock
+        lock = self._locks[index]
+        lock.acquire()
+        try:
+            self._store(index, key, entry)
+        finally:
+            lock.release()
+        
+        self._log_set(key)
+    
+    def _new_entry(self, response: ScrapingResponse) -> CacheEntry:
+        """
+        Construir la entrada del cache para una respuesta.
         
-        entry = CacheEntry(
+        Args:
+            response: Respuesta de scraping a cachear
+            
+        Returns:
+            Entrada con expiración y tamaño calculados
+        """
+        now_ns = time.monotonic_ns()
+        return CacheEntry(
             data=response,
-            created_at=current_time,
-            expires_at=expires_at
+            created_at_ns=now_ns,
+            expires_at_ns=now_ns + self._ttl_ns,
+            size=len(response.model_dump_json())
         )
+    
+    def _store(self, index: int, key: CacheKey, entry: CacheEntry):
+        """
+        Publicar una entrada en su shard. Se llama con el lock del shard tomado.
+        
+        Args:
+            index: Índice del shard
+            key: Clave del cache
+            entry: Entrada a guardar
+        """
+        # Limpieza amortizada: cada escritura recoge las expiraciones vencidas del shard
+        shard = dict(self._cleanup_expired(index))
+        # La entrada se fecha antes de tomar el lock: si dos escritores se cruzan, la
+        # cola queda casi ordenada y una vencida puede esperar a la siguiente limpieza
+        # detrás de otra que vence unos microsegundos después (get ya la trata como MISS)
+        self._expiry_queues[index].append((entry.expires_at_ns, key))
+        previous = shard.get(key)
+        if previous is None and len(shard) >= self._shard_capacity:
+            self._evict(index, shard)
+        shard[key] = entry
+        self._shards[index] = shard
+        if previous is not None:
+            self._discount(index, previous)
+        self._shard_bytes[index] += entry.size
+        self._shard_expiry_sums[index] += entry.expires_at_ns
+    
+    def _log_set(self, key: CacheKey):
+        """
+        Registrar en el log el alta de una clave.
         
-        with self._lock:
-            self._cache[key] = entry
+        Args:
+            key: Clave guardada
+        """
+        # El reloj monotónico no es una fecha: solo para el log se usa la hora de pared
+        expires_datetime = datetime.now() + timedelta(seconds=self._ttl_seconds)
+        logger.info("Cache SET para {}:page:{}, expira: {:%Y-%m-%d %H:%M:%S}", *key, expires_datetime)
+    
+    async def aget(self, category: str, page: int) -> Optional[ScrapingResponse]:
+        """
+        Versión async de get. La lectura no toma locks, así que nunca bloquea el event loop.
+        
+        Args:
+            category: Código de categoría
+            page: Número de página
             
-        expires_datetime = datetime.fromtimestamp(expires_at)
-        logger.info(f"Cache SET para {key}, expira: {expires_datetime.strftime('%Y-%m-%d %H:%M:%S')}")
+        Returns:
+            ScrapingResponse si existe en cache, None en caso contrario
+        """
+        return self.get(category, page)
+    
+    async def aset(self, category: str, page: int, response: ScrapingResponse):
+        """
+        Versión async de set que no bloquea el event loop.
+        
+        Si el lock del shard está libre se escribe en el acto; si otro thread lo
+        tiene, la espera se delega al executor por defecto del loop.
+        
+        Args:
+            category: Código de categoría
+            page: Número de página
+            response: Respuesta de scraping a cachear
+        """
+        key = self._generate_key(category, page)
+        index = self._shard_index(key)
+        entry = self._new_entry(response)
+        lock = self._locks[index]
+        
+        if lock.acquire(blocking=False):
+            try:
+                self._store(index, key, entry)
+            finally:
+                lock.release()
+        else:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._store_locked, index, key, entry
+            )
+        
+        self._log_set(key)
+    
+    def _store_locked(self, index: int, key: CacheKey, entry: CacheEntry):
+        """
+        Tomar el lock del shard y publicar la entrada (usado desde el executor).
+        
+        Args:
+            index: Índice del shard
+            key: Clave del cache
+            entry: Entrada a guardar
+        """
+        with self._locks[index]:
+            self._store(index, key, entry)
     
     def invalidate(self, category: str, page: int) -> bool:
         """
@@ -148,22 +385,34 @@ class CacheManager:
             True si se eliminó una entrada, False si no existía
         """
         key = self._generate_key(category, page)
+        index = self._shard_index(key)
         
-        with self._lock:
-            if key in self._cache:
-                del self._cache[key]
-                logger.info(f"Cache invalidado para {key}")
-                return True
+        with self._locks[index]:
+            entry = self._shards[index].get(key)
+            if entry is None:
+                logger.debug("No se encontró entrada para invalidar: {}:page:{}", *key)
+                return False
             
-            logger.debug(f"No se encontró entrada para invalidar: {key}")
-            return False
+            shard = dict(self._shards[index])
+            del shard[key]
+            self._shards[index] = shard
+            self._discount(index, entry)
+            logger.info("Cache invalidado para {}:page:{}", *key)
+            return True
     
     def clear(self):
         """Limpiar todo el cache."""
-        with self._lock:
-            count = len(self._cache)
-            self._cache.clear()
-            logger.info(f"Cache limpiado completamente, {count} entradas eliminadas")
+        count = 0
+        for index, lock in enumerate(self._locks):
+            with lock:
+                count += len(self._shards[index])
+                self._shards[index] = {}
+                self._shard_bytes[index] = 0
+                self._shard_expiry_sums[index] = 0
+                self._expiry_queues[index] = deque()
+                self._sieve_hands[index] = None
+        
+        logger.info(f"Cache limpiado completamente, {count} entradas eliminadas")
     
     def get_stats(self) -> Dict[str, any]:
         """
@@ -172,30 +421,32 @@ class CacheManager:
         Returns:
             Diccionario con estadísticas del cache
         """
-        with self._lock:
-            # Limpiar expiradas para estadísticas precisas
-            self._cleanup_expired()
-            
-            total_entries = len(self._cache)
-            current_time = time.time()
-            
-            # Calcular tiempo promedio hasta expiración
-            if total_entries > 0:
-                avg_time_to_expire = sum(
-                    entry.expires_at - current_time 
-                    for entry in self._cache.values()
-                ) / total_entries
-            else:
-                avg_time_to_expire = 0
-            
-            return {
-                "total_entries": total_entries,
-                "ttl_seconds": self._ttl_seconds,
-                "avg_time_to_expire_seconds": avg_time_to_expire,
-                "memory_usage_mb": sum(
-                    len(str(entry.data.dict())) for entry in self._cache.values()
-                ) / (1024 * 1024)  # Estimación aproximada
-            }
+        # Sumar los acumulados de cada shard, tomando cada lock por separado
+        total_entries = 0
+        total_bytes = 0
+        expiry_sum = 0
+        for index, lock in enumerate(self._locks):
+            with lock:
+                # Limpiar expiradas para estadísticas precisas
+                total_entries += len(self._cleanup_expired(index))
+                total_bytes += self._shard_bytes[index]
+                expiry_sum += self._shard_expiry_sums[index]
+        
+        now_ns = time.monotonic_ns()
+        
+        # Promedio de (expires_at_ns - now_ns) = suma de expiraciones / n - now_ns
+        if total_entries > 0:
+            avg_time_to_expire = (expiry_sum - now_ns * total_entries) / total_entries / 1_000_000_000
+        else:
+            avg_time_to_expire = 0
+        
+        return {
+            "total_entries": total_entries,
+            "ttl_seconds": self._ttl_seconds,
+            "avg_time_to_expire_seconds": avg_time_to_expire,
+            # Estimación aproximada: tamaño del JSON de cada respuesta, acumulado al insertar
+            "memory_usage_mb": total_bytes / (1024 * 1024)
+        }
     
     def list_keys(self) -> list[str]:
         """
@@ -204,9 +455,11 @@ class CacheManager:
         Returns:
             Lista de claves en el cache
         """
-        with self._lock:
-            self._cleanup_expired()
-            return list(self._cache.keys())
+        keys: List[str] = []
+        for index, lock in enumerate(self._locks):
+            with lock:
+                keys.extend(map(self._format_key, self._cleanup_expired(index)))
+        return keys
 
 
 # Instancia global del cache manager
@@ -5,7 +5,7 @@ Listener de mensajes para RabbitMQ que procesa tareas de scraping.
 import json
 import sys
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import pika
 from loguru import logger
 
@@ -18,23 +18,48 @@ from typing import List
 from database.connectors import DatabaseConnector
 from manager.cache_manager import cache_manager
 
+try:
+    import orjson
+    # orjson decodifica bytes directamente y es varias veces más rápido que json
+    _json_loads = orjson.loads
+except ImportError:  # orjson es opcional
+    _json_loads = json.loads
+
 class MessageListener:
     """Listener de mensajes de RabbitMQ para tareas de scraping."""
     
-    def __init__(self):
-        """Inicializar el listener."""
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Inicializar el listener.
+        
+        Args:
+            config: Configuración de RabbitMQ (por defecto RABBITMQ_CONFIG)
+        """
         self.connection = None
         self.channel = None
         self.scraper_service = ScraperService()
         self.running = False
         
         # Configuración de RabbitMQ
-        self.config = RABBITMQ_CONFIG
+        self.config = config if config is not None else RABBITMQ_CONFIG
         self.queue_name = self.config["queue"]
         self.exchange_name = self.config["exchange"]
         self.routing_key = self.config["routing_key"]
         self.database_connector = DatabaseConnector()
         
+        # Acks en lote: se confirma con un único basic_ack(multiple=True) cada
+        # ack_batch_size mensajes o tras ack_flush_interval segundos sin llenar
+        # el lote. El lote no puede superar el prefetch: el broker dejaría de
+        # entregar mensajes antes de llenarlo
+        self._ack_batch_size = max(1, min(
+            self.config.get("ack_batch_size", 16),
+            self.config.get("prefetch_count", 50)
+        ))
+        self._ack_flush_interval = self.config.get("ack_flush_interval", 1.0)
+        self._pending_acks = 0
+        self._last_delivery_tag = None
+        self._ack_channel = None
+        
         logger.info(f"🎧 Inicializando listener para cola: {self.queue_name}")
     
     def _connect(self):
@@ -92,7 +117,7 @@ class MessageListener:
             )
             
             # Configurar QoS
-            self.channel.basic_qos(prefetch_count=1)
+            self.channel.basic_qos(prefetch_count=self.config.get("prefetch_count", 50))
             
             logger.info("✅ Conectado a RabbitMQ")
             
@@ -114,7 +139,7 @@ class MessageListener:
             logger.info(f"Mensaje recibido: {properties.message_id if hasattr(properties, 'message_id') else 'N/A'}")
             
             # Parsear mensaje
-            message_data = json.loads(body)
+            message_data = _json_loads(body)
             logger.info(f"Contenido del mensaje: {message_data}")
             
             # Adaptar formato del mensaje según su estructura
@@ -132,7 +157,7 @@ class MessageListener:
             if cached_response:
                 logger.info(f"Task {task.id} - ⚡ Cache HIT para {category}:page:{page}. Omitiendo procesamiento")
                 # Confirmar mensaje ya que está en cache
-                ch.basic_ack(delivery_tag=method.delivery_tag)
+                self._ack(ch, method.delivery_tag)
                 logger.info(f"Task {task.id} - Mensaje confirmado (desde cache)")
                 return
             
@@ -142,7 +167,7 @@ class MessageListener:
             self._process_task_sync(task)
             
             # Confirmar recepción del mensaje
-            ch.basic_ack(delivery_tag=method.delivery_tag)
+            self._ack(ch, method.delivery_tag)
             
             logger.info(f"Task {task.id} - Mensaje confirmado")
             
@@ -153,6 +178,35 @@ class MessageListener:
             ch.basic_nack(delivery_tag=method.delivery_tag, requeue=True)
             logger.error(f"Task {task.id} - Mensaje reencolado")
     
+    def _ack(self, ch, delivery_tag):
+        """
+        Registrar un mensaje procesado y confirmar el lote cuando se llena.
+        
+        Args:
+            ch: Canal de RabbitMQ
+            delivery_tag: Tag de entrega del mensaje procesado
+        """
+        self._ack_channel = ch
+        self._last_delivery_tag = delivery_tag
+        self._pending_acks += 1
+        
+        if self._pending_acks >= self._ack_batch_size:
+            self._flush_acks()
+        elif self._pending_acks == 1 and self.connection is not None:
+            # Primer mensaje del lote: programar la confirmación por inactividad
+            self.connection.call_later(self._ack_flush_interval, self._flush_acks)
+    
+    def _flush_acks(self):
+        """Confirmar todos los mensajes pendientes con un único basic_ack(multiple=True)."""
+        if not self._pending_acks:
+            return
+        
+        # multiple=True confirma todos los tags <= al último; los anteriores
+        # procesados por este consumidor ya fueron confirmados o rechazados
+        self._ack_channel.basic_ack(delivery_tag=self._last_delivery_tag, multiple=True)
+        logger.debug(f"✅ {self._pending_acks} mensajes confirmados hasta tag {self._last_delivery_tag}")
+        self._pending_acks = 0
+    
     def _adapt_message_format(self, message_data: dict) -> dict:
         """
         Adaptar el formato del mensaje para que sea compatible con ScrapingTask.
@@ -286,7 +340,16 @@ class MessageListener:
         try:
             self.running = False
             
-            if self.channel and self.channel.is_consuming():
+            # Confirmar el lote pendiente antes de cerrar para no reprocesarlo
+            try:
+                self._flush_acks()
+            except Exception as e:
+                # Canal ya cerrado: el broker reentregará los mensajes pendientes
+                self._pending_acks = 0
+                logger.error(f"❌ Error al confirmar mensajes pendientes: {e}")
+            
+            # BlockingChannel no tiene is_consuming(); consumer_tags lista los consumidores activos
+            if self.channel and self.channel.consumer_tags:
                 self.channel.stop_consuming()
                 logger.info("⏹️ Escucha de mensajes detenida")
             
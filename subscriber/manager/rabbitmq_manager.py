@@ -484,7 +484,8 @@ class RabbitMQManager:
     def stop_consuming(self):
         """Detener el consumo de mensajes."""
         try:
-            if self.channel and self.channel.is_consuming():
+            # BlockingChannel no tiene is_consuming(); consumer_tags lista los consumidores activos
+            if self.channel and self.channel.consumer_tags:
                 self.channel.stop_consuming()
                 logger.info("⏹️ Consumo de mensajes detenido")
         except Exception as e:
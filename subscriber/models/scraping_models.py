@@ -3,7 +3,7 @@ Modelos de datos para la API de scraping.
 """
 
 from typing import Optional, List
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, ConfigDict, validator
 import re
 from enum import Enum
 
@@ -54,6 +54,9 @@ class ScrapingRequest(BaseModel):
 
 class ScrapingResponse(BaseModel):
     """Modelo para respuestas de scraping."""
+    # Inmutable: el CacheManager guarda y devuelve la misma instancia
+    model_config = ConfigDict(frozen=True)
+    
     task_id: str
     status: ScrapingStatus
     message: str
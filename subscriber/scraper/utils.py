@@ -6,14 +6,29 @@ import re
 import json
 import csv
 import os
+import operator
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from decimal import Decimal, InvalidOperation
 from datetime import datetime
-import pandas as pd
 from loguru import logger
 
 
+# Función JS que resuelve varios selectores en una sola ida y vuelta al browser.
+# Recibe {campo: [selector, atributo|null]} y retorna {campo: texto|atributo|null}.
+_EXTRACT_FIELDS_JS = """
+(element, spec) => Object.fromEntries(
+    Object.entries(spec).map(([field, [selector, attribute]]) => {
+        const found = element.querySelector(selector);
+        if (!found) {
+            return [field, null];
+        }
+        return [field, attribute ? found.getAttribute(attribute) : found.textContent];
+    })
+)
+"""
+
 def normalize_price(price_text: str, currency: str = "UYU") -> Optional[Decimal]:
     """
     Normalizar el texto del precio a un valor decimal.
@@ -140,18 +155,20 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remover espacios extra y saltos de línea
-    cleaned = re.sub(r'\s+', ' ', text.strip())
-    # Remover caracteres especiales problemáticos
-    cleaned = re.sub(r'[\r\n\t]', '', cleaned)
-    
-    return cleaned
+    # Colapsar espacios, tabs y saltos de línea (\s incluye \r, \n y \t)
+    # en una sola pasada
+    return re.sub(r'\s+', ' ', text.strip())
 
 
+@lru_cache(maxsize=256)
 def ensure_directory(path: str) -> Path:
     """
     Asegurar que el directorio existe, creándolo si es necesario.
     
+    El resultado se cachea por ruta para no repetir el mkdir en cada
+    exportación al mismo directorio; usar ensure_directory.cache_clear()
+    si el directorio puede eliminarse durante la ejecución.
+    
     Args:
         path: Ruta del directorio
         
@@ -182,8 +199,21 @@ def export_to_csv(products: List[Dict[str, Any]], output_path: str) -> str:
     
     try:
         with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-            if products:
-                fieldnames = products[0].keys()
+            first_keys = products[0].keys()
+            fieldnames = list(first_keys)
+            
+            # Camino rápido: si todos los productos tienen las mismas claves se
+            # extraen los valores por posición en lugar de usar DictWriter
+            if fieldnames and all(product.keys() == first_keys for product in products):
+                get_row = operator.itemgetter(*fieldnames)
+                writer = csv.writer(csvfile)
+                writer.writerow(fieldnames)
+                if len(fieldnames) == 1:
+                    writer.writerows((get_row(product),) for product in products)
+                else:
+                    writer.writerows(map(get_row, products))
+            else:
+                # DictWriter escribe '' para las claves que faltan
                 writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
                 writer.writeheader()
                 writer.writerows(products)
@@ -238,6 +268,9 @@ def export_to_excel(products: List[Dict[str, Any]], output_path: str) -> str:
         logger.warning("No hay productos para exportar")
         return ""
     
+    # Import diferido: pandas (y openpyxl) solo se cargan al exportar a Excel
+    import pandas as pd
+    
     try:
         ensure_directory(os.path.dirname(output_path))
         
@@ -333,3 +366,44 @@ def safe_get_attribute(element, selector: str, attribute: str, default: str = ""
     except Exception as e:
         logger.debug(f"Error al extraer atributo '{attribute}' con selector '{selector}': {e}")
         return default
+
+
+def extract_fields(
+    element,
+    spec: Dict[str, Tuple[str, Optional[str]]],
+    default: str = ""
+) -> Dict[str, str]:
+    """
+    Extraer varios campos de un elemento con una única evaluación en el browser.
+    
+    Equivale a llamar safe_get_text/safe_get_attribute por cada campo, pero
+    resuelve todos los selectores en un solo element.evaluate en lugar de un
+    query_selector por campo.
+    
+    Args:
+        element: Elemento del DOM
+        spec: Mapa campo -> (selector CSS, atributo o None para el texto)
+        default: Valor por defecto para campos no encontrados
+        
+    Returns:
+        Diccionario campo -> texto limpio o valor del atributo
+    """
+    try:
+        raw = element.evaluate(
+            _EXTRACT_FIELDS_JS,
+            {field: [selector, attribute] for field, (selector, attribute) in spec.items()}
+        )
+    except Exception as e:
+        logger.debug(f"Error al extraer campos {list(spec)}: {e}")
+        return {field: default for field in spec}
+    
+    fields = {}
+    for field, (_, attribute) in spec.items():
+        value = raw.get(field)
+        if not value:
+            fields[field] = default
+        elif attribute:
+            fields[field] = value
+        else:
+            fields[field] = clean_text(value)
+    return fields
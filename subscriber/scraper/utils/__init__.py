@@ -4,16 +4,22 @@ Utilidades para el scraper de Mercado Libre Uruguay.
 
 from .utils import (
     normalize_price,
+    normalize_prices,
     extract_discount_percentage,
     extract_rating,
+    extract_ratings,
     extract_review_count,
-    clean_text
+    clean_text,
+    clear_caches
 )
 
 __all__ = [
     "normalize_price",
+    "normalize_prices",
     "extract_discount_percentage", 
     "extract_rating",
+    "extract_ratings",
     "extract_review_count",
-    "clean_text"
+    "clean_text",
+    "clear_caches"
 ]
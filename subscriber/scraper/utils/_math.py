@@ -0,0 +1,38 @@
+"""
+Núcleos numéricos del rate limiter.
+
+Si numba está instalado se compilan con njit; si no, se usa la misma
+implementación en Python puro.
+"""
+
+try:
+    from numba import njit
+except ImportError:  # numba es opcional
+    njit = None
+
+
+def _calc_delay(attempt: int, base: float, exp: float, max_d: float,
+                jitter: bool, r: float) -> float:
+    """
+    Calcular el backoff exponencial acotado, con full jitter opcional.
+    
+    Args:
+        attempt: Número de intento (empieza en 1)
+        base: Delay base en segundos
+        exp: Base exponencial
+        max_d: Delay máximo en segundos
+        jitter: Si aplicar full jitter
+        r: Valor aleatorio uniforme en [0, 1)
+        
+    Returns:
+        Delay en segundos
+    """
+    d = base * exp ** (attempt - 1)
+    if d > max_d:
+        d = max_d
+    if jitter:
+        d *= r
+    return d
+
+
+calc_delay = njit(cache=True)(_calc_delay) if njit is not None else _calc_delay
@@ -42,20 +42,20 @@ def handle_scraping_exceptions(
         log_errors: Si registrar errores en el log
     """
     def decorator(func: Callable) -> Callable:
+        # Resolver el tipo de función una sola vez, no en cada intento
+        is_coro = asyncio.iscoroutinefunction(func)
+        
         @functools.wraps(func)
         async def async_wrapper(*args, **kwargs) -> Any:
             last_exception = None
             
             for attempt in range(max_retries + 1):
                 try:
-                    if asyncio.iscoroutinefunction(func):
-                        return await func(*args, **kwargs)
-                    else:
-                        return func(*args, **kwargs)
+                    return await func(*args, **kwargs)
                         
                 except NavigationException as e:
                     if log_errors:
-                        logger.error(f"Error de navegación en intento {attempt + 1}: {e}")
+                        logger.error("Error de navegación en intento {}: {}", attempt + 1, e)
                     last_exception = e
                     if attempt < max_retries:
                         await asyncio.sleep(1.0 * (attempt + 1))  # Backoff lineal
@@ -64,7 +64,7 @@ def handle_scraping_exceptions(
                     
                 except ExtractionException as e:
                     if log_errors:
-                        logger.warning(f"Error de extracción en intento {attempt + 1}: {e}")
+                        logger.warning("Error de extracción en intento {}: {}", attempt + 1, e)
                     last_exception = e
                     if attempt < max_retries:
                         await asyncio.sleep(0.5 * (attempt + 1))  # Backoff más rápido
@@ -73,7 +73,7 @@ def handle_scraping_exceptions(
                     
                 except RateLimitException as e:
                     if log_errors:
-                        logger.warning(f"Rate limit alcanzado en intento {attempt + 1}: {e}")
+                        logger.warning("Rate limit alcanzado en intento {}: {}", attempt + 1, e)
                     last_exception = e
                     if attempt < max_retries:
                         await asyncio.sleep(2.0 * (attempt + 1))  # Backoff más lento
@@ -82,7 +82,7 @@ def handle_scraping_exceptions(
                     
                 except Exception as e:
                     if log_errors:
-                        logger.error(f"Error inesperado en intento {attempt + 1}: {type(e).__name__}: {e}")
+                        logger.error("Error inesperado en intento {}: {}: {}", attempt + 1, type(e).__name__, e)
                     last_exception = e
                     if attempt < max_retries:
                         await asyncio.sleep(1.0 * (attempt + 1))
@@ -91,7 +91,7 @@ def handle_scraping_exceptions(
             
             # Si llegamos aquí, todos los intentos fallaron
             if log_errors and last_exception:
-                logger.error(f"Todos los {max_retries + 1} intentos fallaron. Último error: {last_exception}")
+                logger.error("Todos los {} intentos fallaron. Último error: {}", max_retries + 1, last_exception)
             
             return default_return
         
@@ -105,7 +105,7 @@ def handle_scraping_exceptions(
                     
                 except NavigationException as e:
                     if log_errors:
-                        logger.error(f"Error de navegación en intento {attempt + 1}: {e}")
+                        logger.error("Error de navegación en intento {}: {}", attempt + 1, e)
                     last_exception = e
                     if attempt < max_retries:
                         import time
@@ -115,7 +115,7 @@ def handle_scraping_exceptions(
                     
                 except ExtractionException as e:
                     if log_errors:
-                        logger.warning(f"Error de extracción en intento {attempt + 1}: {e}")
+                        logger.warning("Error de extracción en intento {}: {}", attempt + 1, e)
                     last_exception = e
                     if attempt < max_retries:
                         import time
@@ -125,7 +125,7 @@ def handle_scraping_exceptions(
                     
                 except RateLimitException as e:
                     if log_errors:
-                        logger.warning(f"Rate limit alcanzado en intento {attempt + 1}: {e}")
+                        logger.warning("Rate limit alcanzado en intento {}: {}", attempt + 1, e)
                     last_exception = e
                     if attempt < max_retries:
                         import time
@@ -135,7 +135,7 @@ def handle_scraping_exceptions(
                     
                 except Exception as e:
                     if log_errors:
-                        logger.error(f"Error inesperado en intento {attempt + 1}: {type(e).__name__}: {e}")
+                        logger.error("Error inesperado en intento {}: {}: {}", attempt + 1, type(e).__name__, e)
                     last_exception = e
                     if attempt < max_retries:
                         import time
@@ -145,12 +145,12 @@ def handle_scraping_exceptions(
             
             # Si llegamos aquí, todos los intentos fallaron
             if log_errors and last_exception:
-                logger.error(f"Todos los {max_retries + 1} intentos fallaron. Último error: {last_exception}")
+                logger.error("Todos los {} intentos fallaron. Último error: {}", max_retries + 1, last_exception)
             
             return default_return
         
         # Retornar el wrapper apropiado
-        if asyncio.iscoroutinefunction(func):
+        if is_coro:
             return async_wrapper
         else:
             return sync_wrapper
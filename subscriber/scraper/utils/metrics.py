@@ -4,14 +4,18 @@ Sistema de métricas y monitoreo para el scraper.
 
 import time
 import json
+import queue
+import atexit
+import threading
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import dataclass
 from pathlib import Path
 from loguru import logger
 
 
-@dataclass
+@dataclass(slots=True)
 class ScrapingMetrics:
     """Métricas de scraping para un job específico."""
     job_id: str
@@ -29,7 +33,7 @@ class ScrapingMetrics:
     
     # Métricas de errores
     total_errors: int = 0
-    error_types: Dict[str, int] = None
+    error_types: Counter[str] = None
     
     # Métricas de rate limiting
     total_requests: int = 0
@@ -42,12 +46,15 @@ class ScrapingMetrics:
     
     def __post_init__(self):
         if self.error_types is None:
-            self.error_types = {}
+            self.error_types = Counter()
+        elif not isinstance(self.error_types, Counter):
+            # Aceptar un dict plano (ej. métricas restauradas) y normalizarlo
+            self.error_types = Counter(self.error_types)
     
     def add_error(self, error_type: str):
         """Agregar un error del tipo especificado."""
         self.total_errors += 1
-        self.error_types[error_type] = self.error_types.get(error_type, 0) + 1
+        self.error_types[error_type] += 1
     
     def finish(self):
         """Marcar el job como finalizado y calcular métricas finales."""
@@ -73,10 +80,23 @@ class ScrapingMetrics:
     
     def to_dict(self) -> Dict[str, Any]:
         """Convertir a diccionario para serialización."""
-        data = asdict(self)
-        data['start_time'] = self.start_time.isoformat()
-        if self.end_time:
-            data['end_time'] = self.end_time.isoformat()
+        data = {
+            'job_id': self.job_id,
+            'start_time': self.start_time.isoformat(),
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+            'total_products_found': self.total_products_found,
+            'products_extracted': self.products_extracted,
+            'products_failed': self.products_failed,
+            'total_extraction_time': self.total_extraction_time,
+            'average_product_time': self.average_product_time,
+            'total_errors': self.total_errors,
+            'error_types': dict(self.error_types),
+            'total_requests': self.total_requests,
+            'rate_limited_requests': self.rate_limited_requests,
+            'average_request_time': self.average_request_time,
+            'category_id': self.category_id,
+            'page_number': self.page_number,
+        }
         data['success_rate'] = self.get_success_rate()
         data['error_rate'] = self.get_error_rate()
         data['duration'] = (self.end_time - self.start_time).total_seconds() if self.end_time else 0
@@ -86,10 +106,17 @@ class ScrapingMetrics:
 class MetricsCollector:
     """Recolector de métricas para el scraper."""
     
-    def __init__(self, output_dir: str = "output/metrics"):
+    def __init__(self, output_dir: str = "output/metrics", write_batch_size: int = 32):
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
+        # Cola de escritura diferida: save_metrics solo encola y un hilo
+        # en segundo plano agrupa los snapshots en una única escritura
+        self.write_batch_size = write_batch_size
+        self._write_queue: "queue.Queue[Tuple[Path, Dict[str, Any], bool]]" = queue.Queue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        
         self.current_job: Optional[ScrapingMetrics] = None
         self.job_history: List[ScrapingMetrics] = []
         
@@ -177,27 +204,108 @@ class MetricsCollector:
         }
     
     def save_metrics(self, filename: Optional[str] = None):
-        """Guardar métricas en archivo JSON."""
-        if not filename:
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"scraping_metrics_{timestamp}.json"
+        """
+        Encolar un snapshot de métricas para guardarlo.
+        
+        La escritura la realiza un hilo en segundo plano que agrupa varios
+        snapshots por archivo, de modo que el scraping no se bloquea en I/O.
+        Sin filename el snapshot se agrega como una línea JSON (JSON lines) a
+        un archivo diario rotativo; con filename el archivo se sobrescribe con
+        el snapshot en JSON indentado, como antes.
+        """
+        append_line = not filename
+        if append_line:
+            filename = f"scraping_metrics_{datetime.now().strftime('%Y%m%d')}.jsonl"
         
         filepath = self.output_dir / filename
         
         metrics_data = {
+            "timestamp": datetime.now().isoformat(),
             "current_job": self.get_current_job_stats(),
             "global_stats": self.get_global_stats(),
             "job_history": [job.to_dict() for job in self.job_history[-10:]]  # Últimos 10 jobs
         }
         
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(metrics_data, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"📊 Métricas guardadas en: {filepath}")
+        self._ensure_writer()
+        self._write_queue.put((filepath, metrics_data, append_line))
+    
+    def flush(self):
+        """Esperar a que se escriban todos los snapshots encolados."""
+        if self._writer_thread is not None:
+            self._write_queue.join()
+    
+    def _ensure_writer(self):
+        """Iniciar el hilo escritor la primera vez que se necesita."""
+        if self._writer_thread is not None:
+            return
+        with self._writer_lock:
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop,
+                    name="metrics-writer",
+                    daemon=True
+                )
+                self._writer_thread.start()
+                atexit.register(self.flush)
+    
+    def _writer_loop(self):
+        """Drenar la cola de escritura agrupando hasta write_batch_size snapshots."""
+        while True:
+            batch = [self._write_queue.get()]
+            while len(batch) < self.write_batch_size:
+                try:
+                    batch.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
             
-        except Exception as e:
-            logger.error(f"❌ Error al guardar métricas: {e}")
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._write_queue.task_done()
+    
+    def _write_batch(self, batch: List[Tuple[Path, Dict[str, Any], bool]]):
+        """
+        Escribir un lote de snapshots con una sola escritura por archivo.
+        
+        Cada snapshot se serializa por separado: uno que falle se descarta
+        con un log de error sin detener el hilo escritor.
+        """
+        lines_by_file: Dict[Path, List[str]] = defaultdict(list)
+        # Archivos con nombre explícito: solo cuenta el último snapshot
+        documents: Dict[Path, str] = {}
+        for filepath, metrics_data, append_line in batch:
+            try:
+                if append_line:
+                    lines_by_file[filepath].append(
+                        json.dumps(metrics_data, ensure_ascii=False, default=str) + "\n"
+                    )
+                else:
+                    documents[filepath] = json.dumps(
+                        metrics_data, indent=2, ensure_ascii=False, default=str
+                    )
+            except Exception as e:
+                logger.error(f"❌ Error al serializar métricas para {filepath}: {e}")
+        
+        for filepath, lines in lines_by_file.items():
+            try:
+                with open(filepath, 'a', encoding='utf-8') as f:
+                    f.write("".join(lines))
+                
+                logger.info(f"📊 {len(lines)} snapshot(s) de métricas guardados en: {filepath}")
+                
+            except Exception as e:
+                logger.error(f"❌ Error al guardar métricas: {e}")
+        
+        for filepath, document in documents.items():
+            try:
+                with open(filepath, 'w', encoding='utf-8') as f:
+                    f.write(document)
+                
+                logger.info(f"📊 Métricas guardadas en: {filepath}")
+                
+            except Exception as e:
+                logger.error(f"❌ Error al guardar métricas: {e}")
     
     def print_summary(self):
         """Imprimir resumen de métricas en consola."""
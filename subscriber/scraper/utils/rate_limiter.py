@@ -4,22 +4,26 @@ Sistema de Rate Limiting y Retry Logic para el scraper.
 
 import asyncio
 import random
+import re
 import time
-from typing import Callable, Any, Optional
-from dataclasses import dataclass
+from typing import Callable, Any, Dict, Optional
+from dataclasses import dataclass, asdict
+from functools import lru_cache
 from urllib.parse import urlparse
 from loguru import logger
 
+from ._math import calc_delay
+
 
 @dataclass
 class RateLimitConfig:
     """Configuración para rate limiting."""
-    requests_per_minute: int = 30
-    delay_between_requests: float = 1.0  # 1 segundo entre requests
-    burst_size: int = 5
+    requests_per_minute: int = 30  # Tasa de reposición del token bucket
+    delay_between_requests: float = 1.0  # Sin efecto: lo reemplaza el token bucket
+    burst_size: int = 5  # Capacidad del token bucket
     jitter: bool = True
     max_concurrent: int = 3
-    max_requests_per_second: float = 1.0  # Máximo 1 request por segundo
+    max_requests_per_second: float = 1.0  # Sin efecto: lo reemplaza el token bucket
 
 
 @dataclass
@@ -33,70 +37,181 @@ class RetryConfig:
 
 
 class RateLimiter:
-    """Controla la velocidad de las peticiones para evitar bloqueos."""
+    """
+    Controla la velocidad de las peticiones para evitar bloqueos.
+    
+    Usa un token bucket por dominio: cada dominio acumula hasta burst_size
+    tokens que se reponen a requests_per_minute / 60 tokens por segundo.
+    La reposición la hace una única tarea en segundo plano que avisa a las
+    tareas en espera mediante un asyncio.Condition, en lugar de un sleep
+    por cada petición; la tarea termina sola cuando todos los buckets están
+    llenos. La concurrencia (max_concurrent) también se limita por dominio,
+    de modo que una petición lenta a un dominio no bloquea a los demás.
+    
+    El Condition, los semáforos y la tarea de reposición pertenecen al event
+    loop en el que se usan; si acquire se llama desde otro loop (el worker
+    crea uno por tarea y cli.py usa asyncio.run) se recrean para el nuevo.
+    Los tokens de los buckets se conservan entre loops.
+    """
+    
+    # Referencia directa al generador para el jitter del camino caliente
+    _random = random.random
     
     def __init__(self, config: RateLimitConfig):
         self.config = config
+        # Loop del último acquire; su reloj es monótono
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         self.last_request_time = 0.0
         self.request_count = 0
-        self.minute_start = time.time()
-        self.semaphore = asyncio.Semaphore(config.max_concurrent)
-        self.domain_limits = {}  # Límites por dominio
+        self.domain_semaphores: Dict[str, asyncio.BoundedSemaphore] = {}  # Concurrencia por dominio
+        self.domain_limits = {}  # Token bucket por dominio
+        self._cond: Optional[asyncio.Condition] = None
+        self._refill_task: Optional[asyncio.Task] = None
     
-    async def acquire(self, domain: str = "default"):
-        """Adquirir permiso para hacer una petición."""
-        await self.semaphore.acquire()
+    def acquire(self, domain: str = "default", stats: Optional["_Stats"] = None) -> "_LimiterCtx":
+        """
+        Obtener el contexto de permiso para hacer una petición al dominio.
         
-        # Inicializar límites del dominio si no existen
-        if domain not in self.domain_limits:
-            self.domain_limits[domain] = {
-                "last_request_time": 0.0,
-                "request_count": 0,
-                "minute_start": time.time()
-            }
+        Uso: ``async with rate_limiter.acquire(domain): ...``; el slot de
+        concurrencia se libera al salir del bloque, incluso si hay excepción.
         
-        domain_limit = self.domain_limits[domain]
-        current_time = time.time()
-        time_since_last = current_time - domain_limit["last_request_time"]
+        Args:
+            domain: Dominio al que se hace la petición
+            stats: Contadores donde sumar el tiempo total dentro del bloque
+                (espera del permiso incluida), si se indican
+        """
+        return _LimiterCtx(self, domain, stats)
+    
+    async def _acquire(self, domain: str) -> asyncio.BoundedSemaphore:
+        """
+        Esperar slot de concurrencia y token del bucket del dominio.
         
-        # Verificar límite por minuto para el dominio
-        if current_time - domain_limit["minute_start"] >= 60:
-            domain_limit["request_count"] = 0
-            domain_limit["minute_start"] = current_time
+        Returns:
+            Semáforo del dominio, que el llamador debe liberar
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._bind_loop(loop)
         
-        if domain_limit["request_count"] >= self.config.requests_per_minute:
-            # Esperar hasta el siguiente minuto
-            wait_time = 60 - (current_time - domain_limit["minute_start"])
-            logger.info(f"Rate limit alcanzado para dominio {domain}. Esperando {wait_time:.1f} segundos...")
-            await asyncio.sleep(wait_time)
-            domain_limit["request_count"] = 0
-            domain_limit["minute_start"] = time.time()
+        # Bounded: un release de más lanza ValueError en lugar de sumar slots.
+        # Entre el get y la asignación no hay awaits, así que no hace falta lock
+        semaphore = self.domain_semaphores.get(domain)
+        if semaphore is None:
+            semaphore = self.domain_semaphores[domain] = asyncio.BoundedSemaphore(
+                self.config.max_concurrent
+            )
+        await semaphore.acquire()
         
-        # Verificar límite de 1 request por segundo
-        min_delay = 1.0 / self.config.max_requests_per_second
-        if time_since_last < min_delay:
-            delay = min_delay - time_since_last
-            if self.config.jitter:
-                delay += random.uniform(0, 0.2)  # Jitter reducido para mayor precisión
-            logger.debug(f"Rate limiting para {domain}: esperando {delay:.2f}s")
-            await asyncio.sleep(delay)
+        bucket = self.domain_limits.get(domain)
+        if bucket is None:
+            bucket = self.domain_limits[domain] = {
+                "tokens": float(self.config.burst_size)
+            }
+        
+        try:
+            if bucket["tokens"] < 1:
+                logger.debug("Rate limiting para {}: esperando token", domain)
+                # Tras cambiar de loop puede haber deuda sin tarea de reposición
+                self._ensure_refill()
+                async with self._cond:
+                    await self._cond.wait_for(lambda: bucket["tokens"] >= 1)
+        except BaseException:
+            # Cancelado mientras esperaba: no retener el slot del dominio
+            semaphore.release()
+            raise
         
-        # Actualizar tiempos del dominio
-        domain_limit["last_request_time"] = time.time()
-        domain_limit["request_count"] += 1
+        bucket["tokens"] -= 1
+        self._ensure_refill()
         
-        # Actualizar contadores globales
-        self.last_request_time = time.time()
+        self.last_request_time = loop.time()
         self.request_count += 1
+        return semaphore
+    
+    def _bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """
+        Recrear el estado ligado al event loop para usarlo desde otro.
+        
+        Los primitivos de asyncio quedan atados al primer loop que los usa,
+        y la tarea de reposición anterior no volverá a correr (su loop ya no
+        está activo), así que se descartan en lugar de reutilizarlos.
+        """
+        self._loop = loop
+        self._cond = asyncio.Condition()
+        self.domain_semaphores = {}
+        self._refill_task = None
+    
+    def _ensure_refill(self):
+        """Arrancar la tarea de reposición si no está corriendo."""
+        task = self._refill_task
+        if task is None or task.done():
+            self._refill_task = self._loop.create_task(self._refill_loop())
+    
+    async def _refill_loop(self):
+        """Reponer un token por dominio en cada tick y despertar a los que esperan."""
+        capacity = self.config.burst_size
+        interval = 60.0 / self.config.requests_per_minute
+        
+        while True:
+            delay = interval
+            if self.config.jitter:
+                delay += 0.05 * interval * self._random()
+            await asyncio.sleep(delay)
+            
+            async with self._cond:
+                full = True
+                for bucket in self.domain_limits.values():
+                    tokens = bucket["tokens"] + 1
+                    if tokens >= capacity:
+                        tokens = capacity
+                    else:
+                        full = False
+                    bucket["tokens"] = tokens
+                self._cond.notify_all()
+            
+            # Sin deuda en ningún dominio: el próximo acquire la vuelve a arrancar
+            if full:
+                self._refill_task = None
+                return
     
-    def release(self):
-        """Liberar el semáforo después de una petición."""
-        self.semaphore.release()
+    def close(self):
+        """Cancelar la tarea de reposición de tokens."""
+        task = self._refill_task
+        self._refill_task = None
+        if task is not None and not task.done():
+            task.cancel()
+
+
+class _LimiterCtx:
+    """Contexto async que adquiere y libera un permiso del RateLimiter."""
+    
+    __slots__ = ("_limiter", "_domain", "_stats", "_semaphore", "_start_ns")
+    
+    def __init__(self, limiter: RateLimiter, domain: str, stats: Optional["_Stats"] = None):
+        self._limiter = limiter
+        self._domain = domain
+        self._stats = stats
+        self._semaphore = None
+        self._start_ns = 0
+    
+    async def __aenter__(self) -> "_LimiterCtx":
+        if self._stats is not None:
+            self._start_ns = time.monotonic_ns()
+        self._semaphore = await self._limiter._acquire(self._domain)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        self._semaphore.release()
+        if self._stats is not None:
+            self._stats.total_wait_time_ns += time.monotonic_ns() - self._start_ns
+        return False
 
 
 class RetryHandler:
     """Maneja reintentos con backoff exponencial."""
     
+    # Referencia directa al generador para el jitter del camino caliente
+    _random = random.random
+    
     def __init__(self, config: RetryConfig):
         self.config = config
         # Excepciones que no deben reintentarse
@@ -129,48 +244,81 @@ class RetryHandler:
             Exception: Si todos los reintentos fallan
         """
         last_exception = None
+        # Invariantes del bucle: resolverlas una sola vez
+        is_coro = asyncio.iscoroutinefunction(func)
+        non_retryable_exceptions = self.non_retryable_exceptions
         
         for attempt in range(1, self.config.max_attempts + 1):
             try:
-                if asyncio.iscoroutinefunction(func):
+                if is_coro:
                     result = await func(*args, **kwargs)
                 else:
                     result = func(*args, **kwargs)
                 
                 if attempt > 1:
-                    logger.info(f"✅ Operación exitosa en el intento {attempt}")
+                    logger.info("✅ Operación exitosa en el intento {}", attempt)
                 
                 return result
                 
             except Exception as e:
                 last_exception = e
-                logger.warning(f"❌ Intento {attempt} falló: {type(e).__name__}: {e}")
+                logger.warning("❌ Intento {} falló: {}: {}", attempt, type(e).__name__, e)
                 
                 # Verificar si la excepción no debe reintentarse
-                if isinstance(e, self.non_retryable_exceptions):
-                    logger.error(f"🚫 Excepción no reintentable: {type(e).__name__}")
+                if isinstance(e, non_retryable_exceptions):
+                    logger.error("🚫 Excepción no reintentable: {}", type(e).__name__)
                     raise e
                 
                 if attempt < self.config.max_attempts:
                     delay = self._calculate_delay(attempt)
-                    logger.info(f"🔄 Reintentando en {delay:.1f} segundos...")
+                    logger.info("🔄 Reintentando en {:.1f} segundos...", delay)
                     await asyncio.sleep(delay)
                 else:
-                    logger.error(f"💥 Todos los {self.config.max_attempts} intentos fallaron")
+                    logger.error("💥 Todos los {} intentos fallaron", self.config.max_attempts)
         
         # Si llegamos aquí, todos los intentos fallaron
         raise last_exception
     
     def _calculate_delay(self, attempt: int) -> float:
-        """Calcular delay para el siguiente intento."""
-        delay = self.config.base_delay * (self.config.exponential_base ** (attempt - 1))
-        
-        # Aplicar jitter si está habilitado
-        if self.config.jitter:
-            delay *= random.uniform(0.5, 1.5)
+        """
+        Calcular delay para el siguiente intento.
         
-        # Limitar delay máximo
-        return min(delay, self.config.max_delay)
+        Con jitter se aplica "full jitter": un valor uniforme entre 0 y el
+        backoff exponencial acotado, lo que dispersa los reintentos de
+        workers que fallaron a la vez.
+        """
+        config = self.config
+        return calc_delay(
+            attempt,
+            config.base_delay,
+            config.exponential_base,
+            config.max_delay,
+            config.jitter,
+            self._random(),
+        )
+
+
+@dataclass(slots=True)
+class _Stats:
+    """
+    Contadores del ScrapingRateLimiter (slots: escrituras por atributo).
+    
+    Los tiempos se acumulan en nanosegundos enteros de time.monotonic_ns();
+    solo get_stats los convierte a segundos. start_time es la hora de pared
+    (time.time()) del inicio, que se mantiene para quien ya la leía.
+    """
+    total_requests: int = 0
+    successful_requests: int = 0
+    failed_requests: int = 0
+    rate_limited_requests: int = 0
+    total_wait_time_ns: int = 0
+    start_time_ns: int = 0
+    start_time: float = 0.0
+    
+    @classmethod
+    def started(cls) -> "_Stats":
+        """Contadores en cero con el inicio marcado en ambos relojes."""
+        return cls(start_time_ns=time.monotonic_ns(), start_time=time.time())
 
 
 class ScrapingRateLimiter:
@@ -179,14 +327,7 @@ class ScrapingRateLimiter:
     def __init__(self, config: RateLimitConfig, retry_config: RetryConfig = None):
         self.rate_limiter = RateLimiter(config)
         self.retry_handler = RetryHandler(retry_config or DEFAULT_RETRY_CONFIG)
-        self.stats = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "rate_limited_requests": 0,
-            "total_wait_time": 0.0,
-            "start_time": time.time()
-        }
+        self.stats = _Stats.started()
     
     async def execute_request(
         self, 
@@ -207,66 +348,57 @@ class ScrapingRateLimiter:
         Returns:
             Resultado de la función
         """
-        start_time = time.time()
+        stats = self.stats
         
         try:
-            # Adquirir permiso del rate limiter para el dominio específico
-            await self.rate_limiter.acquire(domain)
-            
-            # Ejecutar con retry
-            result = await self.retry_handler.execute_with_retry(func, *args, **kwargs)
+            # Permiso del rate limiter para el dominio, liberado al salir del
+            # bloque; el contexto también acumula el tiempo en stats
+            async with self.rate_limiter.acquire(domain, stats):
+                # Ejecutar con retry
+                result = await self.retry_handler.execute_with_retry(func, *args, **kwargs)
             
             # Actualizar estadísticas
-            self.stats["total_requests"] += 1
-            self.stats["successful_requests"] += 1
+            stats.total_requests += 1
+            stats.successful_requests += 1
             
             return result
             
         except Exception as e:
-            self.stats["total_requests"] += 1
-            self.stats["failed_requests"] += 1
+            stats.total_requests += 1
+            stats.failed_requests += 1
             raise e
-        
-        finally:
-            # Liberar rate limiter
-            self.rate_limiter.release()
-            
-            # Actualizar tiempo de espera
-            wait_time = time.time() - start_time
-            self.stats["total_wait_time"] += wait_time
     
     def get_stats(self) -> dict:
         """Obtener estadísticas del rate limiter."""
-        elapsed_time = time.time() - self.stats["start_time"]
+        stats = self.stats
+        # Conversión a segundos solo al final, sobre los contadores enteros
+        elapsed_time = (time.monotonic_ns() - stats.start_time_ns) * 1e-9
+        total_wait_time = stats.total_wait_time_ns * 1e-9
         
         return {
-            **self.stats,
+            **asdict(stats),
+            "total_wait_time": total_wait_time,
             "elapsed_time": elapsed_time,
-            "requests_per_minute": (self.stats["total_requests"] / elapsed_time) * 60 if elapsed_time > 0 else 0,
-            "success_rate": (self.stats["successful_requests"] / self.stats["total_requests"] * 100) if self.stats["total_requests"] > 0 else 0,
-            "average_wait_time": self.stats["total_wait_time"] / self.stats["total_requests"] if self.stats["total_requests"] > 0 else 0
+            "requests_per_minute": (stats.total_requests / elapsed_time) * 60 if elapsed_time > 0 else 0,
+            "success_rate": (stats.successful_requests / stats.total_requests * 100) if stats.total_requests > 0 else 0,
+            "average_wait_time": total_wait_time / stats.total_requests if stats.total_requests > 0 else 0
         }
     
+    def close(self):
+        """Detener la tarea de reposición del rate limiter."""
+        self.rate_limiter.close()
+    
     def reset_stats(self):
         """Reiniciar estadísticas."""
-        self.stats = {
-            "total_requests": 0,
-            "successful_requests": 0,
-            "failed_requests": 0,
-            "rate_limited_requests": 0,
-            "total_wait_time": 0.0,
-            "start_time": time.time()
-        }
+        self.stats = _Stats.started()
 
 
 # Configuraciones predefinidas
 DEFAULT_RATE_LIMIT_CONFIG = RateLimitConfig(
-    requests_per_minute=30,
-    delay_between_requests=1.0,  # 1 segundo entre requests
+    requests_per_minute=30,  # 1 token cada 2 segundos por dominio
     burst_size=5,
     jitter=True,
-    max_concurrent=3,
-    max_requests_per_second=1.0  # Máximo 1 request por segundo
+    max_concurrent=3
 )
 
 DEFAULT_RETRY_CONFIG = RetryConfig(
@@ -277,16 +409,32 @@ DEFAULT_RETRY_CONFIG = RetryConfig(
     jitter=True
 )
 
+# Esquema válido según RFC 3986 seguido de "://" y el netloc hasta /, ? o #
+_NETLOC_RE = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://([^/?#]*)')
+
+
+@lru_cache(maxsize=1024)
 def extract_domain_from_url(url: str) -> str:
     """
     Extraer el dominio de una URL.
     
+    Cacheado: el scraper consulta el mismo host miles de veces seguidas.
+    
     Args:
         url: URL de la cual extraer el dominio
         
     Returns:
         Dominio extraído o 'default' si hay error
     """
+    if not url:
+        return "default"
+    
+    # Camino rápido para URLs "esquema://host/...": el netloc sale de una
+    # sola búsqueda de regex, sin construir el resultado completo de urlparse
+    match = _NETLOC_RE.match(url)
+    if match:
+        return match.group(1) or "default"
+    
     try:
         parsed = urlparse(url)
         domain = parsed.netloc or parsed.hostname
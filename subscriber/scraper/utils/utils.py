@@ -3,26 +3,77 @@ Utilidades para el scraper de Mercado Libre Uruguay.
 """
 
 import re
-from decimal import Decimal
-from typing import Optional
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Optional, Union
 
+if TYPE_CHECKING:
+    import pandas as pd
 
-def normalize_price(price_text: str) -> Optional[Decimal]:
+
+# Tabla de 256 bytes con todo lo que no es dígito, punto o coma. Permite
+# limpiar un precio con un único bytes.translate (en C) en lugar de regex.
+_PRICE_KEEP = b"0123456789.,"
+_PRICE_DELETE = bytes(b for b in range(256) if b not in _PRICE_KEEP)
+# Caracteres de un precio ya limpio ("1234.56"), que no necesita normalización
+_PRICE_PLAIN_CHARS = frozenset("0123456789.")
+
+# Patrones precompilados para las funciones de extracción
+_RATING_RE = re.compile(r'(\d+[,.]?\d*)')
+_REVIEW_RE = re.compile(r'(\d+(?:\.\d+)?)')
+_WS_RE = re.compile(r'\s+')
+
+# Patrón equivalente a _PRICE_DELETE para el camino vectorizado de pandas
+_PRICE_STRIP = r'[^0-9.,]'
+
+
+def normalize_price(price_text: Union[str, int, float, Decimal]) -> Optional[Decimal]:
     """
     Normalizar texto de precio a Decimal.
     
     Args:
-        price_text: Texto del precio (ej: "1.234,56" o "1234.56")
+        price_text: Texto del precio (ej: "1.234,56" o "1234.56") o un valor
+            numérico ya parseado
         
     Returns:
         Precio normalizado como Decimal o None si no se puede parsear
     """
+    # Valores ya numéricos no necesitan parseo ni pasan por el cache, que
+    # mezclaría 1, 1.0 y Decimal('1.00'); bool no es un precio
+    if isinstance(price_text, bool):
+        return None
+    if isinstance(price_text, Decimal):
+        return price_text
+    if isinstance(price_text, (int, float)):
+        return Decimal(str(price_text))
+    
     if not price_text:
         return None
     
+    return _normalize_price_text(price_text)
+
+
+@lru_cache(maxsize=4096)
+def _normalize_price_text(price_text: str) -> Optional[Decimal]:
+    """
+    Parsear un texto de precio no vacío (núcleo cacheado de normalize_price).
+    
+    Los resultados se cachean: los listados paginados repiten muchos precios
+    y el Decimal retornado es inmutable.
+    """
     try:
+        # Camino rápido: texto ya limpio, se convierte directo
+        stripped = price_text.strip()
+        if stripped and _PRICE_PLAIN_CHARS.issuperset(stripped):
+            return Decimal(stripped)
+        
         # Remover caracteres no numéricos excepto punto y coma
-        cleaned = re.sub(r'[^\d.,]', '', price_text.strip())
+        cleaned = (
+            stripped
+            .encode('ascii', 'ignore')
+            .translate(None, _PRICE_DELETE)
+            .decode('ascii')
+        )
         
         # Si hay coma, asumir formato europeo (1.234,56)
         if ',' in cleaned and '.' in cleaned:
@@ -33,10 +84,45 @@ def normalize_price(price_text: str) -> Optional[Decimal]:
             cleaned = cleaned.replace(',', '.')
         
         return Decimal(cleaned)
-    except (ValueError, TypeError):
+    except (ValueError, TypeError, InvalidOperation):
         return None
 
 
+def normalize_prices(prices: Iterable[Union[str, None]]) -> "pd.Series":
+    """
+    Normalizar un lote de textos de precio a Decimal en una sola pasada.
+    
+    Versión vectorizada de normalize_price para resultados grandes: la
+    limpieza se hace con las operaciones de texto de pandas sobre toda la
+    columna en lugar de una llamada Python por producto. Aplica las mismas
+    reglas de separadores que normalize_price.
+    
+    Args:
+        prices: Textos de precio (ej: "$ 1.234,56", "1234.56"); admite None
+        
+    Returns:
+        Serie con un Decimal por precio, o None si no se puede parsear
+    """
+    # Import diferido: pandas solo se carga al procesar lotes
+    import pandas as pd
+    
+    s = pd.Series(list(prices), dtype='string').str.replace(_PRICE_STRIP, '', regex=True)
+    
+    # Con coma y punto se asume formato europeo (1.234,56): se quitan los puntos
+    european = s.str.contains(',', regex=False) & s.str.contains('.', regex=False)
+    s = s.mask(european, s.str.replace('.', '', regex=False))
+    s = s.str.replace(',', '.', regex=False)
+    
+    # to_numeric detecta los valores inválidos; el Decimal se construye desde
+    # el texto para no arrastrar error de punto flotante
+    valid = pd.to_numeric(s, errors='coerce').notna()
+    return pd.Series(
+        [Decimal(v) if ok else None for v, ok in zip(s.tolist(), valid.tolist())],
+        index=s.index,
+        dtype=object,
+    )
+
+
 def extract_discount_percentage(original_price: Decimal, current_price: Decimal) -> Optional[Decimal]:
     """
     Calcular porcentaje de descuento.
@@ -58,10 +144,14 @@ def extract_discount_percentage(original_price: Decimal, current_price: Decimal)
         return None
 
 
+@lru_cache(maxsize=4096)
 def extract_rating(rating_text: str) -> Optional[float]:
     """
     Extraer rating numérico del texto.
     
+    Cacheado igual que el parseo de normalize_price: los textos de rating
+    se repiten mucho entre productos y el float retornado es inmutable.
+    
     Args:
         rating_text: Texto del rating (ej: "4.5", "4,5", "4.5/5")
         
@@ -73,7 +163,7 @@ def extract_rating(rating_text: str) -> Optional[float]:
     
     try:
         # Buscar patrón de rating (ej: 4.5, 4,5, 4.5/5)
-        match = re.search(r'(\d+[,.]?\d*)', rating_text.strip())
+        match = _RATING_RE.search(rating_text.strip())
         if match:
             rating_str = match.group(1).replace(',', '.')
             rating = float(rating_str)
@@ -85,6 +175,32 @@ def extract_rating(rating_text: str) -> Optional[float]:
         return None
 
 
+def extract_ratings(ratings: Iterable[Union[str, None]]) -> "pd.Series":
+    """
+    Extraer ratings numéricos de un lote de textos en una sola pasada.
+    
+    Versión vectorizada de extract_rating: el patrón se evalúa sobre toda la
+    columna con pandas.
+    
+    Args:
+        ratings: Textos de rating (ej: "4.5", "4,5", "4.5/5"); admite None
+        
+    Returns:
+        Serie float con el rating redondeado a un decimal, o NaN si no se
+        puede parsear o está fuera del rango 0-5
+    """
+    # Import diferido: pandas solo se carga al procesar lotes
+    import pandas as pd
+    
+    s = pd.Series(list(ratings), dtype='string')
+    extracted = s.str.extract(_RATING_RE, expand=False).str.replace(',', '.', regex=False)
+    values = pd.to_numeric(extracted, errors='coerce').astype(float)
+    values = values.where((values >= 0) & (values <= 5))
+    # round de Python como en extract_rating: Series.round escala por 10 antes
+    # de redondear y da otro resultado en valores como 4.55
+    return values.map(lambda value: round(value, 1), na_action='ignore')
+
+
 def extract_review_count(review_text: str) -> Optional[int]:
     """
     Extraer número de reviews del texto.
@@ -100,7 +216,7 @@ def extract_review_count(review_text: str) -> Optional[int]:
     
     try:
         # Buscar números en el texto
-        match = re.search(r'(\d+(?:\.\d+)?)', review_text.strip())
+        match = _REVIEW_RE.search(review_text.strip())
         if match:
             # Remover puntos de miles
             number_str = match.group(1).replace('.', '')
@@ -110,6 +226,17 @@ def extract_review_count(review_text: str) -> Optional[int]:
         return None
 
 
+def clear_caches() -> None:
+    """
+    Vaciar los caches de normalize_price y extract_rating.
+    
+    Pensado para procesos de larga duración que quieran liberar memoria
+    entre lotes de scraping.
+    """
+    _normalize_price_text.cache_clear()
+    extract_rating.cache_clear()
+
+
 def clean_text(text: str) -> str:
     """
     Limpiar y normalizar texto.
@@ -123,10 +250,6 @@ def clean_text(text: str) -> str:
     if not text:
         return ""
     
-    # Remover espacios extra y saltos de línea
-    cleaned = re.sub(r'\s+', ' ', text.strip())
-    
-    # Remover caracteres especiales problemáticos
-    cleaned = re.sub(r'[\r\n\t]', ' ', cleaned)
-    
-    return cleaned.strip()
+    # Colapsar espacios, tabs y saltos de línea (\s incluye \r, \n y \t)
+    # en una sola pasada
+    return _WS_RE.sub(' ', text.strip())
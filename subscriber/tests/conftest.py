@@ -1,16 +1,20 @@
 """
 Configuración global para tests.
 """
+import json
 import pytest
-import asyncio
-from unittest.mock import Mock, AsyncMock, patch
-from fastapi.testclient import TestClient
-from datetime import datetime
+from unittest.mock import Mock, AsyncMock, MagicMock, patch
+import httpx
+from decimal import Decimal
+from types import MappingProxyType
 
 from models import (
     ScrapingRequest, ScrapingResponse, ScrapingTask, 
     ScrapingResult, HealthCheck, ScrapingStatus
 )
+from manager.cache_manager import CacheManager
+from manager.rabbitmq_manager import RabbitMQManager
+from scraper.services.scraper_service import ScraperService
 # Importar Product solo si está disponible
 try:
     from scraper.models.models import Product
@@ -22,49 +26,64 @@ except ImportError:
                 setattr(self, key, value)
 
 
-@pytest.fixture
-def event_loop():
-    """Fixture para el event loop de asyncio."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+# Timestamp fijo para las tareas de prueba: tests deterministas y sin reloj
+FIXED_TS = "2024-01-01T00:00:00"
+
+# Resultado que devuelve el ScraperService mockeado (solo lectura: se valida una vez)
+MOCK_SCRAPING_RESULT = ScrapingResult(
+    task_id="test-task-id",
+    products_count=10,
+    success_rate=100.0,
+    duration=5.5,
+    output_file="/test/output.json",
+    errors=[]
+)
 
 
 @pytest.fixture
 def mock_rabbitmq_manager():
-    """Mock del RabbitMQManager."""
-    manager = Mock()
+    """
+    Mock del RabbitMQManager.
+    
+    spec (no spec_set): `connected` es atributo de instancia, no de la clase, y
+    hay que poder asignarlo. Los métodos async quedan como AsyncMock.
+    """
+    manager = Mock(spec=RabbitMQManager)
     manager.connected = True
-    manager.add_task = AsyncMock(return_value=True)
-    manager.get_task = AsyncMock(return_value=None)
-    manager.list_tasks = AsyncMock(return_value=[])
-    manager.update_task_status = AsyncMock(return_value=True)
-    manager.update_task_started = AsyncMock(return_value=True)
-    manager.update_task_completed = AsyncMock(return_value=True)
-    manager.update_task_failed = AsyncMock(return_value=True)
-    manager.close = Mock()
+    manager.add_task.return_value = True
+    manager.get_task.return_value = None
+    manager.list_tasks.return_value = []
+    manager.update_task_status.return_value = True
+    manager.update_task_started.return_value = True
+    manager.update_task_completed.return_value = True
+    manager.update_task_failed.return_value = True
     return manager
 
 
+@pytest.fixture
+def mock_cache_manager():
+    """Mock del CacheManager: sin respuestas cacheadas."""
+    cache = Mock(spec_set=CacheManager)
+    cache.get.return_value = None
+    return cache
+
+
 @pytest.fixture
 def mock_scraper_service():
     """Mock del ScraperService."""
-    service = Mock()
-    service.is_available = Mock(return_value=True)
-    service.scrape_products = AsyncMock(return_value=ScrapingResult(
-        task_id="test-task-id",
-        products_count=10,
-        success_rate=100.0,
-        duration=5.5,
-        output_file="/test/output.json",
-        errors=[]
-    ))
+    service = Mock(spec_set=ScraperService)
+    service.is_available.return_value = True
+    service.scrape_products.return_value = MOCK_SCRAPING_RESULT
     return service
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_scraping_request():
-    """Muestra de ScrapingRequest válida."""
+    """
+    Muestra de ScrapingRequest válida (solo lectura, compartida por la sesión).
+    
+    Para una variante usar sample_scraping_request.model_copy(update={...}).
+    """
     return ScrapingRequest(
         url="https://listado.mercadolibre.com.uy/MLU1144",
         category="MLU1144",
@@ -73,9 +92,9 @@ def sample_scraping_request():
     )
 
 
-@pytest.fixture  
+@pytest.fixture(scope="session")
 def sample_scraping_task():
-    """Muestra de ScrapingTask válida."""
+    """Muestra de ScrapingTask válida (solo lectura, compartida por la sesión)."""
     return ScrapingTask(
         id="test-task-id",
         request=ScrapingRequest(
@@ -85,10 +104,26 @@ def sample_scraping_task():
             max_products=10
         ),
         status=ScrapingStatus.PENDING,
-        created_at=datetime.utcnow().isoformat()
+        created_at=FIXED_TS
     )
 
 
+@pytest.fixture(scope="session")
+def sample_scraping_task_dict(sample_scraping_task):
+    """
+    sample_scraping_task como dict, calculado una sola vez por sesión.
+    
+    Es compartido: los tests que lo modifiquen deben trabajar sobre una copia.
+    """
+    return sample_scraping_task.dict()
+
+
+@pytest.fixture(scope="session")
+def sample_scraping_task_body(sample_scraping_task_dict):
+    """Cuerpo AMQP de sample_scraping_task, serializado una sola vez por sesión."""
+    return json.dumps(sample_scraping_task_dict, default=str).encode()
+
+
 @pytest.fixture
 def sample_scraping_response():
     """Muestra de ScrapingResponse válida."""
@@ -127,22 +162,48 @@ def mock_scraper_config():
     }
 
 
+# Configuración de RabbitMQ de prueba; los fixtures la exponen de solo lectura
+_RABBITMQ_TEST_CONFIG = {
+    "host": "localhost",
+    "port": 5672,
+    "user": "test_user",
+    "password": "test_password", 
+    "vhost": "/",
+    "queue": "test_queue",
+    "exchange": "test_exchange",
+    "routing_key": "test_routing"
+}
 
 
-
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_rabbitmq_config():
-    """Mock de configuración de RabbitMQ."""
-    return {
-        "host": "localhost",
-        "port": 5672,
-        "user": "test_user",
-        "password": "test_password", 
-        "vhost": "/",
-        "queue": "test_queue",
-        "exchange": "test_exchange",
-        "routing_key": "test_routing"
-    }
+    """Mock de configuración de RabbitMQ (solo lectura, compartida por la sesión)."""
+    return MappingProxyType(_RABBITMQ_TEST_CONFIG)
+
+
+@pytest.fixture(scope="session")
+def mock_rabbitmq_config_no_defaults():
+    """Configuración de RabbitMQ sin queue ni exchange, para probar los valores por defecto."""
+    return MappingProxyType({
+        key: value for key, value in _RABBITMQ_TEST_CONFIG.items()
+        if key not in ("queue", "exchange")
+    })
+
+
+@pytest.fixture(scope="session")
+async def async_api_client():
+    """
+    Cliente httpx async sobre la app FastAPI (ASGI), compartido por la sesión.
+    
+    Llama a la app directamente en el loop de sesión, sin el hilo intermedio
+    de TestClient. Los globals de main (queue_manager, scraper_service, ...) se
+    leen en cada request, así que los tests pueden reemplazarlos sin
+    reconstruir el cliente.
+    """
+    import main
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
 
 
 # ==================== MANAGER MODULE FIXTURES ====================
@@ -202,6 +263,45 @@ def sample_product_list(sample_product):
     return products
 
 
+@pytest.fixture(scope="module")
+def cache_scraping_task():
+    """ScrapingTask de MLU5725 página 1 para tests de cache (compartida: no mutar, usar model_copy)."""
+    return ScrapingTask(
+        id="test-task",
+        request=ScrapingRequest(
+            url="https://test.com",
+            category="MLU5725",
+            page=1,
+            max_products=50
+        ),
+        status=ScrapingStatus.PENDING,
+        created_at=FIXED_TS
+    )
+
+
+@pytest.fixture(scope="module")
+def cache_product_list():
+    """Dos productos de MLU5725 página 1 para tests de cache (compartidos: no mutar)."""
+    return [
+        Product(
+            title="Test Product 1",
+            url="https://test1.com",
+            seller="Test Seller 1",
+            current_price=Decimal("100.0"),
+            category="MLU5725",
+            page=1
+        ),
+        Product(
+            title="Test Product 2",
+            url="https://test2.com",
+            seller="Test Seller 2",
+            current_price=Decimal("200.0"),
+            category="MLU5725",
+            page=1
+        )
+    ]
+
+
 # ==================== SCRAPER MODULE FIXTURES ====================
 
 @pytest.fixture
@@ -217,8 +317,8 @@ def mock_browser_manager():
 def mock_rate_limiter():
     """Mock del RateLimiter."""
     limiter = Mock()
-    limiter.acquire = AsyncMock()
-    limiter.release = Mock()
+    # acquire() devuelve un contexto async; MagicMock implementa __aenter__/__aexit__
+    limiter.acquire = Mock(return_value=MagicMock())
     limiter.get_stats.return_value = {
         "total_requests": 10,
         "successful_requests": 8,
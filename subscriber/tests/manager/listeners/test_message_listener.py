@@ -3,276 +3,365 @@ Tests unitarios para MessageListener siguiendo patrón AAA y TDD.
 """
 import pytest
 import json
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
-from datetime import datetime
-
-from manager.listeners.message_listener import MessageListener
-from models import ScrapingTask, ScrapingStatus
-
-
+import math
+from unittest.mock import Mock
+
+from pika.adapters.blocking_connection import BlockingChannel, BlockingConnection
+
+from database.connectors import DatabaseConnector
+from manager.listeners import message_listener
+from manager.listeners.message_listener import MessageListener, main
+from models import ScrapingStatus, ScrapingResponse
+from scraper.services import ScraperService
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional
+    orjson = None
+
+_requires_orjson = pytest.mark.skipif(orjson is None, reason="orjson no instalado")
+
+
+# Mensaje en formato del publisher usado por los tests de cache, serializado una vez
+_PUBLISHER_MESSAGE_BODY = json.dumps({
+    "url": "https://test.com",
+    "category": "MLU5725",
+    "page": 1,
+    "metadata": {"max_products": 50}
+}).encode()
+
+
+# Respuesta que el cache devuelve en un cache hit
+_CACHED_RESPONSE = ScrapingResponse(
+    task_id="cached-task",
+    status=ScrapingStatus.COMPLETED,
+    message="Desde cache",
+    url="https://test.com",
+    category="MLU5725",
+    page=1,
+    max_products=50
+)
+
+
+def _reset_listener(listener):
+    """Devolver el listener compartido a su estado recién construido."""
+    listener.connection = None
+    listener.channel = None
+    listener.running = False
+    listener._pending_acks = 0
+    listener._last_delivery_tag = None
+    listener._ack_channel = None
+    listener.scraper_service.reset_mock(return_value=True, side_effect=True)
+    listener.database_connector.reset_mock(return_value=True, side_effect=True)
+
+
+@pytest.fixture(scope="module")
+def shared_listener(mock_rabbitmq_config):
+    """MessageListener único del módulo, construido con dependencias mockeadas."""
+    with pytest.MonkeyPatch.context() as mp:
+        # spec_set: solo existen los atributos reales y un typo falla en el test
+        mp.setattr(message_listener, "ScraperService", Mock(return_value=Mock(spec_set=ScraperService)))
+        mp.setattr(message_listener, "DatabaseConnector", Mock(return_value=Mock(spec_set=DatabaseConnector)))
+        
+        return MessageListener(config=mock_rabbitmq_config)
+
+
+@pytest.fixture
+def listener(shared_listener):
+    """Listener compartido con el estado mutable reiniciado para cada test."""
+    _reset_listener(shared_listener)
+    return shared_listener
+
+
+@pytest.fixture
+def pika_pair():
+    """Par (conexión, canal) de pika ya enlazado: connection.channel() retorna el canal."""
+    mock_channel = Mock(spec_set=BlockingChannel)
+    mock_connection = Mock(spec_set=BlockingConnection)
+    mock_connection.channel.return_value = mock_channel
+    return mock_connection, mock_channel
+
+
+@pytest.fixture
+def mock_pika(monkeypatch, pika_pair):
+    """Reemplazar BlockingConnection de pika por un mock que retorna la conexión de pika_pair."""
+    mock_conn = Mock(return_value=pika_pair[0])
+    monkeypatch.setattr(message_listener.pika, "BlockingConnection", mock_conn)
+    return mock_conn
+
+
+@pytest.mark.xdist_group(name="msg_listener_initialization")
 class TestMessageListenerInitialization:
     """Tests para inicialización del MessageListener."""
     
-    def test_initialization_success(self, mock_rabbitmq_config):
+    def test_initialization_success(self, monkeypatch, mock_rabbitmq_config):
         """
         Test: MessageListener debe inicializarse correctamente
         """
         # Arrange - Mock de configuraciones
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.ScraperService') as mock_scraper, \
-             patch('manager.listeners.message_listener.DatabaseConnector') as mock_db:
-            
-            mock_scraper_instance = Mock()
-            mock_scraper.return_value = mock_scraper_instance
-            
-            mock_db_instance = Mock()
-            mock_db.return_value = mock_db_instance
-            
-            # Act - Crear instancia de MessageListener
-            listener = MessageListener()
-            
-            # Assert - Verificar inicialización
-            assert listener.connection is None
-            assert listener.channel is None
-            assert listener.running is False
-            assert listener.scraper_service == mock_scraper_instance
-            assert listener.database_connector == mock_db_instance
-            assert listener.config == mock_rabbitmq_config
-            assert listener.queue_name == mock_rabbitmq_config["queue"]
-
-    def test_initialization_with_scraper_service_failure(self, mock_rabbitmq_config):
+        mock_scraper_instance = Mock()
+        mock_db_instance = Mock()
+        monkeypatch.setattr(message_listener, "ScraperService", Mock(return_value=mock_scraper_instance))
+        monkeypatch.setattr(message_listener, "DatabaseConnector", Mock(return_value=mock_db_instance))
+        
+        # Act - Crear instancia de MessageListener
+        listener = MessageListener(config=mock_rabbitmq_config)
+        
+        # Assert - Verificar inicialización
+        assert listener.connection is None
+        assert listener.channel is None
+        assert listener.running is False
+        assert listener.scraper_service == mock_scraper_instance
+        assert listener.database_connector == mock_db_instance
+        assert listener.config == mock_rabbitmq_config
+        assert listener.queue_name == mock_rabbitmq_config["queue"]
+
+    def test_initialization_with_scraper_service_failure(self, monkeypatch, mock_rabbitmq_config):
         """
         Test: Manejo de fallo al inicializar ScraperService
         """
         # Arrange - Configurar fallo en ScraperService
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.ScraperService') as mock_scraper, \
-             patch('manager.listeners.message_listener.DatabaseConnector'):
-            
-            mock_scraper.side_effect = Exception("ScraperService error")
-            
-            # Act & Assert - Verificar que se propaga la excepción
-            with pytest.raises(Exception, match="ScraperService error"):
-                MessageListener()
+        monkeypatch.setattr(message_listener, "ScraperService", Mock(side_effect=Exception("ScraperService error")))
+        monkeypatch.setattr(message_listener, "DatabaseConnector", Mock())
+        
+        # Act & Assert - Verificar que se propaga la excepción
+        with pytest.raises(Exception, match="ScraperService error"):
+            MessageListener(config=mock_rabbitmq_config)
+
+    def test_initialization_defaults_to_module_config(self, monkeypatch, mock_rabbitmq_config):
+        """
+        Test: Sin config explícita se usa RABBITMQ_CONFIG del módulo
+        """
+        # Arrange - Config global del módulo reemplazada
+        monkeypatch.setattr(message_listener, "RABBITMQ_CONFIG", mock_rabbitmq_config)
+        monkeypatch.setattr(message_listener, "ScraperService", Mock())
+        monkeypatch.setattr(message_listener, "DatabaseConnector", Mock())
+        
+        # Act - Crear listener sin argumentos
+        listener = MessageListener()
+        
+        # Assert - Se lee la config global
+        assert listener.config is mock_rabbitmq_config
+        assert listener.queue_name == mock_rabbitmq_config["queue"]
 
 
+@pytest.mark.xdist_group(name="msg_listener_connection")
 class TestMessageListenerConnection:
     """Tests para conexión con RabbitMQ."""
     
-    @pytest.fixture(autouse=True)
-    def setup_listener(self, mock_rabbitmq_config):
-        """Setup del listener para cada test."""
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.ScraperService'), \
-             patch('manager.listeners.message_listener.DatabaseConnector'):
-            
-            self.listener = MessageListener()
-            yield
-
-    def test_connect_success(self):
+    @pytest.mark.parametrize("prefetch", [1, 10, 50, 100])
+    def test_connect_success(self, listener, monkeypatch, mock_pika, pika_pair, prefetch):
         """
-        Test: Conexión exitosa debe configurar canal y colas
+        Test: Conexión exitosa debe configurar canal, colas y el prefetch configurado
         """
+        # La config compartida es de solo lectura: el caso usa una copia con su prefetch
+        monkeypatch.setattr(listener, "config", {**listener.config, "prefetch_count": prefetch})
+        
         # Arrange - Mock de pika
-        with patch('manager.listeners.message_listener.pika.PlainCredentials') as mock_creds, \
-             patch('manager.listeners.message_listener.pika.ConnectionParameters') as mock_params, \
-             patch('manager.listeners.message_listener.pika.BlockingConnection') as mock_conn:
-            
-            mock_channel = Mock()
-            mock_connection = Mock()
-            mock_connection.channel.return_value = mock_channel
-            mock_conn.return_value = mock_connection
-            
-            # Configurar queue_declare para simular cola existente
-            mock_channel.queue_declare.return_value = Mock()
-            
-            # Act - Establecer conexión
-            self.listener._connect()
-            
-            # Assert - Verificar configuración
-            assert self.listener.connection == mock_connection
-            assert self.listener.channel == mock_channel
-            
-            # Verificar llamadas de configuración
-            mock_creds.assert_called_once()
-            mock_params.assert_called_once()
-            mock_channel.exchange_declare.assert_called_once()
-            mock_channel.basic_qos.assert_called_once_with(prefetch_count=1)
-
-    def test_connect_failure(self):
+        mock_creds = Mock()
+        mock_params = Mock()
+        monkeypatch.setattr(message_listener.pika, "PlainCredentials", mock_creds)
+        monkeypatch.setattr(message_listener.pika, "ConnectionParameters", mock_params)
+        
+        mock_connection, mock_channel = pika_pair
+        
+        # Configurar queue_declare para simular cola existente
+        mock_channel.queue_declare.return_value = Mock()
+        
+        # Act - Establecer conexión
+        listener._connect()
+        
+        # Assert - Verificar configuración
+        assert listener.connection == mock_connection
+        assert listener.channel == mock_channel
+        
+        # Verificar llamadas de configuración
+        mock_creds.assert_called_once()
+        mock_params.assert_called_once()
+        mock_channel.exchange_declare.assert_called_once()
+        mock_channel.basic_qos.assert_called_once_with(prefetch_count=prefetch)
+
+    def test_connect_default_prefetch(self, listener, monkeypatch, mock_pika, pika_pair):
+        """
+        Test: Sin prefetch_count en la configuración se usa 50
+        """
+        # Arrange - Configuración sin prefetch_count
+        monkeypatch.delitem(listener.config, "prefetch_count", raising=False)
+        _, mock_channel = pika_pair
+        
+        # Act - Conectar
+        listener._connect()
+        
+        # Assert - Verificar prefetch por defecto
+        mock_channel.basic_qos.assert_called_once_with(prefetch_count=50)
+
+    def test_connect_failure(self, listener, mock_pika):
         """
         Test: Fallo de conexión debe propagar excepción
         """
         # Arrange - Configurar fallo de conexión
-        with patch('manager.listeners.message_listener.pika.BlockingConnection') as mock_conn:
-            mock_conn.side_effect = Exception("Connection failed")
-            
-            # Act & Assert - Verificar propagación de excepción
-            with pytest.raises(Exception, match="Connection failed"):
-                self.listener._connect()
-
-    def test_queue_declaration_existing_queue(self):
-        """
-        Test: Declaración de cola existente debe usar passive=True
-        """
-        # Arrange - Configurar cola existente
-        with patch('manager.listeners.message_listener.pika.BlockingConnection') as mock_conn:
-            mock_channel = Mock()
-            mock_connection = Mock()
-            mock_connection.channel.return_value = mock_channel
-            mock_conn.return_value = mock_connection
-            
-            # Simular que la cola existe
-            mock_channel.queue_declare.return_value = Mock()
-            
-            # Act - Conectar
-            self.listener._connect()
-            
-            # Assert - Verificar llamada con passive=True primero
-            calls = mock_channel.queue_declare.call_args_list
-            first_call = calls[0]
-            assert first_call[1]["passive"] is True
-
-    def test_queue_declaration_new_queue(self):
-        """
-        Test: Crear nueva cola si no existe debe usar argumentos específicos
-        """
-        # Arrange - Configurar cola inexistente
-        with patch('manager.listeners.message_listener.pika.BlockingConnection') as mock_conn:
-            mock_channel = Mock()
-            mock_connection = Mock()
-            mock_connection.channel.return_value = mock_channel
-            mock_conn.return_value = mock_connection
-            
-            # Simular que la cola no existe en primera llamada
-            mock_channel.queue_declare.side_effect = [
-                Exception("Queue not found"),  # Primera llamada falla
-                Mock()  # Segunda llamada exitosa
-            ]
-            
-            # Act - Conectar
-            self.listener._connect()
-            
-            # Assert - Verificar segunda llamada con argumentos
-            calls = mock_channel.queue_declare.call_args_list
-            second_call = calls[1]
-            assert second_call[1]["durable"] is True
-            assert "arguments" in second_call[1]
+        mock_pika.side_effect = Exception("Connection failed")
+        
+        # Act & Assert - Verificar propagación de excepción
+        with pytest.raises(Exception, match="Connection failed"):
+            listener._connect()
+
+    @pytest.mark.parametrize("queue_declare_side_effect, call_index, expected_kwarg", [
+        # Cola existente: basta la declaración passive
+        (None, 0, "passive"),
+        # Cola inexistente: la passive falla y se crea durable con argumentos
+        ([Exception("Queue not found"), Mock()], 1, "durable"),
+    ], ids=["existing_queue", "new_queue"])
+    def test_queue_declaration(self, listener, mock_pika, pika_pair, queue_declare_side_effect,
+                               call_index, expected_kwarg):
+        """
+        Test: La cola se declara passive si existe y durable con argumentos si no
+        """
+        # Arrange - Configurar respuesta de queue_declare
+        _, mock_channel = pika_pair
+        mock_channel.queue_declare.side_effect = queue_declare_side_effect
+        
+        # Act - Conectar
+        listener._connect()
+        
+        # Assert - Verificar la llamada que declara la cola
+        call = mock_channel.queue_declare.call_args_list[call_index]
+        assert call[1][expected_kwarg] is True
+        if expected_kwarg == "durable":
+            assert "arguments" in call[1]
 
 
+@pytest.mark.xdist_group(name="msg_listener_message_processing")
 class TestMessageListenerMessageProcessing:
     """Tests para procesamiento de mensajes."""
     
-    @pytest.fixture(autouse=True)
-    def setup_listener(self, mock_rabbitmq_config, sample_scraping_task):
-        """Setup del listener para cada test."""
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.ScraperService') as mock_scraper, \
-             patch('manager.listeners.message_listener.DatabaseConnector') as mock_db:
-            
-            self.mock_scraper_service = Mock()
-            mock_scraper.return_value = self.mock_scraper_service
-            
-            self.mock_db_connector = Mock()
-            mock_db.return_value = self.mock_db_connector
-            
-            self.listener = MessageListener()
-            self.sample_task = sample_scraping_task
-            yield
-
-    def test_process_message_valid_task(self, sample_product_list):
+    def test_process_message_valid_task(self, listener, monkeypatch, sample_scraping_task,
+                                        sample_scraping_task_body, sample_product_list):
         """
         Test: Procesamiento de mensaje válido debe ejecutar scraping
         """
-        # Arrange - Configurar mensaje válido y mocks
-        task_data = self.sample_task.dict()
-        message_body = json.dumps(task_data).encode()
-        
-        mock_channel = Mock()
+        # Arrange - Configurar mocks
+        mock_channel = Mock(spec_set=BlockingChannel)
         mock_method = Mock()
         mock_method.delivery_tag = "test-tag"
         mock_properties = Mock()
         
         # Configurar run_main para retornar productos
-        with patch('manager.listeners.message_listener.run_main') as mock_run_main:
-            mock_run_main.return_value = sample_product_list
-            self.mock_db_connector.insert_products.return_value = True
-            
-            # Act - Procesar mensaje
-            self.listener._process_message(mock_channel, mock_method, mock_properties, message_body)
-            
-            # Assert - Verificar procesamiento
-            mock_run_main.assert_called_once_with(
-                url=self.sample_task.request.url,
-                max_products=self.sample_task.request.max_products,
-                task_id=self.sample_task.id,
-                category=self.sample_task.request.category,
-                page=self.sample_task.request.page
-            )
-            
-            # Verificar que se guardaron los productos
-            self.mock_db_connector.insert_products.assert_called_once_with(sample_product_list)
-            
-            # Verificar confirmación del mensaje
-            mock_channel.basic_ack.assert_called_once_with(delivery_tag="test-tag")
-
-    def test_save_products_success(self, sample_product_list):
+        mock_run_main = Mock(return_value=sample_product_list)
+        monkeypatch.setattr(message_listener, "run_main", mock_run_main)
+        listener.database_connector.insert_products.return_value = True
+        
+        # Act - Procesar mensaje
+        listener._process_message(mock_channel, mock_method, mock_properties, sample_scraping_task_body)
+        
+        # Assert - Verificar procesamiento
+        mock_run_main.assert_called_once_with(
+            url=sample_scraping_task.request.url,
+            max_products=sample_scraping_task.request.max_products,
+            task_id=sample_scraping_task.id,
+            category=sample_scraping_task.request.category,
+            page=sample_scraping_task.request.page
+        )
+        
+        # Verificar que se guardaron los productos
+        listener.database_connector.insert_products.assert_called_once_with(sample_product_list)
+        
+        # Verificar confirmación del mensaje al vaciar el lote pendiente
+        listener._flush_acks()
+        mock_channel.basic_ack.assert_called_once_with(delivery_tag="test-tag", multiple=True)
+
+    @pytest.mark.parametrize("loads", [
+        pytest.param(json.loads, id="json-loads"),
+        pytest.param(orjson and orjson.loads, id="orjson-loads", marks=_requires_orjson),
+    ])
+    @pytest.mark.parametrize("dumps", [
+        pytest.param(lambda data: json.dumps(data).encode(), id="json-body"),
+        pytest.param(lambda data: orjson.dumps(data), id="orjson-body", marks=_requires_orjson),
+    ])
+    def test_process_message_body_codecs(self, listener, monkeypatch, sample_scraping_task,
+                                         sample_scraping_task_dict, sample_product_list,
+                                         loads, dumps):
+        """
+        Test: El resultado no depende de cómo se codifique o decodifique el cuerpo
+        """
+        # Arrange - Cuerpo serializado con el codificador y decodificador del caso
+        from manager.cache_manager import CacheManager
+        
+        mock_cache = Mock(spec=CacheManager)
+        mock_cache.get.return_value = None
+        monkeypatch.setattr(message_listener, "cache_manager", mock_cache)
+        monkeypatch.setattr(message_listener, "_json_loads", loads)
+        message_body = dumps(sample_scraping_task_dict)
+        mock_channel = Mock(spec_set=BlockingChannel)
+        mock_method = Mock()
+        mock_method.delivery_tag = "test-tag"
+        mock_run_main = Mock(return_value=sample_product_list)
+        monkeypatch.setattr(message_listener, "run_main", mock_run_main)
+        listener.database_connector.insert_products.return_value = True
+        
+        # Act - Procesar mensaje
+        listener._process_message(mock_channel, mock_method, Mock(), message_body)
+        
+        # Assert - Misma llamada de scraping y mismo ack que con json estándar
+        mock_run_main.assert_called_once_with(
+            url=sample_scraping_task.request.url,
+            max_products=sample_scraping_task.request.max_products,
+            task_id=sample_scraping_task.id,
+            category=sample_scraping_task.request.category,
+            page=sample_scraping_task.request.page
+        )
+        listener._flush_acks()
+        mock_channel.basic_ack.assert_called_once_with(delivery_tag="test-tag", multiple=True)
+        mock_channel.basic_nack.assert_not_called()
+
+    def test_save_products_success(self, listener, sample_product_list):
         """
         Test: Guardar productos exitosamente debe retornar True
         """
         # Arrange - Configurar éxito en inserción
-        self.mock_db_connector.insert_products.return_value = True
+        listener.database_connector.insert_products.return_value = True
         task_id = "test-task-123"
         
         # Act - Guardar productos
-        result = self.listener._save_products(sample_product_list, task_id)
+        result = listener._save_products(sample_product_list, task_id)
         
         # Assert - Verificar éxito
         assert result is True
-        self.mock_db_connector.insert_products.assert_called_once_with(sample_product_list)
+        listener.database_connector.insert_products.assert_called_once_with(sample_product_list)
 
-    def test_save_products_failure(self, sample_product_list):
+    def test_save_products_failure(self, listener, sample_product_list):
         """
         Test: Fallo al guardar productos debe retornar False
         """
         # Arrange - Configurar fallo en inserción
-        self.mock_db_connector.insert_products.side_effect = Exception("Database error")
+        listener.database_connector.insert_products.side_effect = Exception("Database error")
         task_id = "test-task-123"
         
         # Act - Intentar guardar productos
-        result = self.listener._save_products(sample_product_list, task_id)
+        result = listener._save_products(sample_product_list, task_id)
         
         # Assert - Verificar fallo
         assert result is False
 
 
+@pytest.mark.xdist_group(name="msg_listener_message_adaptation")
 class TestMessageListenerMessageAdaptation:
     """Tests para adaptación de formatos de mensaje."""
     
-    @pytest.fixture(autouse=True)
-    def setup_listener(self, mock_rabbitmq_config):
-        """Setup del listener para cada test."""
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.ScraperService'), \
-             patch('manager.listeners.message_listener.DatabaseConnector'):
-            
-            self.listener = MessageListener()
-            yield
-
-    def test_adapt_message_format_correct_format(self, sample_scraping_task):
+    def test_adapt_message_format_correct_format(self, listener, sample_scraping_task_dict):
         """
         Test: Mensaje con formato correcto no debe ser modificado
         """
         # Arrange - Mensaje con formato correcto
-        message_data = sample_scraping_task.dict()
+        message_data = sample_scraping_task_dict
         
         # Act - Adaptar mensaje
-        result = self.listener._adapt_message_format(message_data)
+        result = listener._adapt_message_format(message_data)
         
         # Assert - Verificar que no se modifica
         assert result == message_data
 
-    def test_adapt_message_format_old_publisher_format(self):
+    def test_adapt_message_format_old_publisher_format(self, listener):
         """
         Test: Mensaje en formato de publisher debe ser adaptado
         """
@@ -286,7 +375,7 @@ class TestMessageListenerMessageAdaptation:
         }
         
         # Act - Adaptar mensaje
-        result = self.listener._adapt_message_format(old_format_message)
+        result = listener._adapt_message_format(old_format_message)
         
         # Assert - Verificar adaptación
         assert "id" in result
@@ -300,7 +389,7 @@ class TestMessageListenerMessageAdaptation:
         assert result["request"]["max_products"] == 25
         assert result["status"] == ScrapingStatus.PENDING
 
-    def test_adapt_message_format_old_format_with_defaults(self):
+    def test_adapt_message_format_old_format_with_defaults(self, listener):
         """
         Test: Mensaje antiguo sin metadatos debe usar valores por defecto
         """
@@ -311,14 +400,14 @@ class TestMessageListenerMessageAdaptation:
         }
         
         # Act - Adaptar mensaje
-        result = self.listener._adapt_message_format(old_format_message)
+        result = listener._adapt_message_format(old_format_message)
         
         # Assert - Verificar valores por defecto
         assert result["request"]["page"] == 1
         assert result["request"]["max_products"] == 50
         assert "id" in result
 
-    def test_adapt_message_format_unrecognized_format(self):
+    def test_adapt_message_format_unrecognized_format(self, listener):
         """
         Test: Mensaje con formato no reconocido debe lanzar error
         """
@@ -329,327 +418,290 @@ class TestMessageListenerMessageAdaptation:
         
         # Act & Assert - Verificar error
         with pytest.raises(ValueError, match="Formato de mensaje no reconocido"):
-            self.listener._adapt_message_format(unknown_format)
+            listener._adapt_message_format(unknown_format)
 
 
+@pytest.mark.xdist_group(name="msg_listener_lifecycle")
 class TestMessageListenerLifecycle:
     """Tests para ciclo de vida del listener."""
     
-    @pytest.fixture(autouse=True)
-    def setup_listener(self, mock_rabbitmq_config):
-        """Setup del listener para cada test."""
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.ScraperService'), \
-             patch('manager.listeners.message_listener.DatabaseConnector'):
-            
-            self.listener = MessageListener()
-            yield
-
-    def test_start_listening_success(self):
+    def test_start_listening_success(self, listener, monkeypatch):
         """
         Test: Iniciar escucha debe configurar conexión y consumo
         """
         # Arrange - Mock de conexión exitosa
-        with patch.object(self.listener, '_connect') as mock_connect:
-            mock_channel = Mock()
-            self.listener.channel = mock_channel
-            
-            # Act - Iniciar escucha
-            self.listener.start_listening()
-            
-            # Assert - Verificar configuración
-            mock_connect.assert_called_once()
-            mock_channel.basic_consume.assert_called_once_with(
-                queue=self.listener.queue_name,
-                on_message_callback=self.listener._process_message,
-                auto_ack=False
-            )
-            mock_channel.start_consuming.assert_called_once()
-            assert self.listener.running is True
-
-    def test_start_listening_keyboard_interrupt(self):
+        mock_connect = Mock()
+        monkeypatch.setattr(listener, "_connect", mock_connect)
+        mock_channel = Mock(spec_set=BlockingChannel)
+        listener.channel = mock_channel
+        
+        # Act - Iniciar escucha
+        listener.start_listening()
+        
+        # Assert - Verificar configuración
+        mock_connect.assert_called_once()
+        mock_channel.basic_consume.assert_called_once_with(
+            queue=listener.queue_name,
+            on_message_callback=listener._process_message,
+            auto_ack=False
+        )
+        mock_channel.start_consuming.assert_called_once()
+        assert listener.running is True
+
+    def test_start_listening_keyboard_interrupt(self, listener, monkeypatch):
         """
         Test: Interrupción por teclado debe detener listener gracefully
         """
         # Arrange - Configurar interrupción
-        with patch.object(self.listener, '_connect'), \
-             patch.object(self.listener, 'stop_listening') as mock_stop:
-            
-            mock_channel = Mock()
-            mock_channel.start_consuming.side_effect = KeyboardInterrupt()
-            self.listener.channel = mock_channel
-            
-            # Act - Iniciar escucha con interrupción
-            self.listener.start_listening()
-            
-            # Assert - Verificar detención graceful
-            mock_stop.assert_called_once()
-
-    def test_start_listening_connection_error(self):
+        mock_stop = Mock()
+        monkeypatch.setattr(listener, "_connect", Mock())
+        monkeypatch.setattr(listener, "stop_listening", mock_stop)
+        
+        mock_channel = Mock(spec_set=BlockingChannel)
+        mock_channel.start_consuming.side_effect = KeyboardInterrupt()
+        listener.channel = mock_channel
+        
+        # Act - Iniciar escucha con interrupción
+        listener.start_listening()
+        
+        # Assert - Verificar detención graceful
+        mock_stop.assert_called_once()
+
+    def test_start_listening_connection_error(self, listener, monkeypatch):
         """
         Test: Error de conexión debe detener listener
         """
         # Arrange - Configurar error de conexión
-        with patch.object(self.listener, '_connect') as mock_connect, \
-             patch.object(self.listener, 'stop_listening') as mock_stop:
-            
-            mock_connect.side_effect = Exception("Connection error")
-            
-            # Act - Iniciar escucha con error
-            self.listener.start_listening()
-            
-            # Assert - Verificar detención por error
-            mock_stop.assert_called_once()
-
-    def test_stop_listening_success(self):
+        mock_stop = Mock()
+        monkeypatch.setattr(listener, "_connect", Mock(side_effect=Exception("Connection error")))
+        monkeypatch.setattr(listener, "stop_listening", mock_stop)
+        
+        # Act - Iniciar escucha con error
+        listener.start_listening()
+        
+        # Assert - Verificar detención por error
+        mock_stop.assert_called_once()
+
+    def test_stop_listening_success(self, listener, pika_pair):
         """
         Test: Detener escucha debe cerrar conexiones correctamente
         """
         # Arrange - Configurar listener activo
-        mock_channel = Mock()
-        mock_channel.is_consuming.return_value = True
-        
-        mock_connection = Mock()
+        mock_connection, mock_channel = pika_pair
+        mock_channel.consumer_tags = ["ctag-1"]
         mock_connection.is_closed = False
         
-        self.listener.channel = mock_channel
-        self.listener.connection = mock_connection
-        self.listener.running = True
+        listener.channel = mock_channel
+        listener.connection = mock_connection
+        listener.running = True
         
         # Act - Detener escucha
-        self.listener.stop_listening()
+        listener.stop_listening()
         
         # Assert - Verificar detención
-        assert self.listener.running is False
+        assert listener.running is False
         mock_channel.stop_consuming.assert_called_once()
         mock_connection.close.assert_called_once()
 
-    def test_stop_listening_already_stopped(self):
+    def test_stop_listening_already_stopped(self, listener):
         """
         Test: Detener listener ya detenido no debe causar errores
         """
         # Arrange - Listener sin conexiones activas
-        self.listener.channel = None
-        self.listener.connection = None
+        listener.channel = None
+        listener.connection = None
         
         # Act - Detener listener ya detenido
-        self.listener.stop_listening()
+        listener.stop_listening()
         
         # Assert - No debe haber errores
-        assert self.listener.running is False
+        assert listener.running is False
+
 
+@pytest.mark.xdist_group(name="msg_listener_ack_batching")
+class TestMessageListenerAckBatching:
+    """Tests para la confirmación de mensajes en lote (basic_ack multiple=True)."""
+    
+    @pytest.mark.parametrize("ack_batch_size", [1, 8, 64])
+    def test_acks_are_batched(self, listener, monkeypatch, pika_pair, ack_batch_size):
+        """
+        Test: N mensajes generan ceil(N/lote) acks con multiple=True y el último tag del lote
+        """
+        # Arrange - 20 mensajes procesados en orden
+        _, mock_channel = pika_pair
+        monkeypatch.setattr(listener, "_ack_batch_size", ack_batch_size)
+        delivery_tags = list(range(1, 21))
+        
+        # Act - Confirmar cada mensaje y vaciar el resto por inactividad
+        for tag in delivery_tags:
+            listener._ack(mock_channel, tag)
+        listener._flush_acks()
+        
+        # Assert - Un ack por lote, cada uno con el tag final del lote
+        expected_tags = delivery_tags[ack_batch_size - 1::ack_batch_size]
+        if not expected_tags or expected_tags[-1] != delivery_tags[-1]:
+            expected_tags.append(delivery_tags[-1])
+        
+        assert mock_channel.basic_ack.call_count == math.ceil(len(delivery_tags) / ack_batch_size)
+        assert [c.kwargs for c in mock_channel.basic_ack.call_args_list] == [
+            {"delivery_tag": tag, "multiple": True} for tag in expected_tags
+        ]
+    
+    def test_partial_batch_schedules_idle_flush(self, listener, monkeypatch, pika_pair):
+        """
+        Test: El primer mensaje de un lote programa la confirmación por inactividad una sola vez
+        """
+        # Arrange - Listener conectado con lote de 8
+        mock_connection, mock_channel = pika_pair
+        listener.connection = mock_connection
+        monkeypatch.setattr(listener, "_ack_batch_size", 8)
+        
+        # Act - Dos mensajes, sin llenar el lote
+        listener._ack(mock_channel, 1)
+        listener._ack(mock_channel, 2)
+        
+        # Assert - Un solo timer y ningún ack todavía
+        mock_connection.call_later.assert_called_once_with(
+            listener._ack_flush_interval, listener._flush_acks
+        )
+        mock_channel.basic_ack.assert_not_called()
+    
+    def test_stop_listening_flushes_pending_acks(self, listener, pika_pair):
+        """
+        Test: Detener el listener confirma los mensajes pendientes
+        """
+        # Arrange - Dos mensajes pendientes de confirmar
+        _, mock_channel = pika_pair
+        listener._ack(mock_channel, 1)
+        listener._ack(mock_channel, 2)
+        
+        # Act - Detener listener
+        listener.stop_listening()
+        
+        # Assert - Confirmación única hasta el último tag
+        mock_channel.basic_ack.assert_called_once_with(delivery_tag=2, multiple=True)
+    
+    def test_ack_batch_size_capped_by_prefetch(self, monkeypatch, mock_rabbitmq_config):
+        """
+        Test: El lote de acks nunca supera el prefetch (el broker no entregaría el resto)
+        """
+        # Arrange - Lote configurado mayor que el prefetch
+        config = {**mock_rabbitmq_config, "prefetch_count": 10, "ack_batch_size": 64}
+        monkeypatch.setattr(message_listener, "ScraperService", Mock())
+        monkeypatch.setattr(message_listener, "DatabaseConnector", Mock())
+        
+        # Act - Crear listener
+        listener = MessageListener(config=config)
+        
+        # Assert - prefetch = tamaño de lote
+        assert listener._ack_batch_size == config["prefetch_count"]
+    
+    def test_reset_clears_ack_batching_state(self, listener, pika_pair):
+        """
+        Test: Reiniciar el listener compartido no deja acks pendientes para el test siguiente
+        """
+        # Arrange - Un lote a medio confirmar en el canal de este test
+        _, mock_channel = pika_pair
+        listener._ack(mock_channel, 1)
+        
+        # Act - Reinicio que hace el fixture listener entre tests
+        _reset_listener(listener)
+        
+        # Assert - Sin lote pendiente ni tag o canal del test anterior
+        assert listener._pending_acks == 0
+        assert listener._last_delivery_tag is None
+        assert listener._ack_channel is None
 
+
+@pytest.mark.xdist_group(name="msg_listener_integration")
 class TestMessageListenerIntegration:
     """Tests de integración para MessageListener."""
     
-    def test_main_function_creates_and_starts_listener(self, mock_rabbitmq_config):
+    def test_main_function_creates_and_starts_listener(self, monkeypatch):
         """
         Test: Función main debe crear e iniciar listener
         """
         # Arrange - Mock de MessageListener
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.MessageListener') as mock_listener_class:
-            
-            mock_listener = Mock()
-            mock_listener_class.return_value = mock_listener
-            
-            # Importar main después de configurar mocks
-            from manager.listeners.message_listener import main
-            
-            # Act - Ejecutar función main
-            main()
-            
-            # Assert - Verificar creación e inicio
-            mock_listener_class.assert_called_once()
-            mock_listener.start_listening.assert_called_once()
-
-    def test_main_function_handles_fatal_error(self, mock_rabbitmq_config):
+        mock_listener = Mock()
+        mock_listener_class = Mock(return_value=mock_listener)
+        monkeypatch.setattr(message_listener, "MessageListener", mock_listener_class)
+        
+        # Act - Ejecutar función main
+        main()
+        
+        # Assert - Verificar creación e inicio
+        mock_listener_class.assert_called_once()
+        mock_listener.start_listening.assert_called_once()
+
+    def test_main_function_handles_fatal_error(self, monkeypatch):
         """
         Test: Función main debe manejar errores fatales
         """
         # Arrange - Configurar error fatal
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config), \
-             patch('manager.listeners.message_listener.MessageListener') as mock_listener_class, \
-             patch('sys.exit') as mock_exit:
-            
-            mock_listener = Mock()
-            mock_listener.start_listening.side_effect = Exception("Fatal error")
-            mock_listener_class.return_value = mock_listener
-            
-            from manager.listeners.message_listener import main
-            
-            # Act - Ejecutar main con error
-            main()
-            
-            # Assert - Verificar manejo de error
-            mock_exit.assert_called_once_with(1)
+        mock_listener = Mock()
+        mock_listener.start_listening.side_effect = Exception("Fatal error")
+        mock_exit = Mock()
+        monkeypatch.setattr(message_listener, "MessageListener", Mock(return_value=mock_listener))
+        monkeypatch.setattr(message_listener.sys, "exit", mock_exit)
+        
+        # Act - Ejecutar main con error
+        main()
+        
+        # Assert - Verificar manejo de error
+        mock_exit.assert_called_once_with(1)
 
 
+@pytest.mark.xdist_group(name="msg_listener_cache")
 class TestMessageListenerCache:
     """Tests para la integración del cache en MessageListener."""
     
-    def setup_method(self):
-        """Configurar antes de cada test."""
-        self.mock_rabbitmq_config = {
-            'host': 'localhost',
-            'port': 5672,
-            'username': 'test',
-            'password': 'test',
-            'queue': 'test_queue'
-        }
-    
-    @pytest.fixture(autouse=True)
-    def setup_listener_mocks(self):
-        """Setup automático de mocks para evitar conexiones reales a Supabase."""
-        with patch('manager.listeners.message_listener.DatabaseConnector') as mock_db_class, \
-             patch('manager.listeners.message_listener.ScraperService') as mock_scraper_class:
-            
-            # Mock del DatabaseConnector para evitar conexión a Supabase
-            mock_db_class.return_value = Mock()
-            # Mock del ScraperService
-            mock_scraper_class.return_value = Mock()
-            yield
-        
-    def test_cache_hit_skips_processing(self, mock_rabbitmq_config):
-        """Test: Cache hit debe omitir el procesamiento del mensaje."""
+    @pytest.mark.parametrize("cached_response, should_process", [
+        (_CACHED_RESPONSE, False),
+        (None, True),
+    ], ids=["cache_hit", "cache_miss"])
+    def test_cache_lookup_decides_processing(self, listener, monkeypatch, cached_response, should_process):
+        """Test: Cache hit omite el procesamiento; cache miss procesa la tarea. Ambos confirman el mensaje."""
         from manager.cache_manager import CacheManager
-        from models import ScrapingResponse
         
-        # Arrange
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config):
-            listener = MessageListener()
-            
-            # Mock cache con respuesta existente
-            mock_cache = Mock(spec=CacheManager)
-            cached_response = ScrapingResponse(
-                task_id="cached-task",
-                status=ScrapingStatus.COMPLETED,
-                message="Desde cache",
-                url="https://test.com",
-                category="MLU5725",
-                page=1,
-                max_products=50
-            )
-            mock_cache.get.return_value = cached_response
-            
-            # Preparar mensaje de prueba
-            message_data = {
-                "url": "https://test.com",
-                "category": "MLU5725",
-                "page": 1,
-                "metadata": {"max_products": 50}
-            }
-            body = json.dumps(message_data).encode()
-            
-            # Mock de objetos de RabbitMQ
-            mock_ch = Mock()
-            mock_method = Mock()
-            mock_method.delivery_tag = "test_tag"
-            mock_properties = Mock()
-            mock_properties.message_id = "test_message_id"
-        
-        # Act
-        with patch('manager.listeners.message_listener.cache_manager', mock_cache):
-            with patch.object(listener, '_process_task_sync') as mock_process:
-                listener._process_message(mock_ch, mock_method, mock_properties, body)
+        # Arrange - Mock cache con o sin respuesta
+        mock_cache = Mock(spec=CacheManager)
+        mock_cache.get.return_value = cached_response
         
-        # Assert
-        mock_cache.get.assert_called_once_with("MLU5725", 1)
-        mock_process.assert_not_called()  # No debe procesar la tarea
-        mock_ch.basic_ack.assert_called_once_with(delivery_tag="test_tag")
-    
-    def test_cache_miss_processes_task(self, mock_rabbitmq_config):
-        """Test: Cache miss debe procesar la tarea normalmente."""
-        from manager.cache_manager import CacheManager
+        # Mock de objetos de RabbitMQ
+        mock_ch = Mock()
+        mock_method = Mock()
+        mock_method.delivery_tag = "test_tag"
+        mock_properties = Mock()
+        mock_properties.message_id = "test_message_id"
         
-        # Arrange
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config):
-            listener = MessageListener()
-            
-            # Mock cache sin respuesta
-            mock_cache = Mock(spec=CacheManager)
-            mock_cache.get.return_value = None
-            
-            # Preparar mensaje de prueba
-            message_data = {
-                "url": "https://test.com",
-                "category": "MLU5725",
-                "page": 1,
-                "metadata": {"max_products": 50}
-            }
-            body = json.dumps(message_data).encode()
-            
-            # Mock de objetos de RabbitMQ
-            mock_ch = Mock()
-            mock_method = Mock()
-            mock_method.delivery_tag = "test_tag"
-            mock_properties = Mock()
-            mock_properties.message_id = "test_message_id"
+        mock_process = Mock()
+        monkeypatch.setattr(message_listener, "cache_manager", mock_cache)
+        monkeypatch.setattr(listener, "_process_task_sync", mock_process)
         
         # Act
-        with patch('manager.listeners.message_listener.cache_manager', mock_cache):
-            with patch.object(listener, '_process_task_sync') as mock_process:
-                listener._process_message(mock_ch, mock_method, mock_properties, body)
+        listener._process_message(mock_ch, mock_method, mock_properties, _PUBLISHER_MESSAGE_BODY)
         
         # Assert
         mock_cache.get.assert_called_once_with("MLU5725", 1)
-        mock_process.assert_called_once()  # Debe procesar la tarea
-        mock_ch.basic_ack.assert_called_once_with(delivery_tag="test_tag")
-    
-    def test_successful_processing_updates_cache(self, mock_rabbitmq_config):
+        assert mock_process.called is should_process
+        listener._flush_acks()
+        mock_ch.basic_ack.assert_called_once_with(delivery_tag="test_tag", multiple=True)
+
+    def test_successful_processing_updates_cache(self, listener, monkeypatch,
+                                                 cache_scraping_task, cache_product_list):
         """Test: Procesamiento exitoso debe actualizar el cache."""
         from manager.cache_manager import CacheManager
-        from models import ScrapingRequest
-        from scraper.models.models import Product
         
         # Arrange
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config):
-            listener = MessageListener()
-            
-            mock_cache = Mock(spec=CacheManager)
-            
-            # Crear tarea de prueba
-            request = ScrapingRequest(
-                url="https://test.com",
-                category="MLU5725",
-                page=1,
-                max_products=50
-            )
-            
-            task = ScrapingTask(
-                id="test-task",
-                request=request,
-                status=ScrapingStatus.PENDING,
-                created_at=datetime.now().isoformat()
-            )
-            
-            # Mock productos de resultado
-            from decimal import Decimal
-            mock_products = [
-                Product(
-                    title="Test Product 1",
-                    url="https://test1.com",
-                    seller="Test Seller 1",
-                    current_price=Decimal("100.0"),
-                    category="MLU5725",
-                    page=1
-                ),
-                Product(
-                    title="Test Product 2",
-                    url="https://test2.com",
-                    seller="Test Seller 2",
-                    current_price=Decimal("200.0"),
-                    category="MLU5725",
-                    page=1
-                )
-            ]
+        mock_cache = Mock(spec=CacheManager)
+        
+        monkeypatch.setattr(message_listener, "cache_manager", mock_cache)
+        monkeypatch.setattr(message_listener, "run_main", Mock(return_value=cache_product_list))
+        monkeypatch.setattr(listener, "_save_products", Mock(return_value=True))
+        listener.scraper_service.is_available.return_value = True
         
         # Act
-        with patch('manager.listeners.message_listener.cache_manager', mock_cache):
-            with patch('manager.listeners.message_listener.run_main', return_value=mock_products):
-                with patch.object(listener, '_save_products', return_value=True):
-                    with patch.object(listener.scraper_service, 'is_available', return_value=True):
-                        listener._process_task_sync(task)
+        listener._process_task_sync(cache_scraping_task)
         
         # Assert
         mock_cache.set.assert_called_once()
@@ -661,38 +713,20 @@ class TestMessageListenerCache:
         assert response.status == ScrapingStatus.COMPLETED
         assert "2 productos encontrados" in response.message
         assert response.task_id == "test-task"
-    
-    def test_failed_processing_invalidates_cache(self, mock_rabbitmq_config):
+
+    def test_failed_processing_invalidates_cache(self, listener, monkeypatch, cache_scraping_task):
         """Test: Procesamiento fallido debe invalidar el cache."""
         from manager.cache_manager import CacheManager
-        from models import ScrapingRequest
         
         # Arrange
-        with patch('manager.listeners.message_listener.RABBITMQ_CONFIG', mock_rabbitmq_config):
-            listener = MessageListener()
-            
-            mock_cache = Mock(spec=CacheManager)
-            
-            # Crear tarea de prueba
-            request = ScrapingRequest(
-                url="https://test.com",
-                category="MLU5725",
-                page=1,
-                max_products=50
-            )
-            
-            task = ScrapingTask(
-                id="test-task",
-                request=request,
-                status=ScrapingStatus.PENDING,
-                created_at=datetime.now().isoformat()
-            )
+        mock_cache = Mock(spec=CacheManager)
+        
+        monkeypatch.setattr(message_listener, "cache_manager", mock_cache)
+        monkeypatch.setattr(message_listener, "run_main", Mock(side_effect=Exception("Test error")))
+        listener.scraper_service.is_available.return_value = True
         
         # Act
-        with patch('manager.listeners.message_listener.cache_manager', mock_cache):
-            with patch('manager.listeners.message_listener.run_main', side_effect=Exception("Test error")):
-                with patch.object(listener.scraper_service, 'is_available', return_value=True):
-                    listener._process_task_sync(task)
+        listener._process_task_sync(cache_scraping_task)
         
         # Assert
         mock_cache.invalidate.assert_called_once_with("MLU5725", 1)
@@ -8,20 +8,22 @@ import asyncio
 from datetime import datetime
 from unittest.mock import patch, MagicMock
 
-from manager.cache_manager import CacheManager, CacheEntry
+from manager.cache_manager import CacheManager, CacheEntry, _NUM_SHARDS
 from models.scraping_models import ScrapingResponse, ScrapingStatus
 
 
+# Nanosegundos por segundo y origen arbitrario del reloj monotónico simulado
+NS = 1_000_000_000
+T0_NS = 1000 * NS
+
+
 class TestCacheManager:
     """Suite de pruebas para CacheManager."""
     
-    def setup_method(self):
-        """Configurar antes de cada test."""
-        # Crear instancia de cache con TTL corto para pruebas (0.01 horas = 36 segundos)
-        self.cache = CacheManager(ttl_hours=0.01)
-        
-        # Datos de prueba
-        self.test_response = ScrapingResponse(
+    @pytest.fixture(scope="class", autouse=True)
+    def cache_responses(self, request):
+        """Construir las respuestas de prueba una vez por clase (son inmutables)."""
+        request.cls.test_response = ScrapingResponse(
             task_id="test-123",
             status=ScrapingStatus.COMPLETED,
             message="Prueba exitosa",
@@ -31,7 +33,7 @@ class TestCacheManager:
             max_products=50
         )
         
-        self.test_response_2 = ScrapingResponse(
+        request.cls.test_response_2 = ScrapingResponse(
             task_id="test-456",
             status=ScrapingStatus.COMPLETED,
             message="Segunda prueba",
@@ -41,23 +43,35 @@ class TestCacheManager:
             max_products=100
         )
     
+    def setup_method(self):
+        """Configurar antes de cada test."""
+        # Crear instancia de cache con TTL corto para pruebas (0.01 horas = 36 segundos)
+        self.cache = CacheManager(ttl_hours=0.01)
+    
     def test_cache_initialization(self):
         """Test: Inicialización correcta del cache."""
         cache = CacheManager(ttl_hours=2.0)
         
         assert cache._ttl_seconds == 7200  # 2 horas en segundos
-        assert len(cache._cache) == 0
-        assert cache._lock is not None
+        assert len(cache) == 0
+        assert len(cache._shards) == _NUM_SHARDS
+        assert len(cache._locks) == _NUM_SHARDS
     
     def test_generate_key(self):
         """Test: Generación correcta de claves."""
         # Casos normales
-        assert self.cache._generate_key("MLU107", 1) == "MLU107:page:1"
-        assert self.cache._generate_key("MLA1234", 999) == "MLA1234:page:999"
+        assert self.cache._generate_key("MLU107", 1) == ("MLU107", 1)
+        assert self.cache._generate_key("MLA1234", 999) == ("MLA1234", 999)
         
         # Conversión a mayúsculas
-        assert self.cache._generate_key("mlu107", 1) == "MLU107:page:1"
-        assert self.cache._generate_key("MlA1234", 5) == "MLA1234:page:5"
+        assert self.cache._generate_key("mlu107", 1) == ("MLU107", 1)
+        assert self.cache._generate_key("MlA1234", 5) == ("MLA1234", 5)
+        
+        # Forma de texto (la que expone list_keys)
+        assert self.cache._format_key(("MLU107", 1)) == "MLU107:page:1"
+        
+        # La categoría normalizada está internada
+        assert self.cache._generate_key("mlu107", 1)[0] is self.cache._generate_key("MLU107", 2)[0]
     
     def test_cache_set_and_get(self):
         """Test: Operaciones básicas de set y get."""
@@ -79,6 +93,19 @@ class TestCacheManager:
         assert cached_response.page == page
         assert cached_response.url == self.test_response.url
     
+    def test_cache_stores_response_instance(self):
+        """Test: El cache devuelve la misma instancia guardada, sin copias ni revalidación."""
+        from pydantic import ValidationError
+        
+        # Arrange / Act - Guardar y recuperar
+        self.cache.set("MLU107", 1, self.test_response)
+        result = self.cache.get("MLU107", 1)
+        
+        # Assert - Misma instancia, e inmutable para que nadie altere el cache
+        assert result is self.test_response
+        with pytest.raises(ValidationError):
+            result.status = ScrapingStatus.FAILED
+    
     def test_cache_multiple_entries(self):
         """Test: Múltiples entradas en cache."""
         # Agregar primera entrada
@@ -159,6 +186,27 @@ class TestCacheManager:
         assert stats["avg_time_to_expire_seconds"] > 0
         assert stats["memory_usage_mb"] > 0
     
+    def test_cache_stats_avg_time_to_expire(self):
+        """Test: El promedio hasta expiración sigue altas, reemplazos e invalidaciones."""
+        ttl = self.cache._ttl_seconds
+        
+        with patch('time.monotonic_ns') as mock_time:
+            # Entradas guardadas en T0 y T0+10s, consultadas en T0+20s
+            mock_time.return_value = T0_NS
+            self.cache.set("MLU107", 1, self.test_response)
+            mock_time.return_value = T0_NS + 10 * NS
+            self.cache.set("MLA1234", 2, self.test_response_2)
+            mock_time.return_value = T0_NS + 20 * NS
+            assert self.cache.get_stats()["avg_time_to_expire_seconds"] == pytest.approx(ttl - 15)
+            
+            # Reescribir la primera en T0+20s la saca del promedio con su expiración vieja
+            self.cache.set("MLU107", 1, self.test_response)
+            assert self.cache.get_stats()["avg_time_to_expire_seconds"] == pytest.approx(ttl - 5)
+            
+            # Invalidar deja solo la segunda
+            self.cache.invalidate("MLU107", 1)
+            assert self.cache.get_stats()["avg_time_to_expire_seconds"] == pytest.approx(ttl - 10)
+    
     def test_cache_list_keys(self):
         """Test: Listado de claves activas."""
         # Cache vacío
@@ -174,52 +222,178 @@ class TestCacheManager:
         assert "MLU107:page:1" in keys
         assert "MLA1234:page:2" in keys
     
+    def test_generate_key_category_cache_is_bounded(self):
+        """Test: La categoría normalizada se memoriza y la memoria tiene un tope."""
+        from manager.cache_manager import _CATEGORY_CACHE_MAXSIZE
+        
+        # Misma categoría en distintas páginas reutiliza la normalización
+        self.cache._generate_key("mlu107", 1)
+        self.cache._generate_key("mlu107", 2)
+        assert self.cache._category_cache == {"mlu107": "MLU107"}
+        
+        # Superar el tope vacía la memoria en lugar de crecer sin límite
+        for i in range(_CATEGORY_CACHE_MAXSIZE + 1):
+            assert self.cache._generate_key(f"mlx{i}", 3) == (f"MLX{i}", 3)
+        assert len(self.cache._category_cache) <= _CATEGORY_CACHE_MAXSIZE
+    
     def test_cache_expiration_check(self):
         """Test: Verificación de expiración."""
-        current_time = time.time()
+        now_ns = time.monotonic_ns()
         
         # Entrada no expirada
         entry_valid = CacheEntry(
             data=self.test_response,
-            created_at=current_time,
-            expires_at=current_time + 100  # Expira en 100 segundos
+            created_at_ns=now_ns,
+            expires_at_ns=now_ns + 100 * NS  # Expira en 100 segundos
         )
         assert not self.cache._is_expired(entry_valid)
         
         # Entrada expirada
         entry_expired = CacheEntry(
             data=self.test_response,
-            created_at=current_time - 200,
-            expires_at=current_time - 100  # Expiró hace 100 segundos
+            created_at_ns=now_ns - 200 * NS,
+            expires_at_ns=now_ns - 100 * NS  # Expiró hace 100 segundos
         )
         assert self.cache._is_expired(entry_expired)
     
     def test_cache_cleanup_expired(self):
         """Test: Limpieza automática de entradas expiradas."""
-        # Mock time.time() para controlar el tiempo
-        with patch('time.time') as mock_time:
+        # Mock time.monotonic_ns() para controlar el tiempo
+        with patch('time.monotonic_ns') as mock_time:
             # Tiempo inicial
-            mock_time.return_value = 1000.0
+            mock_time.return_value = T0_NS
             
             # Agregar entrada que expirará pronto
             self.cache.set("MLU107", 1, self.test_response)
-            assert len(self.cache._cache) == 1
+            assert len(self.cache) == 1
             
             # Avanzar tiempo más allá del TTL
-            mock_time.return_value = 1000.0 + self.cache._ttl_seconds + 1
+            mock_time.return_value = T0_NS + self.cache._ttl_ns + 1
             
-            # Intentar obtener entrada (debería limpiar automáticamente)
+            # get trata la entrada como expirada pero no la elimina
             result = self.cache.get("MLU107", 1)
             assert result is None
-            assert len(self.cache._cache) == 0
+            assert len(self.cache) == 1
+            
+            # La siguiente escritura en el shard recoge la entrada vencida
+            self.cache.set("MLU107", 1, self.test_response)
+            assert len(self.cache) == 1
+            assert self.cache.get("MLU107", 1) == self.test_response
+            
+            # list_keys también limpia las expiradas
+            mock_time.return_value = T0_NS + 2 * (self.cache._ttl_ns + 1)
+            assert self.cache.list_keys() == []
+            assert len(self.cache) == 0
+    
+    def test_cache_get_expiry_boundary(self):
+        """Test: get coincide con _is_expired justo en el instante de expiración."""
+        with patch('time.monotonic_ns') as mock_time:
+            mock_time.return_value = T0_NS
+            self.cache.set("MLU107", 1, self.test_response)
+            
+            # En el instante exacto de expiración todavía es HIT
+            mock_time.return_value = T0_NS + self.cache._ttl_ns
+            assert self.cache.get("MLU107", 1) == self.test_response
+            
+            # Un nanosegundo después es MISS
+            mock_time.return_value = T0_NS + self.cache._ttl_ns + 1
+            assert self.cache.get("MLU107", 1) is None
+    
+    def test_cache_ignores_wall_clock_jumps(self):
+        """Test: Un salto del reloj de pared no expira entradas (se usa el reloj monotónico)."""
+        # Arrange - Entrada recién guardada
+        self.cache.set("MLU107", 1, self.test_response)
+        
+        # Act - Adelantar el reloj de pared un día
+        with patch('time.time', return_value=time.time() + 86400):
+            result = self.cache.get("MLU107", 1)
+        
+        # Assert - La entrada sigue vigente
+        assert result == self.test_response
+    
+    def test_cache_sweep_keeps_refreshed_entries(self):
+        """Test: Una expiración vieja en la cola no elimina una entrada reescrita después."""
+        with patch('time.monotonic_ns') as mock_time:
+            # Arrange - Entrada escrita dos veces, la segunda con expiración posterior
+            mock_time.return_value = T0_NS
+            self.cache.set("MLU107", 1, self.test_response)
+            mock_time.return_value = T0_NS + 10 * NS
+            self.cache.set("MLU107", 1, self.test_response_2)
+            
+            # Act - Pasar solo la primera expiración y forzar limpieza
+            mock_time.return_value = T0_NS + self.cache._ttl_ns + 1
+            keys = self.cache.list_keys()
+            
+            # Assert - La entrada vigente sigue en el cache
+            assert keys == ["MLU107:page:1"]
+            assert self.cache.get("MLU107", 1) == self.test_response_2
+    
+    def test_cache_sweep_pops_only_expired_prefix(self):
+        """Test: La limpieza saca solo el frente vencido de la cola de expiraciones."""
+        a, b, c = self._same_shard_categories(self.cache, 3)
+        index = self.cache._shard_index(self.cache._generate_key(a, 1))
+        
+        with patch('time.monotonic_ns') as mock_time:
+            # Arrange - Tres altas separadas 10 segundos en el mismo shard
+            for offset, category in enumerate((a, b, c)):
+                mock_time.return_value = T0_NS + offset * 10 * NS
+                self.cache.set(category, 1, self.test_response)
+            
+            # Act - Vencidas las dos primeras, no la tercera
+            mock_time.return_value = T0_NS + self.cache._ttl_ns + 15 * NS
+            keys = self.cache.list_keys()
+        
+        # Assert - Solo queda la tercera, en el cache y en la cola
+        assert keys == [f"{c}:page:1"]
+        assert [key for _, key in self.cache._expiry_queues[index]] == [(c, 1)]
+    
+    def _same_shard_categories(self, cache, count):
+        """Buscar `count` categorías cuyas claves (página 1) caen en el mismo shard."""
+        target = cache._shard_index(cache._generate_key("MLU0", 1))
+        return [
+            category for category in (f"MLU{i}" for i in range(10000))
+            if cache._shard_index(cache._generate_key(category, 1)) == target
+        ][:count]
+    
+    def test_cache_is_bounded_per_shard(self):
+        """Test: Un shard lleno desaloja entradas en lugar de crecer."""
+        # Arrange - Capacidad de 3 entradas por shard
+        cache = CacheManager(ttl_hours=0.01, max_entries=3 * _NUM_SHARDS)
+        categories = self._same_shard_categories(cache, 10)
+        
+        # Act - Insertar más entradas que la capacidad del shard
+        for category in categories:
+            cache.set(category, 1, self.test_response)
+        
+        # Assert - El shard quedó en su capacidad y el contador de bytes la refleja
+        assert len(cache) == 3
+        size = len(self.test_response.model_dump_json())
+        assert cache.get_stats()["memory_usage_mb"] * 1024 * 1024 == pytest.approx(3 * size)
+    
+    def test_cache_sieve_keeps_visited_entries(self):
+        """Test: SIEVE desaloja la entrada más antigua no leída y conserva las leídas."""
+        # Arrange - Shard lleno con A, B, C y A leída
+        cache = CacheManager(ttl_hours=0.01, max_entries=3 * _NUM_SHARDS)
+        a, b, c, d = self._same_shard_categories(cache, 4)
+        for category in (a, b, c):
+            cache.set(category, 1, self.test_response)
+        assert cache.get(a, 1) is not None
+        
+        # Act - Insertar D con el shard lleno
+        cache.set(d, 1, self.test_response)
+        
+        # Assert - Se desalojó B (la más antigua sin leer), A sobrevive
+        assert cache.get(b, 1) is None
+        assert all(cache.get(category, 1) is not None for category in (a, c, d))
     
     def test_cache_thread_safety(self):
         """Test: Verificar que las operaciones son thread-safe."""
         import threading
         from unittest.mock import Mock
         
-        # Verificar que el cache tiene un lock
-        assert isinstance(self.cache._lock, type(threading.Lock()))
+        # Verificar que cada shard tiene su propio lock
+        assert all(isinstance(lock, type(threading.Lock())) for lock in self.cache._locks)
+        assert len(set(map(id, self.cache._locks))) == _NUM_SHARDS
         
         # Test funcional: verificar que las operaciones funcionan con lock
         # Simular acceso concurrente básico
@@ -270,6 +444,67 @@ class TestCacheManager:
         assert len(errors) == 0, f"Errores en threads: {errors}"
         assert len(results) > 0, "Debería haber resultados de los threads"
     
+    def test_cache_shards_do_not_contend(self):
+        """Test: Un shard bloqueado no impide operar sobre claves de otro shard."""
+        import threading
+        
+        # Buscar una categoría cuya clave caiga en otro shard que MLU107:page:1
+        locked_index = self.cache._shard_index(self.cache._generate_key("MLU107", 1))
+        other_category = next(
+            f"MLU{i}" for i in range(1000)
+            if self.cache._shard_index(self.cache._generate_key(f"MLU{i}", 1)) != locked_index
+        )
+        
+        # Con el lock del primer shard tomado, set/get sobre el otro deben completar
+        with self.cache._locks[locked_index]:
+            worker = threading.Thread(target=lambda: (
+                self.cache.set(other_category, 1, self.test_response),
+                self.cache.get(other_category, 1)
+            ))
+            worker.start()
+            worker.join(timeout=2)
+            
+            assert not worker.is_alive()
+        
+        assert self.cache.get(other_category, 1) == self.test_response
+    
+    def test_cache_hit_does_not_take_lock(self):
+        """Test: Un cache HIT se resuelve sin tomar el lock del shard."""
+        import threading
+        
+        # Arrange - Entrada vigente y lock de su shard tomado por otro escritor
+        self.cache.set("MLU107", 1, self.test_response)
+        index = self.cache._shard_index(self.cache._generate_key("MLU107", 1))
+        results = []
+        
+        # Act - Leer desde otro thread mientras el lock está tomado
+        with self.cache._locks[index]:
+            reader = threading.Thread(target=lambda: results.append(self.cache.get("MLU107", 1)))
+            reader.start()
+            reader.join(timeout=2)
+            
+            # Assert - La lectura terminó sin esperar al lock
+            assert not reader.is_alive()
+        
+        assert results == [self.test_response]
+    
+    def test_cache_writes_publish_new_shard(self):
+        """Test: set/invalidate publican un dict nuevo y no mutan el que ven los lectores."""
+        # Arrange - Snapshot del shard tal como lo vería un lector concurrente
+        index = self.cache._shard_index(self.cache._generate_key("MLU107", 1))
+        snapshot = self.cache._shards[index]
+        
+        # Act - Escribir e invalidar
+        self.cache.set("MLU107", 1, self.test_response)
+        after_set = self.cache._shards[index]
+        self.cache.invalidate("MLU107", 1)
+        
+        # Assert - Cada escritura reemplazó el dict sin tocar los anteriores
+        assert snapshot == {}
+        assert ("MLU107", 1) in after_set
+        assert self.cache._shards[index] is not after_set
+        assert ("MLU107", 1) not in self.cache._shards[index]
+    
     def test_cache_key_normalization(self):
         """Test: Normalización de claves (mayúsculas/minúsculas)."""
         # Agregar con minúsculas
@@ -340,30 +575,80 @@ class TestCacheManager:
         stats_more_data = self.cache.get_stats()
         assert stats_more_data["memory_usage_mb"] > stats_with_data["memory_usage_mb"]
     
+    def test_cache_memory_estimation_without_getsizeof(self):
+        """Test: La estimación de memoria no usa sys.getsizeof (que en PyPy lanza TypeError)."""
+        # Arrange - sys.getsizeof se comporta como en PyPy
+        self.cache.set("MLU107", 1, self.test_response)
+        
+        with patch('sys.getsizeof', side_effect=TypeError("getsizeof no disponible")):
+            # Act - Pedir estadísticas
+            stats = self.cache.get_stats()
+        
+        # Assert - Se reporta el tamaño calculado al insertar
+        expected_mb = len(self.test_response.model_dump_json()) / (1024 * 1024)
+        assert stats["memory_usage_mb"] == pytest.approx(expected_mb)
+    
+    def test_cache_memory_counter_tracks_removals(self):
+        """Test: El contador de bytes sigue a set, reemplazo, invalidate, expiración y clear."""
+        size_1 = len(self.test_response.model_dump_json())
+        size_2 = len(self.test_response_2.model_dump_json())
+        
+        def total_bytes():
+            return self.cache.get_stats()["memory_usage_mb"] * 1024 * 1024
+        
+        with patch('time.monotonic_ns') as mock_time:
+            mock_time.return_value = T0_NS
+            
+            # Alta y reemplazo de la misma clave: no se cuenta dos veces
+            self.cache.set("MLU107", 1, self.test_response)
+            self.cache.set("MLU107", 1, self.test_response)
+            self.cache.set("MLA1234", 2, self.test_response_2)
+            assert total_bytes() == pytest.approx(size_1 + size_2)
+            
+            # Invalidate descuenta la entrada eliminada
+            self.cache.invalidate("MLA1234", 2)
+            assert total_bytes() == pytest.approx(size_1)
+            
+            # La expiración también descuenta
+            mock_time.return_value = T0_NS + self.cache._ttl_ns + 1
+            assert total_bytes() == 0
+        
+        # Clear deja el contador en cero
+        self.cache.set("MLU107", 1, self.test_response)
+        self.cache.clear()
+        assert total_bytes() == 0
+    
     @pytest.mark.asyncio
     async def test_cache_concurrent_access(self):
         """Test: Acceso concurrente al cache."""
-        async def set_operation(category_suffix: str):
-            """Operación de escritura concurrente."""
-            for i in range(10):
-                category = f"MLU{category_suffix}"
-                response = ScrapingResponse(
-                    task_id=f"task-{category_suffix}-{i}",
+        # Respuestas construidas antes de la parte concurrente
+        responses = {
+            suffix: [
+                ScrapingResponse(
+                    task_id=f"task-{suffix}-{i}",
                     status=ScrapingStatus.COMPLETED,
                     message=f"Concurrent test {i}",
                     url=f"https://test{i}.com",
-                    category=category,
+                    category=f"MLU{suffix}",
                     page=i + 1,
                     max_products=50
                 )
-                self.cache.set(category, i + 1, response)
+                for i in range(10)
+            ]
+            for suffix in ("100", "200", "300")
+        }
+        
+        async def set_operation(category_suffix: str):
+            """Operación de escritura concurrente."""
+            for i, response in enumerate(responses[category_suffix]):
+                await self.cache.aset(f"MLU{category_suffix}", i + 1, response)
         
         async def get_operation(category_suffix: str):
             """Operación de lectura concurrente."""
             results = []
             for i in range(10):
                 category = f"MLU{category_suffix}"
-                result = self.cache.get(category, i + 1)
+                result = await self.cache.aget(category, i + 1)
                 results.append(result)
             return results
         
@@ -389,6 +674,44 @@ class TestCacheManager:
         final_stats = self.cache.get_stats()
         # Nota: Algunas entradas pueden haber expirado durante la prueba
         assert final_stats["total_entries"] >= 0
+    
+    @pytest.mark.asyncio
+    async def test_cache_aset_does_not_block_loop_when_contended(self):
+        """Test: aset con el shard bloqueado por otro thread no frena el event loop."""
+        import threading
+        
+        # Arrange - Otro thread tiene el lock del shard
+        index = self.cache._shard_index(self.cache._generate_key("MLU107", 1))
+        lock = self.cache._locks[index]
+        lock.acquire()
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+        
+        # Act - Lanzar aset, dejar correr el loop y liberar el lock desde otro thread
+        ticker_task = asyncio.create_task(ticker())
+        set_task = asyncio.create_task(self.cache.aset("MLU107", 1, self.test_response))
+        await asyncio.sleep(0.05)
+        threading.Timer(0, lock.release).start()
+        await asyncio.wait_for(set_task, timeout=2)
+        ticker_task.cancel()
+        
+        # Assert - El loop siguió avanzando y la escritura se completó
+        assert ticks > 1
+        assert await self.cache.aget("MLU107", 1) == self.test_response
+    
+    @pytest.mark.asyncio
+    async def test_cache_aset_uncontended_writes_inline(self):
+        """Test: Sin contención aset escribe en el acto, sin pasar por el executor."""
+        with patch.object(asyncio.get_running_loop(), "run_in_executor") as mock_executor:
+            await self.cache.aset("MLU107", 1, self.test_response)
+        
+        mock_executor.assert_not_called()
+        assert self.cache.get("MLU107", 1) == self.test_response
 
 
 class TestCacheEntry:
@@ -406,18 +729,30 @@ class TestCacheEntry:
             max_products=50
         )
         
-        created_at = time.time()
-        expires_at = created_at + 3600
+        created_at_ns = time.monotonic_ns()
+        expires_at_ns = created_at_ns + 3600 * NS
         
         entry = CacheEntry(
             data=response,
-            created_at=created_at,
-            expires_at=expires_at
+            created_at_ns=created_at_ns,
+            expires_at_ns=expires_at_ns
         )
         
         assert entry.data == response
-        assert entry.created_at == created_at
-        assert entry.expires_at == expires_at
+        assert entry.created_at_ns == created_at_ns
+        assert entry.expires_at_ns == expires_at_ns
+    
+    def test_cache_entry_has_no_instance_dict(self):
+        """Test: CacheEntry usa __slots__ (sin __dict__ por instancia)."""
+        entry = CacheEntry(
+            data=MagicMock(),
+            created_at_ns=0,
+            expires_at_ns=NS
+        )
+        
+        assert not hasattr(entry, "__dict__")
+        with pytest.raises(AttributeError):
+            entry.unexpected = True
     
     def test_cache_entry_comparison(self):
         """Test: Comparación de entradas de cache."""
@@ -441,23 +776,23 @@ class TestCacheEntry:
             max_products=100
         )
         
-        current_time = time.time()
+        now_ns = time.monotonic_ns()
         
         entry1 = CacheEntry(
             data=response1,
-            created_at=current_time,
-            expires_at=current_time + 1000
+            created_at_ns=now_ns,
+            expires_at_ns=now_ns + 1000 * NS
         )
         
         entry2 = CacheEntry(
             data=response2,
-            created_at=current_time,
-            expires_at=current_time + 2000
+            created_at_ns=now_ns,
+            expires_at_ns=now_ns + 2000 * NS
         )
         
         # Las entradas deben ser diferentes
         assert entry1.data.task_id != entry2.data.task_id
-        assert entry1.expires_at != entry2.expires_at
+        assert entry1.expires_at_ns != entry2.expires_at_ns
 
 
 class TestCacheIntegration:
@@ -568,7 +903,7 @@ class TestCacheIntegration:
         # Simular múltiples requests concurrentes para la misma página
         async def simulate_request(request_id: int):
             # Verificar cache
-            cached = self.cache.get(category, page)
+            cached = await self.cache.aget(category, page)
             if cached:
                 return cached, True  # Cache hit
             
@@ -585,9 +920,9 @@ class TestCacheIntegration:
             )
             
             # Solo el primero debería guardar en cache
-            existing = self.cache.get(category, page)
+            existing = await self.cache.aget(category, page)
             if existing is None:
-                self.cache.set(category, page, response)
+                await self.cache.aset(category, page, response)
                 return response, False  # Cache miss
             else:
                 return existing, True  # Otro thread ya guardó
@@ -622,7 +957,7 @@ class TestCacheIntegration:
         ]
         
         for category_input, page, expected_key in test_cases:
-            actual_key = self.cache._generate_key(category_input, page)
+            actual_key = self.cache._format_key(self.cache._generate_key(category_input, page))
             assert actual_key == expected_key, f"Clave incorrecta para {category_input}:{page}"
             
             # Verificar que se puede guardar y recuperar correctamente
@@ -5,6 +5,7 @@ import pytest
 import json
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from datetime import datetime
+from pika.adapters.blocking_connection import BlockingChannel
 
 import sys
 from pathlib import Path
@@ -15,7 +16,48 @@ sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from manager.rabbitmq_manager import RabbitMQManager
 from models import ScrapingTask, ScrapingStatus, ScrapingResult
 
+# Método de entrega devuelto por basic_get; los tests solo leen delivery_tag
+_DELIVERY_METHOD = Mock(delivery_tag="test-tag")
 
+# Respuesta de basic_get cuando la cola está vacía
+_EMPTY_GET = (None, None, None)
+
+
+def _get_sequence(body, count):
+    """
+    Respuestas de basic_get: count mensajes con el mismo cuerpo y luego cola vacía.
+    
+    Args:
+        body: Cuerpo del mensaje en bytes
+        count: Número de mensajes disponibles
+        
+    Returns:
+        Tupla de respuestas para usar como side_effect
+    """
+    return ((_DELIVERY_METHOD, None, body),) * count + (_EMPTY_GET,)
+
+
+def _build_manager(config):
+    """
+    Construir un RabbitMQManager con pika.BlockingConnection mockeado.
+    
+    El patch solo hace falta durante la construcción: el manager no vuelve a
+    conectarse después, así que el manager se puede compartir entre tests.
+    
+    Returns:
+        Tupla (manager, canal mockeado que usa el manager)
+    """
+    with patch('manager.rabbitmq_manager.pika.BlockingConnection') as mock_connection:
+        # spec: un método inexistente en BlockingChannel falla en vez de pasar en silencio
+        mock_channel = Mock(spec=BlockingChannel)
+        mock_conn_instance = Mock()
+        mock_conn_instance.channel.return_value = mock_channel
+        mock_connection.return_value = mock_conn_instance
+        
+        return RabbitMQManager(config), mock_channel
+
+
+@pytest.mark.xdist_group(name="rabbitmq_manager_initialization")
 class TestRabbitMQManagerInitialization:
     """Tests para inicialización del RabbitMQManager."""
     
@@ -62,15 +104,11 @@ class TestRabbitMQManagerInitialization:
             with pytest.raises(Exception, match="Connection failed"):
                 RabbitMQManager(mock_rabbitmq_config)
 
-    def test_default_queue_names_configuration(self, mock_rabbitmq_config):
+    def test_default_queue_names_configuration(self, mock_rabbitmq_config_no_defaults):
         """
         Test: Configuración de nombres de colas por defecto
         """
         # Arrange - Configuración sin algunos valores opcionales
-        config = mock_rabbitmq_config.copy()
-        del config["queue"]
-        del config["exchange"]
-        
         with patch('manager.rabbitmq_manager.pika.BlockingConnection') as mock_connection:
             mock_channel = Mock()
             mock_conn_instance = Mock()
@@ -78,7 +116,7 @@ class TestRabbitMQManagerInitialization:
             mock_connection.return_value = mock_conn_instance
             
             # Act - Crear instancia sin configuraciones opcionales
-            manager = RabbitMQManager(config)
+            manager = RabbitMQManager(mock_rabbitmq_config_no_defaults)
             
             # Assert - Verificar valores por defecto
             assert manager.tasks_queue == "scraping_queue"
@@ -87,29 +125,25 @@ class TestRabbitMQManagerInitialization:
             assert manager.failed_queue == "scraping_failed"
 
 
+@pytest.mark.xdist_group(name="rabbitmq_manager_task_operations")
 class TestRabbitMQManagerTaskOperations:
     """Tests para operaciones con tareas."""
     
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_manager(self, request, mock_rabbitmq_config):
+        """Manager construido una sola vez para toda la clase."""
+        request.cls.manager, request.cls.mock_channel = _build_manager(mock_rabbitmq_config)
+    
     @pytest.fixture(autouse=True)
-    def setup_manager(self, mock_rabbitmq_config):
-        """Setup del manager para cada test."""
-        with patch('manager.rabbitmq_manager.pika.BlockingConnection') as mock_connection:
-            mock_channel = Mock()
-            mock_conn_instance = Mock()
-            mock_conn_instance.channel.return_value = mock_channel
-            mock_connection.return_value = mock_conn_instance
-            
-            self.manager = RabbitMQManager(mock_rabbitmq_config)
-            self.mock_channel = mock_channel
-            yield
+    def reset_channel(self):
+        """Devolver el canal compartido a su estado inicial antes de cada test."""
+        self.mock_channel.reset_mock(return_value=True, side_effect=True)
 
-    @pytest.mark.asyncio
     async def test_add_task_success(self, sample_scraping_task):
         """
         Test: Agregar tarea exitosamente debe publicar mensaje en cola
         """
-        # Arrange - Configurar mock del canal
-        self.mock_channel.basic_publish = Mock()
+        # Arrange - El canal compartido ya viene reiniciado por reset_channel
         
         # Act - Agregar tarea
         result = await self.manager.add_task(sample_scraping_task)
@@ -128,7 +162,6 @@ class TestRabbitMQManagerTaskOperations:
         task_data = json.loads(body)
         assert task_data["id"] == sample_scraping_task.id
 
-    @pytest.mark.asyncio
     async def test_add_task_failure(self, sample_scraping_task):
         """
         Test: Fallo al agregar tarea debe retornar False
@@ -142,20 +175,12 @@ class TestRabbitMQManagerTaskOperations:
         # Assert - Verificar manejo de error
         assert result is False
 
-    @pytest.mark.asyncio
-    async def test_get_task_found(self, sample_scraping_task):
+    async def test_get_task_found(self, sample_scraping_task, sample_scraping_task_body):
         """
         Test: Obtener tarea existente debe retornar la tarea
         """
         # Arrange - Configurar mensaje disponible
-        task_data = sample_scraping_task.dict()
-        message_body = json.dumps(task_data, default=str)
-        
-        mock_method = Mock()
-        mock_method.delivery_tag = "test-tag"
-        
-        self.mock_channel.basic_get.return_value = (mock_method, None, message_body.encode())
-        self.mock_channel.basic_ack = Mock()
+        self.mock_channel.basic_get.return_value = (_DELIVERY_METHOD, None, sample_scraping_task_body)
         
         # Act - Obtener tarea
         result = await self.manager.get_task(sample_scraping_task.id)
@@ -165,13 +190,12 @@ class TestRabbitMQManagerTaskOperations:
         assert result.id == sample_scraping_task.id
         self.mock_channel.basic_ack.assert_called_once_with(delivery_tag="test-tag")
 
-    @pytest.mark.asyncio
     async def test_get_task_not_found(self):
         """
         Test: Obtener tarea inexistente debe retornar None
         """
         # Arrange - No hay mensajes disponibles
-        self.mock_channel.basic_get.return_value = (None, None, None)
+        self.mock_channel.basic_get.return_value = _EMPTY_GET
         
         # Act - Intentar obtener tarea inexistente
         result = await self.manager.get_task("nonexistent-task")
@@ -179,25 +203,12 @@ class TestRabbitMQManagerTaskOperations:
         # Assert - Verificar que no se encontró
         assert result is None
 
-    @pytest.mark.asyncio
-    async def test_list_tasks_success(self, sample_scraping_task):
+    async def test_list_tasks_success(self, sample_scraping_task, sample_scraping_task_body):
         """
         Test: Listar tareas debe retornar lista de tareas
         """
-        # Arrange - Configurar múltiples mensajes
-        task_data = sample_scraping_task.dict()
-        message_body = json.dumps(task_data, default=str)
-        
-        mock_method = Mock()
-        mock_method.delivery_tag = "test-tag"
-        
-        # Simular 2 tareas disponibles
-        self.mock_channel.basic_get.side_effect = [
-            (mock_method, None, message_body.encode()),
-            (mock_method, None, message_body.encode()),
-            (None, None, None)  # No más mensajes
-        ]
-        self.mock_channel.basic_ack = Mock()
+        # Arrange - Simular 2 tareas disponibles y luego cola vacía
+        self.mock_channel.basic_get.side_effect = _get_sequence(sample_scraping_task_body, 2)
         
         # Act - Listar tareas
         result = await self.manager.list_tasks(limit=2)
@@ -206,21 +217,12 @@ class TestRabbitMQManagerTaskOperations:
         assert len(result) == 2
         assert all(task.id == sample_scraping_task.id for task in result)
 
-    @pytest.mark.asyncio
-    async def test_update_task_status_success(self, sample_scraping_task):
+    async def test_update_task_status_success(self, sample_scraping_task, sample_scraping_task_body):
         """
         Test: Actualizar estado de tarea debe publicar mensaje actualizado
         """
         # Arrange - Configurar tarea existente
-        task_data = sample_scraping_task.dict()
-        message_body = json.dumps(task_data, default=str)
-        
-        mock_method = Mock()
-        mock_method.delivery_tag = "test-tag"
-        
-        self.mock_channel.basic_get.return_value = (mock_method, None, message_body.encode())
-        self.mock_channel.basic_ack = Mock()
-        self.mock_channel.basic_publish = Mock()
+        self.mock_channel.basic_get.return_value = (_DELIVERY_METHOD, None, sample_scraping_task_body)
         
         # Act - Actualizar estado
         result = await self.manager.update_task_status(
@@ -232,21 +234,14 @@ class TestRabbitMQManagerTaskOperations:
         assert result is True
         self.mock_channel.basic_publish.assert_called_once()
 
-    @pytest.mark.asyncio
-    async def test_update_task_completed_success(self, sample_scraping_task, sample_scraping_result):
+    async def test_update_task_completed_success(
+        self, sample_scraping_task, sample_scraping_task_body, sample_scraping_result
+    ):
         """
         Test: Marcar tarea como completada debe actualizar estado y resultado
         """
         # Arrange - Configurar tarea existente
-        task_data = sample_scraping_task.dict()
-        message_body = json.dumps(task_data, default=str)
-        
-        mock_method = Mock()
-        mock_method.delivery_tag = "test-tag"
-        
-        self.mock_channel.basic_get.return_value = (mock_method, None, message_body.encode())
-        self.mock_channel.basic_ack = Mock()
-        self.mock_channel.basic_publish = Mock()
+        self.mock_channel.basic_get.return_value = (_DELIVERY_METHOD, None, sample_scraping_task_body)
         
         # Act - Marcar como completada
         result = await self.manager.update_task_completed(
@@ -262,22 +257,14 @@ class TestRabbitMQManagerTaskOperations:
         call_args = self.mock_channel.basic_publish.call_args
         assert call_args[1]["routing_key"] == "result"
 
-    @pytest.mark.asyncio
-    async def test_update_task_failed_success(self, sample_scraping_task):
+    async def test_update_task_failed_success(self, sample_scraping_task, sample_scraping_task_body):
         """
         Test: Marcar tarea como fallida debe actualizar estado con error
         """
         # Arrange - Configurar tarea existente
-        task_data = sample_scraping_task.dict()
-        message_body = json.dumps(task_data, default=str)
-        
-        mock_method = Mock()
-        mock_method.delivery_tag = "test-tag"
         error_message = "Test error message"
         
-        self.mock_channel.basic_get.return_value = (mock_method, None, message_body.encode())
-        self.mock_channel.basic_ack = Mock()
-        self.mock_channel.basic_publish = Mock()
+        self.mock_channel.basic_get.return_value = (_DELIVERY_METHOD, None, sample_scraping_task_body)
         
         # Act - Marcar como fallida
         result = await self.manager.update_task_failed(
@@ -294,23 +281,20 @@ class TestRabbitMQManagerTaskOperations:
         assert call_args[1]["routing_key"] == "failed"
 
 
+@pytest.mark.xdist_group(name="rabbitmq_manager_queue_operations")
 class TestRabbitMQManagerQueueOperations:
     """Tests para operaciones con colas."""
     
+    @pytest.fixture(scope="class", autouse=True)
+    def setup_manager(self, request, mock_rabbitmq_config):
+        """Manager construido una sola vez para toda la clase."""
+        request.cls.manager, request.cls.mock_channel = _build_manager(mock_rabbitmq_config)
+    
     @pytest.fixture(autouse=True)
-    def setup_manager(self, mock_rabbitmq_config):
-        """Setup del manager para cada test."""
-        with patch('manager.rabbitmq_manager.pika.BlockingConnection') as mock_connection:
-            mock_channel = Mock()
-            mock_conn_instance = Mock()
-            mock_conn_instance.channel.return_value = mock_channel
-            mock_connection.return_value = mock_conn_instance
-            
-            self.manager = RabbitMQManager(mock_rabbitmq_config)
-            self.mock_channel = mock_channel
-            yield
+    def reset_channel(self):
+        """Devolver el canal compartido a su estado inicial antes de cada test."""
+        self.mock_channel.reset_mock(return_value=True, side_effect=True)
 
-    @pytest.mark.asyncio
     async def test_get_queue_stats_success(self):
         """
         Test: Obtener estadísticas de colas debe retornar información correcta
@@ -340,7 +324,6 @@ class TestRabbitMQManagerQueueOperations:
         assert stats["failed"] == 2
         assert stats["total"] == 17
 
-    @pytest.mark.asyncio
     async def test_get_queue_stats_failure(self):
         """
         Test: Fallo al obtener estadísticas debe retornar valores por defecto
@@ -376,49 +359,31 @@ class TestRabbitMQManagerQueueOperations:
         )
         self.mock_channel.start_consuming.assert_called_once()
 
-    def test_stop_consuming_success(self):
-        """
-        Test: Detener consumo debe parar canal si está consumiendo
-        """
-        # Arrange - Configurar canal consumiendo
-        self.mock_channel.is_consuming.return_value = True
-        
-        # Act - Detener consumo
-        self.manager.stop_consuming()
-        
-        # Assert - Verificar detención
-        self.mock_channel.stop_consuming.assert_called_once()
-
-    def test_ack_message_success(self):
-        """
-        Test: Confirmar mensaje debe llamar basic_ack
-        """
-        # Arrange - Tag de entrega
-        delivery_tag = "test-delivery-tag"
-        
-        # Act - Confirmar mensaje
-        self.manager.ack_message(delivery_tag)
-        
-        # Assert - Verificar confirmación
-        self.mock_channel.basic_ack.assert_called_once_with(delivery_tag=delivery_tag)
-
-    def test_nack_message_success(self):
-        """
-        Test: Rechazar mensaje debe llamar basic_nack
-        """
-        # Arrange - Tag de entrega
-        delivery_tag = "test-delivery-tag"
-        
-        # Act - Rechazar mensaje con requeue
-        self.manager.nack_message(delivery_tag, requeue=True)
-        
-        # Assert - Verificar rechazo
-        self.mock_channel.basic_nack.assert_called_once_with(
-            delivery_tag=delivery_tag, 
-            requeue=True
-        )
+    @pytest.mark.parametrize("method,kwargs,channel_method,channel_setup", [
+        ("ack_message", {"delivery_tag": "test-delivery-tag"}, "basic_ack", {}),
+        (
+            "nack_message",
+            {"delivery_tag": "test-delivery-tag", "requeue": True},
+            "basic_nack",
+            {}
+        ),
+        ("stop_consuming", {}, "stop_consuming", {"consumer_tags": ["test-consumer"]}),
+    ], ids=["ack", "nack", "stop_consuming"])
+    def test_channel_passthrough(self, method, kwargs, channel_method, channel_setup):
+        """
+        Test: ack, nack y stop_consuming deben delegar en el método del canal
+        """
+        # Arrange - Estado del canal que necesita cada operación
+        self.mock_channel.configure_mock(**channel_setup)
+        
+        # Act - Ejecutar la operación del manager
+        getattr(self.manager, method)(**kwargs)
+        
+        # Assert - Verificar la llamada al canal
+        getattr(self.mock_channel, channel_method).assert_called_once_with(**kwargs)
 
 
+@pytest.mark.xdist_group(name="rabbitmq_manager_connection_management")
 class TestRabbitMQManagerConnectionManagement:
     """Tests para gestión de conexiones."""
     
@@ -462,23 +427,16 @@ class TestRabbitMQManagerConnectionManagement:
             # Assert - Verificar que no se llama close
             mock_conn_instance.close.assert_not_called()
 
-    def test_destructor_calls_close(self, mock_rabbitmq_config):
+    def test_destructor_calls_close(self):
         """
         Test: Destructor debe llamar close automáticamente
         """
-        # Arrange - Configurar manager
-        with patch('manager.rabbitmq_manager.pika.BlockingConnection') as mock_connection:
-            mock_channel = Mock()
-            mock_conn_instance = Mock()
-            mock_conn_instance.channel.return_value = mock_channel
-            mock_conn_instance.is_closed = False
-            mock_connection.return_value = mock_conn_instance
-            
-            manager = RabbitMQManager(mock_rabbitmq_config)
-            
-            # Act - Destruir objeto (simular)
-            with patch.object(manager, 'close') as mock_close:
-                del manager
-                # En Python real, el destructor se llama automáticamente
-                # Para el test, verificamos que el método existe
-                assert hasattr(RabbitMQManager, '__del__')
+        # Arrange - Manager sin __init__: solo hace falta una conexión abierta
+        manager = RabbitMQManager.__new__(RabbitMQManager)
+        manager.connection = Mock(is_closed=False)
+        
+        # Act - Invocar el destructor directamente, sin depender del GC
+        manager.__del__()
+        
+        # Assert - Verificar cierre de la conexión
+        manager.connection.close.assert_called_once()
@@ -4,13 +4,61 @@ Tests unitarios para ScraperService siguiendo patrón AAA y TDD.
 import pytest
 import json
 from pathlib import Path
-from unittest.mock import Mock, AsyncMock, patch, mock_open
+from unittest.mock import Mock, MagicMock, patch, mock_open
 from datetime import datetime
+from types import SimpleNamespace
 
+from scraper.services import scraper_service
 from scraper.services.scraper_service import ScraperService
 from models import ScrapingResult
 
 
+# Configuración de scraper usada por todos los tests del módulo
+MOCK_SCRAPER_CONFIG = {
+    "base_url": "https://listado.mercadolibre.com.uy",
+    "output_dir": Path("/tmp/test_output")
+}
+
+
+def _fake_scraper(products=None, error=None):
+    """
+    Scraper falso con un scrape_listing_with_details async simple.
+    
+    Args:
+        products: Lista que devuelve el scraping
+        error: Excepción a lanzar en lugar de devolver productos
+        
+    Returns:
+        Tupla (scraper, lista de llamadas (url, max_products))
+    """
+    calls = []
+    
+    async def scrape_listing_with_details(url, max_products):
+        calls.append((url, max_products))
+        if error is not None:
+            raise error
+        return products
+    
+    return SimpleNamespace(scrape_listing_with_details=scrape_listing_with_details), calls
+
+
+@pytest.fixture(scope="class")
+def patched_scraper_module(request):
+    """
+    Reemplazar SCRAPER_CONFIG y SimpleScraper una sola vez por clase.
+    
+    Deja el mock de la clase del scraper en request.cls.mock_scraper_class.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mock_scraper_class = MagicMock()
+        mp.setattr(scraper_service, "SCRAPER_CONFIG", MOCK_SCRAPER_CONFIG)
+        mp.setattr(scraper_service, "SimpleScraper", mock_scraper_class)
+        request.cls.mock_scraper_class = mock_scraper_class
+        yield
+
+
+@pytest.mark.xdist_group(name="scraper_service_initialization")
+@pytest.mark.usefixtures("patched_scraper_module")
 class TestScraperServiceInitialization:
     """Tests para inicialización del ScraperService."""
     
@@ -18,23 +66,14 @@ class TestScraperServiceInitialization:
         """
         Test: ScraperService debe inicializarse correctamente con configuración válida
         """
-        # Arrange - Configuración válida
-        mock_config = {
-            "base_url": "https://listado.mercadolibre.com.uy",
-            "output_dir": Path("/tmp/test_output")
-        }
+        # Act - Crear instancia de ScraperService
+        service = ScraperService()
         
-        with patch('scraper.services.scraper_service.SCRAPER_CONFIG', mock_config), \
-             patch('scraper.services.scraper_service.SimpleScraper') as mock_scraper:
-            
-            # Act - Crear instancia de ScraperService
-            service = ScraperService()
-            
-            # Assert - Verificar inicialización
-            assert service.base_url == mock_config["base_url"]
-            assert service.output_dir == mock_config["output_dir"]
-            assert service.scraper_class == mock_scraper
-            assert service.scraper_available is True
+        # Assert - Verificar inicialización
+        assert service.base_url == MOCK_SCRAPER_CONFIG["base_url"]
+        assert service.output_dir == MOCK_SCRAPER_CONFIG["output_dir"]
+        assert service.scraper_class == self.mock_scraper_class
+        assert service.scraper_available is True
 
 
     def test_output_directory_creation(self):
@@ -42,14 +81,7 @@ class TestScraperServiceInitialization:
         Test: Directorio de salida debe crearse si no existe
         """
         # Arrange - Mock de directorio inexistente
-        mock_config = {
-            "base_url": "https://listado.mercadolibre.com.uy",
-            "output_dir": Path("/tmp/new_output")
-        }
-        
-        with patch('scraper.services.scraper_service.SCRAPER_CONFIG', mock_config), \
-             patch('scraper.services.scraper_service.SimpleScraper'), \
-             patch.object(Path, 'mkdir') as mock_mkdir:
+        with patch.object(Path, 'mkdir') as mock_mkdir:
             
             # Act - Crear instancia
             service = ScraperService()
@@ -58,6 +90,8 @@ class TestScraperServiceInitialization:
             mock_mkdir.assert_called_once_with(exist_ok=True)
 
 
+@pytest.mark.xdist_group(name="scraper_service_availability")
+@pytest.mark.usefixtures("patched_scraper_module")
 class TestScraperServiceAvailability:
     """Tests para verificación de disponibilidad."""
     
@@ -66,98 +100,72 @@ class TestScraperServiceAvailability:
         Test: is_available debe retornar True cuando scraper está cargado
         """
         # Arrange - Scraper disponible
-        mock_config = {
-            "base_url": "https://listado.mercadolibre.com.uy",
-            "output_dir": Path("/tmp/test_output")
-        }
+        service = ScraperService()
         
-        with patch('scraper.services.scraper_service.SCRAPER_CONFIG', mock_config), \
-             patch('scraper.services.scraper_service.SimpleScraper'):
-            
-            service = ScraperService()
-            
-            # Act - Verificar disponibilidad
-            result = service.is_available()
-            
-            # Assert - Verificar que está disponible
-            assert result is True
+        # Act - Verificar disponibilidad
+        result = service.is_available()
+        
+        # Assert - Verificar que está disponible
+        assert result is True
 
 
+@pytest.mark.xdist_group(name="scraper_service_scraping")
+@pytest.mark.usefixtures("patched_scraper_module")
 class TestScraperServiceScraping:
     """Tests para funcionalidad de scraping."""
     
     @pytest.fixture(autouse=True)
     def setup_service(self):
-        """Setup del service para cada test."""
-        mock_config = {
-            "base_url": "https://listado.mercadolibre.com.uy",
-            "output_dir": Path("/tmp/test_output")
-        }
-        
-        with patch('scraper.services.scraper_service.SCRAPER_CONFIG', mock_config), \
-             patch('scraper.services.scraper_service.SimpleScraper') as mock_scraper_class:
-            
-            self.mock_scraper_class = mock_scraper_class
-            self.service = ScraperService()
-            yield
+        """Service nuevo y mock de la clase del scraper limpio para cada test."""
+        self.mock_scraper_class.reset_mock(return_value=True, side_effect=True)
+        self.service = ScraperService()
+        # Stub de instancia: los tests no escriben archivos de salida
+        self.service._generate_output_file = Mock(return_value=Path("/tmp/output.json"))
 
-    @pytest.mark.asyncio
     async def test_scrape_products_success(self, sample_product_list):
         """
         Test: Scraping exitoso debe retornar resultado con productos
         """
         # Arrange - Configurar scraper exitoso
-        mock_scraper = AsyncMock()
-        mock_scraper.scrape_listing_with_details.return_value = sample_product_list
-        self.mock_scraper_class.return_value = mock_scraper
+        self.mock_scraper_class.return_value, calls = _fake_scraper(sample_product_list)
         
         url = "https://listado.mercadolibre.com.uy/notebooks"
         max_products = 10
         task_id = "test-task-123"
         
-        with patch.object(self.service, '_generate_output_file') as mock_generate:
-            mock_generate.return_value = Path("/tmp/output.json")
-            
-            # Act - Ejecutar scraping
-            result = await self.service.scrape_products(url, max_products, task_id)
-            
-            # Assert - Verificar resultado exitoso
-            assert isinstance(result, ScrapingResult)
-            assert result.products_count == len(sample_product_list)
-            assert result.success_rate == 100.0
-            assert result.duration > 0
-            assert result.output_file == "/tmp/output.json"
-            assert len(result.errors) == 0
-            
-            # Verificar llamadas
-            self.mock_scraper_class.assert_called_once_with(task_id=task_id)
-            mock_scraper.scrape_listing_with_details.assert_called_once_with(url, max_products)
+        # Act - Ejecutar scraping
+        result = await self.service.scrape_products(url, max_products, task_id)
+        
+        # Assert - Verificar resultado exitoso
+        assert isinstance(result, ScrapingResult)
+        assert result.products_count == len(sample_product_list)
+        assert result.success_rate == 100.0
+        assert result.duration > 0
+        assert result.output_file == "/tmp/output.json"
+        assert len(result.errors) == 0
+        
+        # Verificar llamadas
+        self.mock_scraper_class.assert_called_once_with(task_id=task_id)
+        assert calls == [(url, max_products)]
 
-    @pytest.mark.asyncio
     async def test_scrape_products_no_products_found(self):
         """
         Test: Scraping sin productos debe retornar resultado con éxito 0%
         """
         # Arrange - Configurar scraper sin productos
-        mock_scraper = AsyncMock()
-        mock_scraper.scrape_listing_with_details.return_value = []
-        self.mock_scraper_class.return_value = mock_scraper
+        self.mock_scraper_class.return_value, _ = _fake_scraper([])
         
         url = "https://listado.mercadolibre.com.uy/empty"
         max_products = 10
         
-        with patch.object(self.service, '_generate_output_file') as mock_generate:
-            mock_generate.return_value = Path("/tmp/empty.json")
-            
-            # Act - Ejecutar scraping sin productos
-            result = await self.service.scrape_products(url, max_products)
-            
-            # Assert - Verificar resultado sin productos
-            assert result.products_count == 0
-            assert result.success_rate == 0.0
-            assert len(result.errors) == 0
+        # Act - Ejecutar scraping sin productos
+        result = await self.service.scrape_products(url, max_products)
+        
+        # Assert - Verificar resultado sin productos
+        assert result.products_count == 0
+        assert result.success_rate == 0.0
+        assert len(result.errors) == 0
 
-    @pytest.mark.asyncio
     async def test_scrape_products_scraper_unavailable(self):
         """
         Test: Scraper no disponible debe lanzar RuntimeError
@@ -169,15 +177,12 @@ class TestScraperServiceScraping:
         with pytest.raises(RuntimeError, match="Scraper no disponible"):
             await self.service.scrape_products("http://test.com", 10)
 
-    @pytest.mark.asyncio
     async def test_scrape_products_scraper_exception(self):
         """
         Test: Excepción en scraper debe retornar resultado con error
         """
         # Arrange - Configurar excepción en scraper
-        mock_scraper = AsyncMock()
-        mock_scraper.scrape_listing_with_details.side_effect = Exception("Scraping failed")
-        self.mock_scraper_class.return_value = mock_scraper
+        self.mock_scraper_class.return_value, _ = _fake_scraper(error=Exception("Scraping failed"))
         
         url = "https://listado.mercadolibre.com.uy/error"
         max_products = 10
@@ -192,22 +197,16 @@ class TestScraperServiceScraping:
         assert len(result.errors) == 1
         assert "Scraping failed" in result.errors[0]
 
-    @pytest.mark.asyncio
     async def test_scrape_products_with_default_task_id(self, sample_product_list):
         """
         Test: Scraping sin task_id debe usar valor por defecto
         """
         # Arrange - Sin task_id específico
-        mock_scraper = AsyncMock()
-        mock_scraper.scrape_listing_with_details.return_value = sample_product_list
-        self.mock_scraper_class.return_value = mock_scraper
+        self.mock_scraper_class.return_value, _ = _fake_scraper(sample_product_list)
         
-        with patch.object(self.service, '_generate_output_file') as mock_generate:
-            mock_generate.return_value = Path("/tmp/output.json")
-            
-            # Act - Ejecutar scraping sin task_id
-            await self.service.scrape_products("http://test.com", 10)
-            
-            # Assert - Verificar task_id por defecto
-            self.mock_scraper_class.assert_called_once_with(task_id="default")
+        # Act - Ejecutar scraping sin task_id
+        await self.service.scrape_products("http://test.com", 10)
+        
+        # Assert - Verificar task_id por defecto
+        self.mock_scraper_class.assert_called_once_with(task_id="default")
 
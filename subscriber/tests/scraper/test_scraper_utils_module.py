@@ -0,0 +1,243 @@
+"""
+Tests unitarios para scraper/utils.py (exportación y extracción de campos) siguiendo patrón AAA.
+"""
+import csv
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+
+def _load_scraper_utils():
+    """
+    Cargar scraper/utils.py por ruta.
+    
+    El paquete scraper/utils/ tiene el mismo nombre y oculta al módulo en
+    los imports normales.
+    """
+    path = Path(__file__).resolve().parents[2] / "scraper" / "utils.py"
+    spec = importlib.util.spec_from_file_location("scraper_utils_module", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+scraper_utils = _load_scraper_utils()
+
+
+def _read_csv(path):
+    """Leer el CSV exportado como lista de filas."""
+    with open(path, newline='', encoding='utf-8') as csvfile:
+        return list(csv.reader(csvfile))
+
+
+class TestExportToCsv:
+    """Tests para export_to_csv."""
+    
+    def test_uniform_products(self, tmp_path):
+        """Test que productos con las mismas claves se exportan en orden."""
+        # Arrange
+        products = [
+            {"title": "Celular", "price": 100},
+            {"title": "Tablet", "price": 200},
+        ]
+        output_path = str(tmp_path / "products.csv")
+        
+        # Act
+        result = scraper_utils.export_to_csv(products, output_path)
+        
+        # Assert
+        assert result == output_path
+        assert _read_csv(output_path) == [
+            ["title", "price"],
+            ["Celular", "100"],
+            ["Tablet", "200"],
+        ]
+    
+    def test_single_field(self, tmp_path):
+        """Test que una sola columna se exporta como un valor por fila."""
+        # Arrange
+        products = [{"title": "Celular"}, {"title": "Tablet"}]
+        output_path = str(tmp_path / "products.csv")
+        
+        # Act
+        scraper_utils.export_to_csv(products, output_path)
+        
+        # Assert
+        assert _read_csv(output_path) == [["title"], ["Celular"], ["Tablet"]]
+    
+    def test_missing_keys_written_as_empty(self, tmp_path):
+        """Test que las claves que faltan en un producto posterior se escriben vacías."""
+        # Arrange
+        products = [
+            {"title": "Celular", "price": 100},
+            {"title": "Tablet"},
+        ]
+        output_path = str(tmp_path / "products.csv")
+        
+        # Act
+        scraper_utils.export_to_csv(products, output_path)
+        
+        # Assert
+        assert _read_csv(output_path) == [
+            ["title", "price"],
+            ["Celular", "100"],
+            ["Tablet", ""],
+        ]
+    
+    def test_empty_first_product(self, tmp_path):
+        """Test que un primer producto sin claves no rompe la exportación."""
+        # Arrange
+        products = [{}, {}]
+        output_path = str(tmp_path / "products.csv")
+        
+        # Act
+        result = scraper_utils.export_to_csv(products, output_path)
+        
+        # Assert
+        assert result == output_path
+    
+    def test_extra_keys_raise(self, tmp_path):
+        """Test que una clave ausente en el primer producto se rechaza como con DictWriter."""
+        # Arrange
+        products = [{"title": "Celular"}, {"title": "Tablet", "price": 200}]
+        output_path = str(tmp_path / "products.csv")
+        
+        # Act & Assert
+        with pytest.raises(ValueError):
+            scraper_utils.export_to_csv(products, output_path)
+
+
+class TestCleanText:
+    """Tests para clean_text."""
+    
+    @pytest.mark.parametrize("text, expected", [
+        ("  Celular   Samsung  ", "Celular Samsung"),
+        ("Celular\r\nSamsung\tGalaxy", "Celular Samsung Galaxy"),
+        ("", ""),
+    ])
+    def test_collapses_whitespace(self, text, expected):
+        """Test que los espacios, tabs y saltos de línea se colapsan en un espacio."""
+        # Act & Assert
+        assert scraper_utils.clean_text(text) == expected
+
+
+class _FakeNode:
+    """Nodo falso devuelto por query_selector."""
+    
+    def __init__(self, text, attributes):
+        self.text = text
+        self.attributes = attributes
+    
+    def text_content(self):
+        return self.text
+    
+    def get_attribute(self, attribute):
+        return self.attributes.get(attribute)
+
+
+class _FakeElement:
+    """
+    Elemento falso sobre un DOM {selector: (texto, atributos)}.
+    
+    Responde tanto a query_selector (helpers safe_get_*) como a evaluate
+    (extract_fields), que resuelve el spec serializado sobre el mismo DOM.
+    """
+    
+    def __init__(self, dom=None, error=None):
+        self.dom = dom or {}
+        self.error = error
+        self.calls = []
+    
+    def query_selector(self, selector):
+        if selector not in self.dom:
+            return None
+        return _FakeNode(*self.dom[selector])
+    
+    def evaluate(self, script, arg):
+        self.calls.append(arg)
+        if self.error is not None:
+            raise self.error
+        values = {}
+        for field, (selector, attribute) in arg.items():
+            node = self.query_selector(selector)
+            if node is None:
+                values[field] = None
+            elif attribute:
+                values[field] = node.get_attribute(attribute)
+            else:
+                values[field] = node.text_content()
+        return values
+
+
+# DOM de una tarjeta de producto sin vendedor
+PRODUCT_DOM = {
+    "h2.title": ("  Celular \n  Samsung ", {}),
+    "a": ("Ver", {"href": "https://example.com/p  "}),
+}
+
+
+class TestExtractFields:
+    """Tests para extract_fields."""
+    
+    SPEC = {
+        "title": ("h2.title", None),
+        "link": ("a", "href"),
+        "seller": (".seller", None),
+    }
+    
+    def test_single_evaluate_with_serialized_spec(self):
+        """Test que todos los selectores se resuelven en una sola llamada a evaluate."""
+        # Arrange
+        element = _FakeElement(PRODUCT_DOM)
+        
+        # Act
+        scraper_utils.extract_fields(element, self.SPEC)
+        
+        # Assert
+        assert element.calls == [{
+            "title": ["h2.title", None],
+            "link": ["a", "href"],
+            "seller": [".seller", None],
+        }]
+    
+    def test_text_cleaned_attribute_kept_missing_defaulted(self):
+        """Test que el texto se limpia, el atributo se respeta y lo ausente usa el default."""
+        # Arrange
+        element = _FakeElement(PRODUCT_DOM)
+        
+        # Act
+        fields = scraper_utils.extract_fields(element, self.SPEC, default="N/A")
+        
+        # Assert
+        assert fields == {
+            "title": "Celular Samsung",
+            "link": "https://example.com/p  ",
+            "seller": "N/A",
+        }
+    
+    def test_matches_safe_get_helpers(self):
+        """Test que el resultado coincide con safe_get_text/safe_get_attribute campo a campo."""
+        # Arrange
+        element = _FakeElement(PRODUCT_DOM)
+        
+        # Act
+        fields = scraper_utils.extract_fields(element, self.SPEC)
+        
+        # Assert
+        assert fields == {
+            "title": scraper_utils.safe_get_text(element, "h2.title"),
+            "link": scraper_utils.safe_get_attribute(element, "a", "href"),
+            "seller": scraper_utils.safe_get_text(element, ".seller"),
+        }
+    
+    def test_evaluate_error_returns_defaults(self):
+        """Test que un error del browser devuelve el default en todos los campos."""
+        # Arrange
+        element = _FakeElement(error=RuntimeError("Execution context was destroyed"))
+        
+        # Act
+        fields = scraper_utils.extract_fields(element, self.SPEC, default="N/A")
+        
+        # Assert
+        assert fields == {"title": "N/A", "link": "N/A", "seller": "N/A"}
@@ -0,0 +1,82 @@
+"""
+Tests unitarios para el guardado diferido de MetricsCollector siguiendo patrón AAA.
+"""
+import json
+import threading
+
+import pytest
+
+from scraper.utils.metrics import MetricsCollector
+
+
+def _flush(collector, timeout=2):
+    """Vaciar la cola del escritor fallando en lugar de bloquear el test."""
+    flusher = threading.Thread(target=collector.flush, daemon=True)
+    flusher.start()
+    flusher.join(timeout)
+    assert not flusher.is_alive(), "flush() no terminó: el hilo escritor dejó de drenar la cola"
+
+
+@pytest.fixture
+def collector(tmp_path):
+    """Recolector con el directorio de salida en tmp_path y un job activo."""
+    collector = MetricsCollector(output_dir=str(tmp_path))
+    collector.start_job("job-1", category_id="MLU1055", page_number=1)
+    collector.update_product_count(found=10, extracted=8, failed=2)
+    return collector
+
+
+class TestSaveMetrics:
+    """Tests para save_metrics y el hilo escritor."""
+    
+    def test_default_file_appends_json_lines(self, collector, tmp_path):
+        """Test que sin filename cada snapshot se agrega como una línea JSON."""
+        # Act
+        collector.save_metrics()
+        collector.save_metrics()
+        _flush(collector)
+        
+        # Assert
+        files = list(tmp_path.glob("scraping_metrics_*.jsonl"))
+        assert len(files) == 1
+        lines = files[0].read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 2
+        snapshot = json.loads(lines[-1])
+        assert snapshot["current_job"]["job_id"] == "job-1"
+        assert snapshot["current_job"]["products_extracted"] == 8
+    
+    def test_explicit_filename_writes_indented_json(self, collector, tmp_path):
+        """Test que con filename se sobrescribe el archivo con el último snapshot indentado."""
+        # Arrange
+        collector.save_metrics("metrics.json")
+        collector.update_product_count(extracted=1)
+        
+        # Act
+        collector.save_metrics("metrics.json")
+        _flush(collector)
+        
+        # Assert
+        content = (tmp_path / "metrics.json").read_text(encoding="utf-8")
+        assert content.startswith("{\n  ")
+        assert json.loads(content)["current_job"]["products_extracted"] == 9
+    
+    def test_unserializable_snapshot_does_not_stop_writer(self, collector, tmp_path, monkeypatch):
+        """Test que un snapshot que no se puede serializar no detiene el hilo escritor."""
+        # Arrange - un snapshot con referencia circular
+        circular = {}
+        circular["self"] = circular
+        monkeypatch.setattr(collector, "get_current_job_stats", lambda: circular)
+        collector.save_metrics()
+        _flush(collector)
+        monkeypatch.undo()
+        
+        # Act
+        collector.save_metrics()
+        _flush(collector)
+        
+        # Assert
+        assert collector._writer_thread.is_alive()
+        files = list(tmp_path.glob("scraping_metrics_*.jsonl"))
+        lines = files[0].read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 1
+        assert json.loads(lines[0])["current_job"]["job_id"] == "job-1"
@@ -0,0 +1,261 @@
+"""
+Tests unitarios para las utilidades de parseo del scraper siguiendo patrón AAA.
+"""
+import math
+import re
+import pytest
+from decimal import Decimal, InvalidOperation
+
+from scraper.utils import (
+    normalize_price,
+    normalize_prices,
+    extract_rating,
+    extract_ratings,
+    extract_review_count,
+    clean_text,
+    clear_caches
+)
+
+
+def _regex_normalize_price(price_text):
+    """Implementación original de normalize_price con regex, como referencia."""
+    if not price_text:
+        return None
+    cleaned = re.sub(r'[^\d.,]', '', price_text.strip())
+    if ',' in cleaned and '.' in cleaned:
+        cleaned = cleaned.replace('.', '').replace(',', '.')
+    elif ',' in cleaned:
+        cleaned = cleaned.replace(',', '.')
+    try:
+        return Decimal(cleaned)
+    except (ValueError, TypeError, InvalidOperation):
+        return None
+
+
+def _two_pass_clean_text(text):
+    """Implementación original de clean_text en dos pasadas, como referencia."""
+    if not text:
+        return ""
+    cleaned = re.sub(r'\s+', ' ', text.strip())
+    cleaned = re.sub(r'[\r\n\t]', ' ', cleaned)
+    return cleaned.strip()
+
+
+# Textos de precio como aparecen en los listados, incluidos casos inválidos
+PRICE_TEXTS = [
+    "$ 1.234,56",
+    "U$S 99",
+    "US$\xa02.500",
+    "1234.56",
+    "  1234.56  ",
+    "1,5",
+    "12,345.67",
+    "5.",
+    "1.2.3",
+    ".",
+    "$",
+    "abc",
+    "",
+    None,
+]
+
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    """Vaciar los caches de parseo para que cada test parta del mismo estado."""
+    clear_caches()
+    yield
+    clear_caches()
+
+
+class TestNormalizePrice:
+    """Tests para normalize_price."""
+    
+    @pytest.mark.parametrize("price_text, expected", [
+        ("1234.56", Decimal("1234.56")),
+        ("$ 1.234,56", Decimal("1234.56")),
+        ("1234,5", Decimal("1234.5")),
+        ("  990 ", Decimal("990")),
+    ])
+    def test_parses_text(self, price_text, expected):
+        """Test que los formatos de texto habituales se convierten a Decimal."""
+        # Act
+        result = normalize_price(price_text)
+        
+        # Assert
+        assert result == expected
+    
+    @pytest.mark.parametrize("price_text", ["", None, "$", ".", "sin precio"])
+    def test_unparseable_text_returns_none(self, price_text):
+        """Test que los textos sin número válido devuelven None en lugar de fallar."""
+        # Act & Assert
+        assert normalize_price(price_text) is None
+    
+    def test_decimal_input_returned_unchanged(self):
+        """Test que un Decimal se devuelve tal cual aunque antes se pasara un número igual."""
+        # Arrange - un float igual que podría compartir entrada de cache
+        price = Decimal("1.00")
+        normalize_price(1.0)
+        normalize_price(1)
+        
+        # Act
+        result = normalize_price(price)
+        
+        # Assert
+        assert result is price
+        assert str(result) == "1.00"
+    
+    @pytest.mark.parametrize("price, expected", [
+        (1, "1"),
+        (1.0, "1.0"),
+        (1234.5, "1234.5"),
+    ])
+    def test_numeric_input_does_not_depend_on_call_order(self, price, expected):
+        """Test que int y float conservan su representación tras llamadas previas."""
+        # Arrange - valores iguales de otros tipos llamados antes
+        normalize_price(Decimal("1.00"))
+        normalize_price(True)
+        
+        # Act
+        result = normalize_price(price)
+        
+        # Assert
+        assert str(result) == expected
+    
+    @pytest.mark.parametrize("price", [True, False])
+    def test_bool_is_not_a_price(self, price):
+        """Test que un bool devuelve None con el cache vacío o lleno."""
+        # Act & Assert - con el cache vacío
+        assert normalize_price(price) is None
+        
+        # Act & Assert - tras cachear números iguales
+        normalize_price(1)
+        normalize_price(0)
+        assert normalize_price(price) is None
+
+    @pytest.mark.parametrize("price_text", ["1234.56", "0.99", "1000", " 990 ", "5.", "1.2.3"])
+    def test_clean_text_fast_path_matches_full_path(self, price_text):
+        """Test que un texto ya limpio da lo mismo que con símbolos a quitar."""
+        # Arrange - el prefijo de moneda fuerza la limpieza completa
+        prefixed = f"$ {price_text}"
+        
+        # Act
+        fast = normalize_price(price_text)
+        full = normalize_price(prefixed)
+        
+        # Assert
+        assert fast == full
+        assert str(fast) == str(full)
+    
+    @pytest.mark.parametrize("price_text", PRICE_TEXTS)
+    def test_matches_regex_implementation(self, price_text):
+        """Test que la limpieza con bytes.translate equivale a la regex original."""
+        # Act & Assert
+        assert normalize_price(price_text) == _regex_normalize_price(price_text)
+
+
+class TestExtractRating:
+    """Tests para extract_rating."""
+    
+    @pytest.mark.parametrize("rating_text, expected", [
+        ("4.5", 4.5),
+        ("4,5", 4.5),
+        ("4.5/5", 4.5),
+        (" Calificación 3 de 5 ", 3.0),
+        ("4.56", 4.6),
+        ("5.0", 5.0),
+        ("6", None),
+        ("sin opiniones", None),
+        ("", None),
+        (None, None),
+    ])
+    def test_extracts_rating(self, rating_text, expected):
+        """Test que se extrae el primer número en rango 0-5 redondeado a un decimal."""
+        # Act & Assert
+        assert extract_rating(rating_text) == expected
+    
+    def test_cached_result_is_stable(self):
+        """Test que llamadas repetidas devuelven el mismo valor desde el cache."""
+        # Arrange
+        first = extract_rating("4,5")
+        
+        # Act
+        second = extract_rating("4,5")
+        
+        # Assert
+        assert first == second == 4.5
+        assert extract_rating.cache_info().hits == 1
+
+
+class TestExtractReviewCount:
+    """Tests para extract_review_count."""
+    
+    @pytest.mark.parametrize("review_text, expected", [
+        ("123 opiniones", 123),
+        ("(1.234)", 1234),
+        ("  7 ", 7),
+        ("sin opiniones", None),
+        ("", None),
+        (None, None),
+    ])
+    def test_extracts_review_count(self, review_text, expected):
+        """Test que se extrae el número de reviews quitando los puntos de miles."""
+        # Act & Assert
+        assert extract_review_count(review_text) == expected
+
+
+class TestCleanText:
+    """Tests para clean_text."""
+    
+    @pytest.mark.parametrize("text, expected", [
+        ("  Celular   Samsung  ", "Celular Samsung"),
+        ("Celular\r\nSamsung\tGalaxy", "Celular Samsung Galaxy"),
+        ("Celular\x0b\x0cSamsung", "Celular Samsung"),
+        ("\n\t ", ""),
+        ("", ""),
+        (None, ""),
+    ])
+    def test_collapses_whitespace(self, text, expected):
+        """Test que los espacios, tabs y saltos de línea se colapsan en un espacio."""
+        # Act
+        result = clean_text(text)
+        
+        # Assert
+        assert result == expected
+        assert result == _two_pass_clean_text(text)
+
+
+# Textos de rating, incluidos valores con centésimas y fuera de rango
+RATING_TEXTS = [
+    f"{hundredths / 100:.2f}" for hundredths in range(0, 501, 5)
+] + ["4,5", "4.5/5", "4,55 estrellas", "10/10", "6", "sin opiniones", "", None]
+
+
+class TestBatchHelpers:
+    """Tests que comparan las versiones vectorizadas con las escalares."""
+    
+    def test_normalize_prices_matches_normalize_price(self):
+        """Test que normalize_prices devuelve lo mismo que normalize_price por elemento."""
+        # Act
+        batch = normalize_prices(PRICE_TEXTS)
+        
+        # Assert
+        expected = [normalize_price(price_text) for price_text in PRICE_TEXTS]
+        assert batch.tolist() == expected
+        assert [str(value) for value in batch] == [str(value) for value in expected]
+    
+    def test_normalize_prices_keeps_index_and_empty_input(self):
+        """Test que la serie tiene un elemento por precio, también sin precios."""
+        # Act & Assert
+        assert len(normalize_prices(["1", "2", "3"])) == 3
+        assert normalize_prices([]).empty
+    
+    def test_extract_ratings_matches_extract_rating(self):
+        """Test que extract_ratings devuelve lo mismo que extract_rating, con NaN por None."""
+        # Act
+        batch = extract_ratings(RATING_TEXTS)
+        
+        # Assert
+        expected = [extract_rating(rating_text) for rating_text in RATING_TEXTS]
+        actual = [None if math.isnan(value) else value for value in batch.tolist()]
+        assert actual == expected
@@ -1,25 +1,74 @@
 """
 Tests unitarios para main.py siguiendo patrón AAA y TDD.
 """
+import json
 import pytest
 import asyncio
 import uuid
-from unittest.mock import Mock, AsyncMock, patch, MagicMock
-from fastapi.testclient import TestClient
+from unittest.mock import Mock, AsyncMock, MagicMock, PropertyMock
 from datetime import datetime
 
 from models import (
     ScrapingRequest, ScrapingResponse, ScrapingTask, 
     ScrapingResult, HealthCheck, ScrapingStatus
 )
+import main
+
+try:
+    import orjson
+    # orjson decodifica bytes directamente, sin pasar por str
+    _json_loads = orjson.loads
+except ImportError:  # orjson es opcional
+    _json_loads = json.loads
+
+# Formatos válidos de categoría aceptados por /scrape
+VALID_CATEGORIES = [
+    "MLU107",    # 3 dígitos
+    "MLA1234",   # 4 dígitos
+    "MLC456",    # 3 dígitos
+    "MLB7890"    # 4 dígitos
+]
+
+# Formatos que validate_category debe rechazar
+INVALID_CATEGORIES = [
+    "ML107",         # Sin letra después de ML
+    "MLUA107",       # Dos letras después de ML
+    "MLA12",         # Solo 2 dígitos
+    "MLA12345",      # 5 dígitos
+    "XLA1234",       # No empieza con ML
+    "MLA1A23",       # Letra en lugar de número
+    "MLA-123",       # Guión
+    "MLA 123",       # Espacio
+    "",              # Vacío
+    "123",           # Solo números
+    "INVALID"        # Completamente inválido
+]
+
+# Cuerpo válido para POST /scrape
+SCRAPE_REQUEST_BODY = {
+    "url": "https://listado.mercadolibre.com.uy/MLU1144",
+    "category": "MLU1144",
+    "page": 1,
+    "max_products": 10
+}
+
+# Resultado de scraping de los tests de background (solo lectura: se valida una vez)
+EXPECTED_SCRAPING_RESULT = ScrapingResult(
+    task_id="test-task-id",
+    products_count=5,
+    success_rate=100.0,
+    duration=3.5,
+    output_file="/test/output.json",
+    errors=[]
+)
 
 
 class TestMainAPI:
     """Tests para los endpoints principales de la API."""
     
     @pytest.fixture(autouse=True)
-    def setup_mocks(self, mock_rabbitmq_manager, mock_scraper_service, 
-                   mock_api_config, mock_scraper_config, 
+    def setup_mocks(self, monkeypatch, async_api_client, mock_rabbitmq_manager, mock_scraper_service, 
+                   mock_cache_manager, mock_api_config, mock_scraper_config, 
                    mock_rabbitmq_config):
         """Setup automático de mocks para cada test."""
         # Arrange - Configurar mock de thread sin recursión
@@ -27,129 +76,127 @@ class TestMainAPI:
         mock_thread.is_alive.return_value = True
         mock_thread.name = "TestListener"
         
-        # Arrange - Configurar mocks globales
-        with patch.multiple(
-            'main',
-            API_CONFIG=mock_api_config,
-            SCRAPER_CONFIG=mock_scraper_config,
-            RABBITMQ_CONFIG=mock_rabbitmq_config,
-            queue_manager=mock_rabbitmq_manager,
-            scraper_service=mock_scraper_service,
-            listener_running=True,
-            listener_thread=mock_thread
+        # Arrange - Reemplazar globals de main con asignación directa (se deshace al final)
+        for name, value in (
+            ("API_CONFIG", mock_api_config),
+            ("SCRAPER_CONFIG", mock_scraper_config),
+            ("RABBITMQ_CONFIG", mock_rabbitmq_config),
+            ("queue_manager", mock_rabbitmq_manager),
+            ("scraper_service", mock_scraper_service),
+            ("cache_manager", mock_cache_manager),
+            ("listener_running", True),
+            ("listener_thread", mock_thread),
         ):
-            # Importar main después de configurar los mocks
-            import main
-            self.app = main.app
-            self.client = TestClient(self.app)
-            yield
+            monkeypatch.setattr(main, name, value)
+        
+        # Los tests configuran directamente los mocks ya instalados en main
+        self.mock_manager = mock_rabbitmq_manager
+        self.mock_service = mock_scraper_service
+        self.mock_cache = mock_cache_manager
+        
+        # Cliente compartido por la sesión; los mocks se aplican por test
+        self.client = async_api_client
 
-    def test_root_endpoint_returns_correct_response(self, mock_api_config):
+    async def test_root_endpoint_returns_correct_response(self, mock_api_config):
         """
         Test: El endpoint raíz debe retornar información básica de la API
         """
-        # Arrange - Ya configurado en setup_mocks
+        # Arrange - Cuerpo exacto que serializa FastAPI (JSON compacto, UTF-8)
         expected_response = {
             "message": "Mercado Libre Uruguay Scraping API",
             "version": mock_api_config["version"],
             "docs": "/docs"
         }
+        expected_body = json.dumps(
+            expected_response, ensure_ascii=False, separators=(",", ":")
+        ).encode()
         
         # Act - Hacer petición al endpoint raíz
-        response = self.client.get("/")
+        response = await self.client.get("/")
         
-        # Assert - Verificar respuesta
+        # Assert - Comparar los bytes sin volver a parsear el JSON
         assert response.status_code == 200
-        assert response.json() == expected_response
+        assert response.content == expected_body
 
-    def test_health_check_healthy_when_all_services_available(self, mock_api_config):
+    async def test_health_check_healthy_when_all_services_available(self, mock_api_config):
         """
         Test: Health check debe retornar 'healthy' cuando todos los servicios están disponibles
         """
         # Arrange - Servicios disponibles (ya configurado en setup_mocks)
         
         # Act - Hacer petición al health check
-        response = self.client.get("/health")
+        response = await self.client.get("/health")
         
         # Assert - Verificar respuesta healthy
         assert response.status_code == 200
-        data = response.json()
+        data = _json_loads(response.content)
         assert data["status"] == "healthy"
         assert data["rabbitmq_connected"] is True
         assert data["scraper_available"] is True
         assert data["version"] == mock_api_config["version"]
         assert "timestamp" in data
 
-    def test_health_check_unhealthy_when_rabbitmq_disconnected(self, mock_api_config):
+    async def test_health_check_unhealthy_when_rabbitmq_disconnected(self):
         """
         Test: Health check debe retornar 'unhealthy' cuando RabbitMQ está desconectado
         """
         # Arrange - RabbitMQ desconectado
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.connected = False
-            
-            # Act - Hacer petición al health check
-            response = self.client.get("/health")
-            
-            # Assert - Verificar respuesta unhealthy
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == "unhealthy"
-            assert data["rabbitmq_connected"] is False
-
-    def test_health_check_unhealthy_when_scraper_unavailable(self, mock_api_config):
+        self.mock_manager.connected = False
+        
+        # Act - Llamar al handler directamente (la ruta ya se cubre en el test healthy)
+        result = await main.health_check()
+        
+        # Assert - Verificar respuesta unhealthy
+        assert result.status == "unhealthy"
+        assert result.rabbitmq_connected is False
+
+    async def test_health_check_unhealthy_when_scraper_unavailable(self):
         """
         Test: Health check debe retornar 'unhealthy' cuando el scraper no está disponible
         """
         # Arrange - Scraper no disponible
-        with patch('main.scraper_service') as mock_service:
-            mock_service.is_available.return_value = False
-            
-            # Act - Hacer petición al health check
-            response = self.client.get("/health")
-            
-            # Assert - Verificar respuesta unhealthy
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == "unhealthy"
-            assert data["scraper_available"] is False
-
-    def test_health_check_handles_exceptions_gracefully(self, mock_api_config):
+        self.mock_service.is_available.return_value = False
+        
+        # Act - Llamar al handler directamente
+        result = await main.health_check()
+        
+        # Assert - Verificar respuesta unhealthy
+        assert result.status == "unhealthy"
+        assert result.scraper_available is False
+
+    async def test_health_check_handles_exceptions_gracefully(self):
         """
         Test: Health check debe manejar excepciones y retornar estado unhealthy
         """
-        # Arrange - Configurar excepción
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.connected = Mock(side_effect=Exception("Test error"))
-            
-            # Act - Hacer petición al health check
-            response = self.client.get("/health")
-            
-            # Assert - Verificar manejo de error
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == "unhealthy"
-            assert data["rabbitmq_connected"] is False
-            assert data["scraper_available"] is False
-
-    def test_listener_status_returns_correct_information(self):
+        # Arrange - Leer connected lanza excepción (cada Mock tiene su propia clase)
+        type(self.mock_manager).connected = PropertyMock(side_effect=Exception("Test error"))
+        
+        # Act - Llamar al handler directamente
+        result = await main.health_check()
+        
+        # Assert - Verificar manejo de error
+        assert result.status == "unhealthy"
+        assert result.rabbitmq_connected is False
+        assert result.scraper_available is False
+
+    async def test_listener_status_returns_correct_information(self):
         """
         Test: El endpoint de estado del listener debe retornar información correcta
         """
         # Arrange - Ya configurado en setup_mocks
         
         # Act - Hacer petición al estado del listener
-        response = self.client.get("/listener/status")
+        response = await self.client.get("/listener/status")
         
         # Assert - Verificar respuesta
         assert response.status_code == 200
-        data = response.json()
+        data = _json_loads(response.content)
         assert data["listener_running"] is True
         assert data["listener_thread_alive"] is True
         assert data["listener_thread_name"] == "TestListener"
         assert "timestamp" in data
 
-    def test_get_categories_returns_pattern_information(self):
+    async def test_get_categories_returns_pattern_information(self):
         """
         Test: El endpoint de categorías debe retornar información del patrón de validación
         """
@@ -162,25 +209,24 @@ class TestMainAPI:
         }
         
         # Act - Hacer petición a categorías
-        response = self.client.get("/categories")
+        response = await self.client.get("/categories")
         
         # Assert - Verificar respuesta
         assert response.status_code == 200
-        data = response.json()
+        data = _json_loads(response.content)
         assert data["pattern"] == expected_response["pattern"]
         assert data["description"] == expected_response["description"]
         assert data["examples"] == expected_response["examples"]
         assert data["regex"] == expected_response["regex"]
 
-    @patch('main.uuid.uuid4')
-    def test_create_scraping_task_with_valid_request(self, mock_uuid, sample_scraping_request, 
+    async def test_create_scraping_task_with_valid_request(self, monkeypatch, sample_scraping_request, 
                                                    mock_scraper_config):
         """
         Test: Crear tarea de scraping con request válido debe retornar respuesta exitosa
         """
         # Arrange - Configurar UUID y request válido
         mock_task_id = "test-uuid-1234"
-        mock_uuid.return_value = mock_task_id
+        monkeypatch.setattr(main, "task_id_factory", lambda: mock_task_id)
         
         request_data = {
             "url": sample_scraping_request.url,
@@ -190,11 +236,11 @@ class TestMainAPI:
         }
         
         # Act - Crear tarea de scraping
-        response = self.client.post("/scrape", json=request_data)
+        response = await self.client.post("/scrape", json=request_data)
         
         # Assert - Verificar respuesta exitosa
         assert response.status_code == 200
-        data = response.json()
+        data = _json_loads(response.content)
         assert data["task_id"] == mock_task_id
         assert data["status"] == ScrapingStatus.PENDING
         assert data["message"] == "Tarea de scraping creada exitosamente"
@@ -206,7 +252,7 @@ class TestMainAPI:
         expected_url = f"{mock_scraper_config['base_url']}?category={sample_scraping_request.category}&page={sample_scraping_request.page}"
         assert data["url"] == expected_url
 
-    def test_create_scraping_task_with_invalid_category(self):
+    async def test_create_scraping_task_with_invalid_category(self):
         """
         Test: Crear tarea con categoría inválida debe retornar error 422 (validación Pydantic)
         """
@@ -219,152 +265,92 @@ class TestMainAPI:
         }
         
         # Act - Intentar crear tarea con categoría inválida
-        response = self.client.post("/scrape", json=invalid_request)
+        response = await self.client.post("/scrape", json=invalid_request)
         
         # Assert - Verificar error 422 (validación Pydantic)
         assert response.status_code == 422
-        data = response.json()
+        data = _json_loads(response.content)
         assert "detail" in data
         # La validación Pydantic debería incluir el mensaje del validador
         error_detail = str(data["detail"])
         assert "ML[A-Z][0-9]{3,4}" in error_detail
 
-    def test_create_scraping_task_with_valid_category_formats(self):
+    @pytest.mark.parametrize("category", VALID_CATEGORIES)
+    async def test_create_scraping_task_with_valid_category_formats(self, category):
         """
         Test: Crear tarea con diferentes formatos válidos de categoría debe funcionar
         """
-        # Arrange - Configurar cache para no interferir
-        with patch('main.cache_manager') as mock_cache:
-            mock_cache.get.return_value = None  # No respuesta cached
-            
-            # Diferentes formatos válidos de categoría
-            valid_categories = [
-                "MLU107",    # 3 dígitos
-                "MLA1234",   # 4 dígitos
-                "MLC456",    # 3 dígitos
-                "MLB7890"    # 4 dígitos
-            ]
-            
-            for category in valid_categories:
-                # Arrange - Request con categoría válida
-                valid_request = {
-                    "url": f"https://listado.mercadolibre.com.uy/{category}",
-                    "category": category,
-                    "page": 1,
-                    "max_products": 10
-                }
-                
-                # Act - Crear tarea con categoría válida
-                response = self.client.post("/scrape", json=valid_request)
-                
-                # Assert - Verificar que se acepta la categoría
-                assert response.status_code == 200, f"Categoría {category} debería ser válida"
-                data = response.json()
-                assert data["status"] == ScrapingStatus.PENDING
-                assert data["category"] == category
-
-    def test_create_scraping_task_handles_queue_manager_failure(self, sample_scraping_request):
-        """
-        Test: Manejar fallo del queue manager debe retornar error 500
-        """
-        # Arrange - Configurar fallo en queue manager y cache sin respuesta
-        with patch('main.queue_manager') as mock_manager, \
-             patch('main.cache_manager') as mock_cache:
-            
-            # Configurar cache para no devolver respuesta cached
-            mock_cache.get.return_value = None
-            # Configurar fallo en queue manager
-            mock_manager.add_task = AsyncMock(side_effect=Exception("Queue error"))
-            
-            request_data = {
-                "url": sample_scraping_request.url,
-                "category": sample_scraping_request.category,
-                "page": sample_scraping_request.page,
-                "max_products": sample_scraping_request.max_products
-            }
-            
-            # Act - Intentar crear tarea
-            response = self.client.post("/scrape", json=request_data)
-            
-            # Assert - Verificar error 500
-            assert response.status_code == 500
-            data = response.json()
-            assert data["detail"] == "Error interno del servidor"
-
-    def test_get_task_status_with_existing_task(self, sample_scraping_task):
+        # Arrange - Request con categoría válida (cache mockeado sin respuestas)
+        valid_request = {
+            "url": f"https://listado.mercadolibre.com.uy/{category}",
+            "category": category,
+            "page": 1,
+            "max_products": 10
+        }
+        
+        # Act - Crear tarea con categoría válida
+        response = await self.client.post("/scrape", json=valid_request)
+        
+        # Assert - Verificar que se acepta la categoría
+        assert response.status_code == 200, f"Categoría {category} debería ser válida"
+        data = _json_loads(response.content)
+        assert data["status"] == ScrapingStatus.PENDING
+        assert data["category"] == category
+
+    async def test_get_task_status_with_existing_task(self, sample_scraping_task):
         """
         Test: Obtener estado de tarea existente debe retornar la tarea
         """
         # Arrange - Configurar tarea existente
         task_id = sample_scraping_task.id
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.get_task = AsyncMock(return_value=sample_scraping_task)
-            
-            # Act - Obtener estado de tarea
-            response = self.client.get(f"/tasks/{task_id}")
-            
-            # Assert - Verificar respuesta exitosa
-            assert response.status_code == 200
-            data = response.json()
-            assert data["id"] == task_id
-            assert data["status"] == sample_scraping_task.status
-
-    def test_get_task_status_with_nonexistent_task(self):
+        self.mock_manager.get_task.return_value = sample_scraping_task
+        
+        # Act - Obtener estado de tarea
+        response = await self.client.get(f"/tasks/{task_id}")
+        
+        # Assert - Verificar respuesta exitosa
+        assert response.status_code == 200
+        data = _json_loads(response.content)
+        assert data["id"] == task_id
+        assert data["status"] == sample_scraping_task.status
+
+    async def test_get_task_status_with_nonexistent_task(self):
         """
         Test: Obtener estado de tarea inexistente debe retornar error 404
         """
         # Arrange - Configurar tarea inexistente
         task_id = "nonexistent-task-id"
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.get_task = AsyncMock(return_value=None)
-            
-            # Act - Intentar obtener tarea inexistente
-            response = self.client.get(f"/tasks/{task_id}")
-            
-            # Assert - Verificar error 404
-            assert response.status_code == 404
-            data = response.json()
-            assert data["detail"] == "Tarea no encontrada"
-
-    def test_get_task_status_handles_queue_manager_failure(self):
-        """
-        Test: Manejar fallo del queue manager al obtener tarea debe retornar error 500
-        """
-        # Arrange - Configurar fallo en queue manager
-        task_id = "test-task-id"
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.get_task = AsyncMock(side_effect=Exception("Queue error"))
-            
-            # Act - Intentar obtener tarea
-            response = self.client.get(f"/tasks/{task_id}")
-            
-            # Assert - Verificar error 500
-            assert response.status_code == 500
-            data = response.json()
-            assert data["detail"] == "Error interno del servidor"
-
-    def test_list_tasks_with_default_parameters(self, sample_scraping_task):
+        self.mock_manager.get_task.return_value = None
+        
+        # Act - Intentar obtener tarea inexistente
+        response = await self.client.get(f"/tasks/{task_id}")
+        
+        # Assert - Verificar error 404
+        assert response.status_code == 404
+        data = _json_loads(response.content)
+        assert data["detail"] == "Tarea no encontrada"
+
+    async def test_list_tasks_with_default_parameters(self, sample_scraping_task):
         """
         Test: Listar tareas con parámetros por defecto debe retornar lista
         """
         # Arrange - Configurar lista de tareas
         tasks_list = [sample_scraping_task]
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.list_tasks = AsyncMock(return_value=tasks_list)
-            
-            # Act - Listar tareas
-            response = self.client.get("/tasks")
-            
-            # Assert - Verificar respuesta exitosa
-            assert response.status_code == 200
-            data = response.json()
-            assert len(data) == 1
-            assert data[0]["id"] == sample_scraping_task.id
-            
-            # Verificar que se llamó con parámetros por defecto
-            mock_manager.list_tasks.assert_called_once_with(limit=50, offset=0)
-
-    def test_list_tasks_with_custom_parameters(self, sample_scraping_task):
+        self.mock_manager.list_tasks.return_value = tasks_list
+        
+        # Act - Listar tareas
+        response = await self.client.get("/tasks")
+        
+        # Assert - Verificar respuesta exitosa
+        assert response.status_code == 200
+        data = _json_loads(response.content)
+        assert len(data) == 1
+        assert data[0]["id"] == sample_scraping_task.id
+        
+        # Verificar que se llamó con parámetros por defecto
+        self.mock_manager.list_tasks.assert_called_once_with(limit=50, offset=0)
+
+    async def test_list_tasks_with_custom_parameters(self, sample_scraping_task):
         """
         Test: Listar tareas con parámetros personalizados debe usar esos parámetros
         """
@@ -373,110 +359,81 @@ class TestMainAPI:
         offset = 5
         tasks_list = [sample_scraping_task]
         
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.list_tasks = AsyncMock(return_value=tasks_list)
-            
-            # Act - Listar tareas con parámetros personalizados
-            response = self.client.get(f"/tasks?limit={limit}&offset={offset}")
-            
-            # Assert - Verificar que se usaron los parámetros correctos
-            assert response.status_code == 200
-            mock_manager.list_tasks.assert_called_once_with(limit=limit, offset=offset)
-
-    def test_list_tasks_handles_queue_manager_failure(self):
-        """
-        Test: Manejar fallo del queue manager al listar tareas debe retornar error 500
-        """
-        # Arrange - Configurar fallo en queue manager
-        with patch('main.queue_manager') as mock_manager:
-            mock_manager.list_tasks = AsyncMock(side_effect=Exception("Queue error"))
-            
-            # Act - Intentar listar tareas
-            response = self.client.get("/tasks")
-            
-            # Assert - Verificar error 500
-            assert response.status_code == 500
-            data = response.json()
-            assert data["detail"] == "Error interno del servidor"
+        self.mock_manager.list_tasks.return_value = tasks_list
+        
+        # Act - Listar tareas con parámetros personalizados
+        response = await self.client.get(f"/tasks?limit={limit}&offset={offset}")
+        
+        # Assert - Verificar que se usaron los parámetros correctos
+        assert response.status_code == 200
+        self.mock_manager.list_tasks.assert_called_once_with(limit=limit, offset=offset)
+
+    @pytest.mark.parametrize("method,url,manager_method,body", [
+        ("POST", "/scrape", "add_task", SCRAPE_REQUEST_BODY),
+        ("GET", "/tasks/test-task-id", "get_task", None),
+        ("GET", "/tasks", "list_tasks", None),
+    ], ids=["create_task", "get_task", "list_tasks"])
+    async def test_endpoint_handles_queue_manager_failure(self, method, url, manager_method, body):
+        """
+        Test: Un fallo del queue manager en cualquier endpoint debe retornar error 500
+        """
+        # Arrange - Configurar fallo en queue manager (cache mockeado sin respuestas)
+        getattr(self.mock_manager, manager_method).side_effect = Exception("Queue error")
+        
+        # Act - Hacer la petición al endpoint
+        response = await self.client.request(method, url, json=body)
+        
+        # Assert - Verificar error 500
+        assert response.status_code == 500
+        data = _json_loads(response.content)
+        assert data["detail"] == "Error interno del servidor"
 
 
 class TestCategoryValidation:
     """Tests para la función de validación de categorías."""
 
-    def test_validate_category_with_valid_formats(self):
+    @pytest.mark.parametrize("category", VALID_CATEGORIES + ["MLZ999", "MLX0001"])
+    def test_validate_category_with_valid_formats(self, category):
         """
         Test: La función validate_category debe aceptar formatos válidos
         """
-        # Arrange & Act & Assert - Importar la función y probar formatos válidos
-        from main import validate_category
-        
-        valid_categories = [
-            "MLU107",     # 3 dígitos
-            "MLA1234",    # 4 dígitos
-            "MLC456",     # 3 dígitos
-            "MLB7890",    # 4 dígitos
-            "MLZ999",     # Cualquier letra
-            "MLX0001"     # Con ceros
-        ]
-        
-        for category in valid_categories:
-            assert validate_category(category) is True, f"Categoría {category} debería ser válida"
+        # Arrange & Act & Assert - Probar el formato válido
+        assert main.validate_category(category) is True, f"Categoría {category} debería ser válida"
 
-    def test_validate_category_with_invalid_formats(self):
+    @pytest.mark.parametrize("category", INVALID_CATEGORIES)
+    def test_validate_category_with_invalid_formats(self, category):
         """
         Test: La función validate_category debe rechazar formatos inválidos
         """
-        # Arrange & Act & Assert - Probar formatos inválidos
-        from main import validate_category
-        
-        invalid_categories = [
-            "ML107",         # Sin letra después de ML
-            "MLUA107",       # Dos letras después de ML
-            "MLA12",         # Solo 2 dígitos
-            "MLA12345",      # 5 dígitos
-            "XLA1234",       # No empieza con ML
-            "MLA1A23",       # Letra en lugar de número
-            "MLA-123",       # Guión
-            "MLA 123",       # Espacio
-            "",              # Vacío
-            "123",           # Solo números
-            "INVALID"        # Completamente inválido
-        ]
-        
-        for category in invalid_categories:
-            assert validate_category(category) is False, f"Categoría {category} debería ser inválida"
+        # Arrange & Act & Assert - Probar el formato inválido
+        assert main.validate_category(category) is False, f"Categoría {category} debería ser inválida"
 
-    def test_validate_category_case_insensitive(self):
+    @pytest.mark.parametrize("category", ["mlu107", "MLU107", "MlU107", "mLu107"])
+    def test_validate_category_case_insensitive(self, category):
         """
         Test: La función validate_category debe ser case-insensitive
         """
-        # Arrange & Act & Assert - Probar diferentes casos
-        from main import validate_category
-        
-        test_cases = [
-            ("mlu107", True),     # Minúsculas
-            ("MLU107", True),     # Mayúsculas
-            ("MlU107", True),     # Mixto
-            ("mLu107", True),     # Mixto
-        ]
-        
-        for category, expected in test_cases:
-            result = validate_category(category)
-            assert result == expected, f"Categoría {category} debería ser {'válida' if expected else 'inválida'}"
+        # Arrange & Act & Assert - Minúsculas, mayúsculas y mixtos son válidos
+        assert main.validate_category(category) is True, f"Categoría {category} debería ser válida"
 
 
 class TestBackgroundTasks:
     """Tests para funciones de procesamiento en background."""
     
+    @pytest.fixture(scope="class", autouse=True)
+    def build_background_mocks(self, request):
+        """Mocks asíncronos construidos una sola vez para toda la clase."""
+        request.cls.mock_manager = AsyncMock()
+        request.cls.mock_service = AsyncMock()
+    
     @pytest.fixture(autouse=True)
-    def setup_background_mocks(self, mock_rabbitmq_manager, mock_scraper_service):
-        """Setup de mocks para tests de background tasks."""
-        # No usar patch.multiple para evitar problemas con imports
-        self.mock_queue_manager = mock_rabbitmq_manager
-        self.mock_scraper_service = mock_scraper_service
-        yield
-
-    @pytest.mark.asyncio
+    def setup_background_mocks(self, monkeypatch):
+        """Reiniciar los mocks compartidos e instalarlos en main con asignación directa."""
+        self.mock_manager.reset_mock(return_value=True, side_effect=True)
+        self.mock_service.reset_mock(return_value=True, side_effect=True)
+        monkeypatch.setattr(main, "queue_manager", self.mock_manager)
+        monkeypatch.setattr(main, "scraper_service", self.mock_service)
+
     async def test_process_scraping_task_successful_execution(self, sample_scraping_request):
         """
         Test: Procesamiento exitoso de tarea de scraping debe actualizar estados correctamente
@@ -484,39 +441,22 @@ class TestBackgroundTasks:
         # Arrange - Configurar datos de prueba
         task_id = "test-task-id"
         url = "https://test-url.com"
-        expected_result = ScrapingResult(
-            task_id=task_id,
-            products_count=5,
-            success_rate=100.0,
-            duration=3.5,
-            output_file="/test/output.json",
-            errors=[]
-        )
+        self.mock_service.scrape_products.return_value = EXPECTED_SCRAPING_RESULT
         
-        # Configurar mocks asíncronos correctamente
-        mock_manager = AsyncMock()
-        mock_service = AsyncMock()
-        mock_service.scrape_products.return_value = expected_result
-        
-        with patch('main.queue_manager', mock_manager), \
-             patch('main.scraper_service', mock_service):
-            
-            # Importar función después de configurar mocks
-            from main import process_scraping_task
-            
-            # Act - Procesar tarea de scraping
-            await process_scraping_task(task_id, sample_scraping_request, url)
-            
-            # Assert - Verificar llamadas correctas
-            mock_manager.update_task_status.assert_called_with(task_id, ScrapingStatus.PROCESSING)
-            mock_manager.update_task_started.assert_called_once_with(task_id)
-            mock_service.scrape_products.assert_called_once_with(
-                url=url,
-                max_products=sample_scraping_request.max_products
-            )
-            mock_manager.update_task_completed.assert_called_once_with(task_id, expected_result)
-
-    @pytest.mark.asyncio
+        # Act - Procesar tarea de scraping
+        await main.process_scraping_task(task_id, sample_scraping_request, url)
+        
+        # Assert - Verificar llamadas correctas
+        self.mock_manager.update_task_status.assert_called_with(task_id, ScrapingStatus.PROCESSING)
+        self.mock_manager.update_task_started.assert_called_once_with(task_id)
+        self.mock_service.scrape_products.assert_called_once_with(
+            url=url,
+            max_products=sample_scraping_request.max_products
+        )
+        self.mock_manager.update_task_completed.assert_called_once_with(
+            task_id, EXPECTED_SCRAPING_RESULT
+        )
+
     async def test_process_scraping_task_handles_scraper_failure(self, sample_scraping_request):
         """
         Test: Fallo en scraper debe marcar tarea como fallida
@@ -526,129 +466,113 @@ class TestBackgroundTasks:
         url = "https://test-url.com"
         error_message = "Scraper error"
         
-        # Configurar mocks asíncronos correctamente
-        mock_manager = AsyncMock()
-        mock_service = AsyncMock()
-        mock_service.scrape_products.side_effect = Exception(error_message)
-        
-        with patch('main.queue_manager', mock_manager), \
-             patch('main.scraper_service', mock_service):
-            
-            from main import process_scraping_task
-            
-            # Act - Procesar tarea con fallo
-            await process_scraping_task(task_id, sample_scraping_request, url)
-            
-            # Assert - Verificar manejo de error
-            mock_manager.update_task_status.assert_called_with(task_id, ScrapingStatus.PROCESSING)
-            mock_manager.update_task_started.assert_called_once_with(task_id)
-            mock_manager.update_task_failed.assert_called_once_with(task_id, error_message)
+        self.mock_service.scrape_products.side_effect = Exception(error_message)
+        
+        # Act - Procesar tarea con fallo
+        await main.process_scraping_task(task_id, sample_scraping_request, url)
+        
+        # Assert - Verificar manejo de error
+        self.mock_manager.update_task_status.assert_called_with(task_id, ScrapingStatus.PROCESSING)
+        self.mock_manager.update_task_started.assert_called_once_with(task_id)
+        self.mock_manager.update_task_failed.assert_called_once_with(task_id, error_message)
 
 
 class TestMessageListener:
     """Tests para funciones del message listener."""
     
-    def test_start_message_listener_initializes_correctly(self):
+    def test_start_message_listener_initializes_correctly(self, monkeypatch):
         """
         Test: Iniciar message listener debe configurar variables globales correctamente
         """
-        # Arrange - Mock del MessageListener de la ruta correcta
-        with patch('manager.listeners.MessageListener') as mock_listener_class, \
-             patch('main.listener_running', False):
-            
-            mock_listener = Mock()
-            mock_listener.start_listening = Mock()
-            mock_listener_class.return_value = mock_listener
-            
-            from main import start_message_listener
-            
-            # Act - Iniciar message listener
-            start_message_listener()
-            
-            # Assert - Verificar inicialización correcta
-            mock_listener_class.assert_called_once()
-            mock_listener.start_listening.assert_called_once()
-
-
-    def test_stop_message_listener_updates_flag(self):
+        # Arrange - Reemplazar la clase MessageListener que usa main
+        mock_listener = Mock()
+        mock_listener_class = Mock(return_value=mock_listener)
+        monkeypatch.setattr(main, "MessageListener", mock_listener_class)
+        monkeypatch.setattr(main, "listener_running", False)
+        
+        # Act - Iniciar message listener
+        main.start_message_listener()
+        
+        # Assert - Verificar inicialización correcta
+        mock_listener_class.assert_called_once()
+        mock_listener.start_listening.assert_called_once()
+        assert main.listener_running is True
+
+
+    def test_stop_message_listener_updates_flag(self, monkeypatch):
         """
         Test: Detener message listener debe actualizar flag global
         """
         # Arrange - Configurar listener running
-        with patch('main.listener_running', True):
-            from main import stop_message_listener
-            
-            # Act - Detener message listener
-            stop_message_listener()
-            
-            # Assert - El flag debería actualizarse (verificado por funcionalidad)
+        monkeypatch.setattr(main, "listener_running", True)
+        
+        # Act - Detener message listener
+        main.stop_message_listener()
+        
+        # Assert - El flag global queda desactivado
+        assert main.listener_running is False
 
 
 class TestStartupShutdown:
     """Tests para eventos de startup y shutdown."""
     
-    @pytest.mark.asyncio
-    async def test_startup_event_initializes_services(self, mock_rabbitmq_config):
+    @pytest.fixture(autouse=True)
+    def preserve_main_globals(self, monkeypatch):
+        """startup_event reasigna globals de main: restaurarlos al terminar cada test."""
+        for name in ("queue_manager", "scraper_service", "listener_thread"):
+            monkeypatch.setattr(main, name, getattr(main, name))
+
+    async def test_startup_event_initializes_services(self, monkeypatch, mock_rabbitmq_config):
         """
         Test: Evento de startup debe inicializar todos los servicios correctamente
         """
         # Arrange - Mocks de servicios
-        with patch('main.RabbitMQManager') as mock_rabbitmq_class, \
-             patch('main.ScraperService') as mock_scraper_class, \
-             patch('main.threading.Thread') as mock_thread_class, \
-             patch('main.RABBITMQ_CONFIG', mock_rabbitmq_config):
-            
-            mock_rabbitmq = Mock()
-            mock_scraper = Mock()
-            mock_thread = Mock()
-            
-            mock_rabbitmq_class.return_value = mock_rabbitmq
-            mock_scraper_class.return_value = mock_scraper
-            mock_thread_class.return_value = mock_thread
-            
-            from main import startup_event
-            
-            # Act - Ejecutar startup event
-            await startup_event()
-            
-            # Assert - Verificar inicialización de servicios
-            mock_rabbitmq_class.assert_called_once_with(mock_rabbitmq_config)
-            mock_scraper_class.assert_called_once()
-            mock_thread_class.assert_called_once()
-            mock_thread.start.assert_called_once()
-
-    @pytest.mark.asyncio
-    async def test_startup_event_handles_initialization_failure(self):
+        mock_rabbitmq_class = Mock()
+        mock_scraper_class = Mock()
+        mock_thread = Mock()
+        mock_thread_class = Mock(return_value=mock_thread)
+        
+        monkeypatch.setattr(main, "RabbitMQManager", mock_rabbitmq_class)
+        monkeypatch.setattr(main, "ScraperService", mock_scraper_class)
+        monkeypatch.setattr(main.threading, "Thread", mock_thread_class)
+        monkeypatch.setattr(main, "RABBITMQ_CONFIG", mock_rabbitmq_config)
+        
+        # Act - Ejecutar startup event
+        await main.startup_event()
+        
+        # Assert - Verificar inicialización de servicios
+        mock_rabbitmq_class.assert_called_once_with(mock_rabbitmq_config)
+        mock_scraper_class.assert_called_once()
+        mock_thread_class.assert_called_once()
+        mock_thread.start.assert_called_once()
+
+    async def test_startup_event_handles_initialization_failure(self, monkeypatch):
         """
         Test: Fallo en startup debe propagar la excepción
         """
         # Arrange - Configurar fallo en inicialización
-        with patch('main.RabbitMQManager') as mock_rabbitmq_class:
-            mock_rabbitmq_class.side_effect = Exception("Initialization error")
-            
-            from main import startup_event
-            
-            # Act & Assert - Verificar que se propaga la excepción
-            with pytest.raises(Exception, match="Initialization error"):
-                await startup_event()
-
-    @pytest.mark.asyncio
-    async def test_shutdown_event_closes_connections(self):
+        monkeypatch.setattr(
+            main, "RabbitMQManager", Mock(side_effect=Exception("Initialization error"))
+        )
+        
+        # Act & Assert - Verificar que se propaga la excepción
+        with pytest.raises(Exception, match="Initialization error"):
+            await main.startup_event()
+
+    async def test_shutdown_event_closes_connections(self, monkeypatch):
         """
         Test: Evento de shutdown debe cerrar conexiones correctamente
         """
         # Arrange - Mock de queue manager
         mock_manager = Mock()
+        mock_stop_listener = Mock()
+        monkeypatch.setattr(main, "queue_manager", mock_manager)
+        monkeypatch.setattr(main, "stop_message_listener", mock_stop_listener)
+        
+        # Act - Ejecutar shutdown event
+        await main.shutdown_event()
         
-        with patch('main.queue_manager', mock_manager), \
-             patch('main.stop_message_listener') as mock_stop_listener:
-            
-            from main import shutdown_event
-            
-            # Act - Ejecutar shutdown event
-            await shutdown_event()
-            
-            # Assert - Verificar cierre de conexiones
-            mock_stop_listener.assert_called_once()
-            mock_manager.close.assert_called_once()
+        # Assert - Verificar cierre de conexiones
+        mock_stop_listener.assert_called_once()
+        mock_manager.close.assert_called_once()
 
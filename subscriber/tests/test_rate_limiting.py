@@ -31,52 +31,159 @@ class TestRateLimiter:
         """Test que el rate limiter respeta los límites de tiempo."""
         config = RateLimitConfig(
             requests_per_minute=60,
-            delay_between_requests=1.0,
-            max_requests_per_second=1.0
+            burst_size=1
         )
         rate_limiter = RateLimiter(config)
         
-        start_time = time.time()
-        
         # Primera petición debería pasar inmediatamente
-        await rate_limiter.acquire("test.com")
-        first_time = time.time()
+        async with rate_limiter.acquire("test.com"):
+            first_time = time.time()
         
         # Segunda petición debería esperar al menos 1 segundo
-        await rate_limiter.acquire("test.com")
-        second_time = time.time()
+        async with rate_limiter.acquire("test.com"):
+            second_time = time.time()
         
         # Verificar que pasó al menos 1 segundo
         assert second_time - first_time >= 0.9  # Margen de tolerancia
-        
-        rate_limiter.release()
-        rate_limiter.release()
     
     @pytest.mark.asyncio
     async def test_domain_specific_limits(self):
         """Test que los límites son específicos por dominio."""
         config = RateLimitConfig(
             requests_per_minute=60,
-            delay_between_requests=1.0,
-            max_requests_per_second=1.0
+            burst_size=1
         )
         rate_limiter = RateLimiter(config)
         
-        start_time = time.time()
-        
         # Petición a dominio 1
-        await rate_limiter.acquire("domain1.com")
-        first_time = time.time()
+        async with rate_limiter.acquire("domain1.com"):
+            first_time = time.time()
         
         # Petición a dominio 2 debería pasar inmediatamente
-        await rate_limiter.acquire("domain2.com")
-        second_time = time.time()
+        async with rate_limiter.acquire("domain2.com"):
+            second_time = time.time()
         
         # Verificar que no hubo delay entre dominios diferentes
         assert second_time - first_time < 0.5
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_is_per_domain(self):
+        """Test que agotar la concurrencia de un dominio no bloquea a otro."""
+        config = RateLimitConfig(max_concurrent=1, burst_size=5)
+        rate_limiter = RateLimiter(config)
+        
+        # domain1.com queda con su único slot ocupado
+        async with rate_limiter.acquire("domain1.com"):
+            
+            async def acquire_other_domain():
+                async with rate_limiter.acquire("domain2.com"):
+                    pass
+            
+            # domain2.com debe poder adquirir sin esperar a domain1.com
+            await asyncio.wait_for(acquire_other_domain(), timeout=0.5)
+    
+    @pytest.mark.asyncio
+    async def test_acquire_context_releases_slot_on_exception(self):
+        """Test que el contexto libera el slot del dominio aunque haya excepción."""
+        config = RateLimitConfig(max_concurrent=1, burst_size=5)
+        rate_limiter = RateLimiter(config)
+        
+        with pytest.raises(RuntimeError):
+            async with rate_limiter.acquire("test.com"):
+                raise RuntimeError("fallo en la petición")
+        
+        # El único slot debe estar libre de nuevo
+        async def acquire_again():
+            async with rate_limiter.acquire("test.com"):
+                pass
+        
+        await asyncio.wait_for(acquire_again(), timeout=0.5)
+    
+    @pytest.mark.asyncio
+    async def test_extra_release_raises(self):
+        """Test que liberar un slot de más se detecta en lugar de sumar concurrencia."""
+        rate_limiter = RateLimiter(RateLimitConfig(max_concurrent=1))
+        
+        async with rate_limiter.acquire("test.com"):
+            pass
+        
+        with pytest.raises(ValueError):
+            rate_limiter.domain_semaphores["test.com"].release()
+    
+    @pytest.mark.asyncio
+    async def test_token_bucket_allows_burst_then_throttles(self):
+        """Test que el bucket permite burst_size peticiones inmediatas y luego limita."""
+        config = RateLimitConfig(
+            requests_per_minute=60,
+            burst_size=3,
+            jitter=False
+        )
+        rate_limiter = RateLimiter(config)
         
-        rate_limiter.release()
-        rate_limiter.release()
+        start_time = time.monotonic()
+        for _ in range(3):
+            async with rate_limiter.acquire("test.com"):
+                pass
+        burst_time = time.monotonic()
+        
+        # La cuarta petición debe esperar a que se reponga un token
+        async with rate_limiter.acquire("test.com"):
+            pass
+        throttled_time = time.monotonic()
+        
+        assert burst_time - start_time < 0.5
+        assert throttled_time - burst_time >= 0.9
+
+    @pytest.mark.asyncio
+    async def test_refill_task_stops_when_buckets_full_and_on_close(self):
+        """Test que la tarea de reposición termina sola y que close() la cancela."""
+        config = RateLimitConfig(requests_per_minute=600, burst_size=1, jitter=False)
+        rate_limiter = RateLimiter(config)
+        
+        async with rate_limiter.acquire("test.com"):
+            pass
+        task = rate_limiter._refill_task
+        assert task is not None
+        
+        # Un tick (0.1s) rellena el bucket y la tarea termina sola
+        await asyncio.wait_for(task, timeout=1)
+        assert rate_limiter._refill_task is None
+        
+        async with rate_limiter.acquire("test.com"):
+            pass
+        task = rate_limiter._refill_task
+        rate_limiter.close()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert rate_limiter._refill_task is None
+
+    def test_limiter_reused_across_event_loops(self):
+        """Test que el limitador funciona en asyncio.run consecutivos (worker, cli)."""
+        config = RateLimitConfig(
+            requests_per_minute=600,
+            burst_size=1,
+            jitter=False,
+            max_concurrent=1
+        )
+        rate_limiter = RateLimiter(config)
+        
+        async def concurrent_requests():
+            # Con un slot y un token, la segunda espera al semáforo, al
+            # Condition y a la tarea de reposición
+            async def request():
+                async with rate_limiter.acquire("test.com"):
+                    await asyncio.sleep(0)
+            
+            await asyncio.wait_for(asyncio.gather(request(), request()), timeout=2)
+        
+        asyncio.run(concurrent_requests())
+        first_cond = rate_limiter._cond
+        
+        # El segundo loop empieza sin tokens y con la tarea del anterior cancelada
+        asyncio.run(concurrent_requests())
+        
+        assert rate_limiter._cond is not first_cond
+        assert rate_limiter.request_count == 4
 
 
 class TestRetryHandler:
@@ -127,6 +234,25 @@ class TestRetryHandler:
             await retry_handler.execute_with_retry(function_with_value_error)
 
 
+    def test_calculate_delay_full_jitter_within_cap(self):
+        """Test que el delay con full jitter queda entre 0 y el backoff acotado."""
+        config = RetryConfig(base_delay=1.0, max_delay=5.0, exponential_base=2.0, jitter=True)
+        retry_handler = RetryHandler(config)
+        
+        for attempt, cap in [(1, 1.0), (2, 2.0), (3, 4.0), (4, 5.0), (10, 5.0)]:
+            for _ in range(50):
+                assert 0 <= retry_handler._calculate_delay(attempt) <= cap
+    
+    def test_calculate_delay_without_jitter(self):
+        """Test que sin jitter el delay es el backoff exponencial acotado."""
+        config = RetryConfig(base_delay=1.0, max_delay=5.0, exponential_base=2.0, jitter=False)
+        retry_handler = RetryHandler(config)
+        
+        assert retry_handler._calculate_delay(1) == 1.0
+        assert retry_handler._calculate_delay(3) == 4.0
+        assert retry_handler._calculate_delay(10) == 5.0
+
+
 class TestScrapingRateLimiter:
     """Tests para el ScrapingRateLimiter."""
     
@@ -146,6 +272,10 @@ class TestScrapingRateLimiter:
         assert stats["total_requests"] == 1
         assert stats["successful_requests"] == 1
         assert stats["failed_requests"] == 0
+        assert isinstance(stats["total_wait_time_ns"], int)
+        assert stats["total_wait_time"] == pytest.approx(stats["total_wait_time_ns"] * 1e-9)
+        assert stats["elapsed_time"] >= stats["total_wait_time"]
+        assert stats["start_time"] == pytest.approx(time.time() - stats["elapsed_time"], abs=1)
     
     @pytest.mark.asyncio
     async def test_execute_request_failure(self):
@@ -202,6 +332,8 @@ class TestUtilityFunctions:
         assert extract_domain_from_url("http://example.com/path") == "example.com"
         assert extract_domain_from_url("invalid-url") == "default"
         assert extract_domain_from_url("") == "default"
+        assert extract_domain_from_url("http://example.com:8080?q=1") == "example.com:8080"
+        assert extract_domain_from_url("//example.com/path") == "example.com"
 
 
 @pytest.mark.asyncio